@@ -0,0 +1,106 @@
+import argparse
+import sys
+
+from benchmarks.compare import compare_results
+from benchmarks.harness import (Recorder, get_metadata, s3_stand_in,
+                                write_results)
+from benchmarks.suites import bench_bulk, bench_formats, bench_listing
+
+
+suite_names = ['formats', 'listing', 'bulk']
+
+
+def run(args):
+    """
+    Runs benchmark suites against a stand-in for S3 and writes the results
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments
+    Returns:
+        int: The exit code
+    """
+    recorder = Recorder(args.repeat)
+    metadata = get_metadata(args.endpoint_url, args.repeat)
+    with s3_stand_in(args.endpoint_url) as bucket:
+        if 'formats' in args.suites:
+            bench_formats(recorder, bucket, args.rows, args.filetypes)
+        if 'listing' in args.suites:
+            bench_listing(recorder, bucket, args.list_sizes,
+                          args.max_workers)
+        if 'bulk' in args.suites:
+            bench_bulk(recorder, bucket, args.bulk_objects,
+                       args.bulk_object_size, args.max_workers)
+    if args.output:
+        write_results(args.output, metadata, recorder.results)
+        print('Results written to {}'.format(args.output))
+    return 0
+
+
+def compare(args):
+    """
+    Compares the results of two benchmark runs
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments
+    Returns:
+        int: 1 if any benchmark regressed by more than the threshold, else 0
+    """
+    regressions = compare_results(args.baseline, args.current,
+                                  args.threshold)
+    if regressions:
+        print('{} benchmark(s) regressed by more than {:.0%}'.format(
+            len(regressions), args.threshold))
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmarks rivet against a local stand-in for S3.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run benchmark suites')
+    run_parser.add_argument('--suites', nargs='+', choices=suite_names,
+                            default=suite_names)
+    run_parser.add_argument('--rows', nargs='+', type=int,
+                            default=[1000, 100000, 1000000],
+                            help='Rows of the DataFrames in the formats suite')
+    run_parser.add_argument('--filetypes', nargs='+',
+                            help='Filetypes in the formats suite '
+                                 '(default: every supported filetype)')
+    run_parser.add_argument('--list-sizes', nargs='+', type=int,
+                            default=[10000, 100000, 1000000],
+                            help='Keys listed in the listing suite')
+    run_parser.add_argument('--bulk-objects', type=int, default=1000,
+                            help='Objects copied and deleted in the bulk '
+                                 'suite')
+    run_parser.add_argument('--bulk-object-size', type=int, default=1024,
+                            help='Size of each object in the bulk suite, '
+                                 'in bytes')
+    run_parser.add_argument('--max-workers', type=int,
+                            help='Threads used by concurrent operations '
+                                 '(default: the \'max_workers\' option)')
+    run_parser.add_argument('--repeat', type=int, default=3,
+                            help='Times to run each benchmark')
+    run_parser.add_argument('--endpoint-url',
+                            help='S3-compatible server to benchmark against '
+                                 '(default: moto, in-process)')
+    run_parser.add_argument('--output', help='JSON file to write results to')
+    run_parser.set_defaults(fn=run)
+
+    compare_parser = subparsers.add_parser(
+        'compare', help='Compare the results of two runs')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='Fraction by which a median time may '
+                                     'grow before it counts as a regression')
+    compare_parser.set_defaults(fn=compare)
+
+    args = parser.parse_args(argv)
+    return args.fn(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
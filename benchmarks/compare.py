@@ -0,0 +1,65 @@
+import json
+
+from benchmarks.harness import format_params
+
+
+def compare_results(baseline_path, current_path, threshold=0.1):
+    """
+    Compares the median times of the benchmarks of two runs
+
+    Args:
+        baseline_path (str): The JSON results of the baseline run
+        current_path (str): The JSON results of the run to compare
+        threshold (float, default 0.1):
+            The fraction by which a benchmark must be slower than in the
+            baseline to count as a regression
+    Returns:
+        list<dict>: The benchmarks that regressed, with their 'baseline'
+            and 'current' median times and their 'ratio'
+    """
+    baseline = _index_results(baseline_path)
+    current = _index_results(current_path)
+
+    regressions = []
+    print('{:<10} {:<28} {:<40} {:>10} {:>10} {:>8}'.format(
+        'suite', 'benchmark', 'params', 'baseline', 'current', 'ratio'))
+    for result_key in sorted(set(baseline) & set(current)):
+        baseline_result = baseline[result_key]
+        current_result = current[result_key]
+        ratio = current_result['median'] / baseline_result['median']
+        regressed = ratio > 1 + threshold
+        print('{:<10} {:<28} {:<40} {:>9.4f}s {:>9.4f}s {:>7.2f}x{}'.format(
+            current_result['suite'], current_result['benchmark'],
+            format_params(current_result['params']),
+            baseline_result['median'], current_result['median'], ratio,
+            ' REGRESSION' if regressed else ''))
+        if regressed:
+            regressions.append({'suite': current_result['suite'],
+                                'benchmark': current_result['benchmark'],
+                                'params': current_result['params'],
+                                'baseline': baseline_result['median'],
+                                'current': current_result['median'],
+                                'ratio': ratio})
+
+    for result_key in sorted(set(baseline) ^ set(current)):
+        print('Only in {} run: {}'.format(
+            'baseline' if result_key in baseline else 'current',
+            ' '.join(result_key)))
+    return regressions
+
+
+def _index_results(path):
+    """
+    Reads the results of a run, indexed by benchmark and parameters
+
+    Args:
+        path (str): The JSON results of a run
+    Returns:
+        dict<tuple, dict>: The results, by their suite, benchmark and
+            parameters
+    """
+    with open(path) as f:
+        results = json.load(f)['results']
+    return {(result['suite'], result['benchmark'],
+             json.dumps(result['params'], sort_keys=True)): result
+            for result in results}
@@ -0,0 +1,190 @@
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import contextmanager
+
+import boto3
+from botocore.config import Config
+from moto import mock_s3
+
+import rivet as rv
+from rivet.s3_client import get_s3_client
+
+
+BENCHMARK_BUCKET = 'rivet-benchmarks'
+
+# Packages whose versions are recorded with the results
+recorded_packages = ['boto3', 'botocore', 'moto', 'pandas', 'pyarrow',
+                     'fastavro', 'pandavro']
+
+
+@contextmanager
+def s3_stand_in(endpoint_url=None):
+    """
+    Provides a local stand-in for S3 with an empty benchmark bucket, and
+    points rivet at it
+
+    Args:
+        endpoint_url (str, optional):
+            The URL of an S3-compatible server to use, e.g. a moto server
+            started with 'moto_server -p 5000'. If 'None', S3 is mocked
+            in-process with moto.
+    Yields:
+        str: The name of the benchmark bucket
+    """
+    verbose = rv.get_option('verbose')
+    rv.set_option('verbose', False)
+    try:
+        if endpoint_url is None:
+            with mock_s3():
+                rv.set_client(None)
+                get_s3_client().create_bucket(Bucket=BENCHMARK_BUCKET)
+                yield BENCHMARK_BUCKET
+        else:
+            client = boto3.session.Session().client(
+                's3', endpoint_url=endpoint_url,
+                config=Config(max_pool_connections=rv.get_option(
+                    'max_pool_connections')))
+            rv.set_client(client)
+            client.create_bucket(Bucket=BENCHMARK_BUCKET)
+            try:
+                yield BENCHMARK_BUCKET
+            finally:
+                _empty_bucket(client, BENCHMARK_BUCKET)
+                client.delete_bucket(Bucket=BENCHMARK_BUCKET)
+    finally:
+        rv.set_client(None)
+        rv.set_option('verbose', verbose)
+
+
+class Recorder(object):
+    def __init__(self, repeat):
+        """
+        Times benchmarks and collects their results
+
+        Args:
+            repeat (int): The number of times to run each benchmark
+        """
+        self.repeat = repeat
+        self.results = []
+
+    def measure(self, suite, benchmark, params, fn, setup=None,
+                **extra_fields):
+        """
+        Times a benchmark, running it 'repeat' times
+
+        Args:
+            suite (str): The suite the benchmark belongs to
+            benchmark (str): The name of the benchmark
+            params (dict): The parameters the benchmark is run with
+            fn (callable): The code to time
+            setup (callable, optional):
+                Called before each run of 'fn', without being timed
+            **extra_fields: Additional fields to record with the result
+        Returns:
+            dict: The result, with the time of each run in seconds and
+                their minimum, median and mean
+        """
+        seconds = []
+        for _ in range(self.repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            fn()
+            seconds.append(time.perf_counter() - start)
+
+        result = {
+            'suite': suite,
+            'benchmark': benchmark,
+            'params': params,
+            'seconds': seconds,
+            'min': min(seconds),
+            'median': statistics.median(seconds),
+            'mean': statistics.mean(seconds)
+        }
+        result.update(extra_fields)
+        self.results.append(result)
+        print('{:<10} {:<28} {:<40} {:>10.4f}s'.format(
+            suite, benchmark, format_params(params), result['median']))
+        return result
+
+
+def format_params(params):
+    """
+    Formats the parameters of a benchmark for display
+
+    Args:
+        params (dict): The parameters of a benchmark
+    Returns:
+        str: The parameters, as 'name=value' pairs
+    """
+    return ' '.join('{}={}'.format(name, value)
+                    for name, value in sorted(params.items()))
+
+
+def get_metadata(endpoint_url, repeat):
+    """
+    Describes the environment that benchmarks are run in, so that results
+    from different runs can be told apart
+
+    Args:
+        endpoint_url (str): The S3 stand-in endpoint, if not mocked
+        repeat (int): The number of times each benchmark is run
+    Returns:
+        dict: The metadata of the run
+    """
+    packages = {}
+    for package in recorded_packages:
+        try:
+            packages[package] = __import__(package).__version__
+        except (ImportError, AttributeError):
+            packages[package] = None
+
+    try:
+        git_commit = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            stderr=subprocess.DEVNULL).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        git_commit = None
+
+    return {
+        'rivet_version': rv.__version__,
+        'git_commit': git_commit,
+        'python_version': platform.python_version(),
+        'platform': platform.platform(),
+        'packages': packages,
+        's3': endpoint_url or 'moto (in-process)',
+        'repeat': repeat,
+        'started_at': datetime.datetime.utcnow().isoformat() + 'Z'
+    }
+
+
+def write_results(path, metadata, results):
+    """
+    Writes benchmark results to a JSON file
+
+    Args:
+        path (str): The file to write to
+        metadata (dict): The metadata of the run
+        results (list<dict>): The results of the benchmarks
+    """
+    with open(path, 'w') as f:
+        json.dump({'metadata': metadata, 'results': results}, f, indent=2)
+
+
+def _empty_bucket(client, bucket):
+    """
+    Deletes every object in a bucket
+
+    Args:
+        client (boto3.client): The S3 client
+        bucket (str): The bucket to empty
+    """
+    paginator = client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket):
+        keys = [{'Key': obj['Key']} for obj in page.get('Contents', [])]
+        if keys:
+            client.delete_objects(Bucket=bucket, Delete={'Objects': keys})
@@ -0,0 +1,200 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import rivet as rv
+from rivet.s3_client import get_s3_client
+from rivet.storage_formats import (format_fn_map,
+                                   get_chunk_readable_filetypes)
+
+
+def make_df(rows, seed=0):
+    """
+    Makes a DataFrame of the types of data commonly stored with rivet
+
+    Args:
+        rows (int): The number of rows
+        seed (int, default 0): The seed of the random data
+    Returns:
+        pd.DataFrame: The DataFrame
+    """
+    rng = np.random.RandomState(seed)
+    return pd.DataFrame({
+        'intcol': rng.randint(0, 1000000, size=rows),
+        'floatcol': rng.random_sample(rows),
+        'strcol': rng.choice(['alpha', 'beta', 'gamma', 'delta'], size=rows),
+        'idcol': ['id_{:08d}'.format(i) for i in range(rows)]
+    })
+
+
+def bench_formats(recorder, bucket, row_counts, filetypes=None):
+    """
+    Benchmarks writing and reading every storage format, in full and in
+    chunks, for DataFrames of several sizes
+
+    Args:
+        recorder (Recorder): The recorder to time benchmarks with
+        bucket (str): The bucket to benchmark in
+        row_counts (list<int>): The numbers of rows of DataFrames to use
+        filetypes (list<str>, optional):
+            The filetypes to benchmark. Defaults to every supported filetype.
+    """
+    filetypes = filetypes or sorted(format_fn_map)
+    chunk_filetypes = get_chunk_readable_filetypes()
+    stream_filetypes = get_chunk_readable_filetypes(stream=True)
+
+    for rows in row_counts:
+        df = make_df(rows)
+        chunk_size = max(rows // 10, 1)
+        for filetype in filetypes:
+            key = 'formats/{}/df.{}'.format(rows, filetype)
+            params = {'filetype': filetype, 'rows': rows}
+
+            recorder.measure('formats', 'write', params,
+                             lambda: rv.write(df, key, bucket,
+                                              show_progressbar=False))
+            object_size = get_s3_client().head_object(
+                Bucket=bucket, Key=key)['ContentLength']
+            recorder.measure('formats', 'read', params,
+                             lambda: rv.read(key, bucket,
+                                             show_progressbar=False),
+                             object_size=object_size)
+
+            chunk_params = dict(params, chunk_size=chunk_size)
+            if filetype in chunk_filetypes:
+                recorder.measure(
+                    'formats', 'read_df_in_chunks', chunk_params,
+                    lambda: _consume(rv.read_df_in_chunks(
+                        key, bucket, chunk_size=chunk_size,
+                        show_progressbar=False)),
+                    object_size=object_size)
+            if filetype in stream_filetypes:
+                recorder.measure(
+                    'formats', 'read_df_in_chunks_stream', chunk_params,
+                    lambda: _consume(rv.read_df_in_chunks(
+                        key, bucket, chunk_size=chunk_size,
+                        show_progressbar=False, stream=True)),
+                    object_size=object_size)
+
+
+def bench_listing(recorder, bucket, key_counts, max_workers=None):
+    """
+    Benchmarks listing prefixes of several numbers of keys, sequentially,
+    page by page and in parallel shards
+
+    Args:
+        recorder (Recorder): The recorder to time benchmarks with
+        bucket (str): The bucket to benchmark in
+        key_counts (list<int>): The numbers of keys to list
+        max_workers (int, optional):
+            The number of threads to populate the bucket and list shards
+            with. Defaults to the 'max_workers' option.
+    """
+    for num_keys in key_counts:
+        prefix = 'listing/{}/'.format(num_keys)
+        _put_empty_objects(bucket, ['{}{:07d}/key.csv'.format(prefix, i)
+                                    for i in range(num_keys)],
+                           max_workers)
+        params = {'keys': num_keys}
+
+        recorder.measure('listing', 'list_objects', params,
+                         lambda: rv.list_objects(prefix, bucket,
+                                                 recursive=True))
+        recorder.measure('listing', 'iter_objects', params,
+                         lambda: _consume(rv.iter_objects(prefix, bucket,
+                                                          recursive=True)))
+        recorder.measure('listing', 'list_objects_parallel', params,
+                         lambda: rv.list_objects(prefix, bucket,
+                                                 recursive=True,
+                                                 parallel=True,
+                                                 max_workers=max_workers))
+
+
+def bench_bulk(recorder, bucket, num_objects, object_size,
+               max_workers=None):
+    """
+    Benchmarks recursively copying and deleting a prefix of objects
+
+    Args:
+        recorder (Recorder): The recorder to time benchmarks with
+        bucket (str): The bucket to benchmark in
+        num_objects (int): The number of objects under the prefix
+        object_size (int): The size of each object, in bytes
+        max_workers (int, optional):
+            The number of objects to copy and batches to delete at once.
+            Defaults to the 'max_workers' option.
+    """
+    source_prefix = 'bulk/source/'
+    dest_prefix = 'bulk/dest/'
+    _put_objects(bucket, ['{}{:07d}.bin'.format(source_prefix, i)
+                          for i in range(num_objects)],
+                 b'\0' * object_size, max_workers)
+    params = {'objects': num_objects, 'object_size': object_size}
+
+    recorder.measure(
+        'bulk', 'copy_recursive', params,
+        lambda: rv.copy(source_prefix, dest_prefix, bucket, bucket,
+                        show_progressbar=False, recursive=True,
+                        max_workers=max_workers),
+        setup=lambda: _delete_prefix(bucket, dest_prefix))
+    recorder.measure(
+        'bulk', 'delete_recursive', params,
+        lambda: rv.delete(dest_prefix, bucket, recursive=True,
+                          max_workers=max_workers),
+        setup=lambda: rv.copy(source_prefix, dest_prefix, bucket, bucket,
+                              show_progressbar=False, recursive=True,
+                              max_workers=max_workers))
+
+
+def _consume(iterator):
+    """
+    Exhausts an iterator
+
+    Args:
+        iterator (iterator): The iterator to exhaust
+    """
+    for _ in iterator:
+        pass
+
+
+def _delete_prefix(bucket, prefix):
+    """
+    Deletes the objects under a prefix, if there are any
+
+    Args:
+        bucket (str): The bucket to delete objects from
+        prefix (str): The prefix to delete
+    """
+    if rv.list_objects(prefix, bucket):
+        rv.delete(prefix, bucket, recursive=True)
+
+
+def _put_empty_objects(bucket, keys, max_workers=None):
+    """
+    Creates empty objects, several at a time
+
+    Args:
+        bucket (str): The bucket to create objects in
+        keys (list<str>): The keys of the objects
+        max_workers (int, optional): The number of objects to create at once
+    """
+    _put_objects(bucket, keys, b'', max_workers)
+
+
+def _put_objects(bucket, keys, body, max_workers=None):
+    """
+    Creates objects with the same contents, several at a time
+
+    Args:
+        bucket (str): The bucket to create objects in
+        keys (list<str>): The keys of the objects
+        body (bytes): The contents of each object
+        max_workers (int, optional): The number of objects to create at once
+    """
+    s3 = get_s3_client()
+    max_workers = max_workers or rv.get_option('max_workers')
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(
+            lambda key: s3.put_object(Bucket=bucket, Key=key, Body=body),
+            keys))
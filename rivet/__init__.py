@@ -1,10 +1,14 @@
 from .config import get_option, set_option
 from .inform import inform
-from .s3_copy import copy
+from .s3_client import set_client
+from .s3_copy import copy, copy_prefix
 from .s3_delete import delete
-from .s3_list import list_objects, exists
-from .s3_read import read, read_df_in_chunks, read_badpractice, download_file
-from .s3_write import write, upload_file
+from .s3_list import list_objects, iter_objects, exists, exists_many
+from .s3_read import (read, read_df_in_chunks, read_many, read_badpractice,
+                      download_file)
+from .s3_write import (write, write_df_in_chunks, write_partitioned,
+                       open_writer, upload_file)
+from .s3_sync import sync
 from .storage_formats import format_fn_map
 from ._version import (
     __title__, __description__, __url__, __version__,
@@ -16,18 +20,27 @@ supported_formats = list(format_fn_map.keys())
 
 __all__ = [
     'copy',
+    'copy_prefix',
     'delete',
     'exists',
+    'exists_many',
     'list_objects',
+    'iter_objects',
     'read',
     'read_df_in_chunks',
+    'read_many',
     'read_badpractice',
     'download_file',
     'write',
+    'write_df_in_chunks',
+    'write_partitioned',
+    'open_writer',
     'upload_file',
+    'sync',
     'supported_formats',
     'get_option',
     'set_option',
+    'set_client',
     'inform',
     '__title__',
     '__description__',
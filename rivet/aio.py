@@ -0,0 +1,257 @@
+import asyncio
+import functools
+import itertools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from rivet import get_option, s3_copy, s3_delete, s3_list, s3_read, s3_write
+
+
+# The number of objects listed by each step of an asynchronous listing,
+# about one page of a listing
+LIST_BATCH_SIZE = 1000
+
+_lock = threading.Lock()
+_default_executor = None
+_default_executor_size = None
+_user_executor = None
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def set_executor(executor=None):
+    """
+    Sets the executor that asynchronous rivet operations run their
+    requests, parsing and serialization in.
+
+    Args:
+        executor (concurrent.futures.Executor, optional):
+            The executor to use, which should run tasks in threads of this
+            process. If 'None', a thread pool sized by the
+            'aio_max_concurrency' option is used.
+    """
+    global _user_executor
+
+    with _lock:
+        _user_executor = executor
+
+
+async def read(path, bucket=None, show_progressbar=False, *args,
+               transfer_config=None, as_arrow=False, **kwargs):
+    """
+    Asynchronous version of 'rivet.read'. Progress bars are hidden by
+    default, as they would be interleaved between concurrent operations.
+
+    Returns:
+        object: The object downloaded from S3
+    """
+    return await _run(s3_read.read, path, bucket, show_progressbar, *args,
+                      transfer_config=transfer_config, as_arrow=as_arrow,
+                      **kwargs)
+
+
+async def read_df_in_chunks(path, bucket=None, chunk_size=10000, names=None,
+                            show_progressbar=False, *args,
+                            transfer_config=None, stream=False, **kwargs):
+    """
+    Asynchronous version of 'rivet.read_df_in_chunks', for use with
+    'async for'. Each chunk is read in the executor.
+
+    Yields:
+        pd.DataFrame: The chunks downloaded from S3
+    """
+    chunks = s3_read.read_df_in_chunks(path, bucket, chunk_size, names,
+                                       show_progressbar, *args,
+                                       transfer_config=transfer_config,
+                                       stream=stream, **kwargs)
+    async for chunk in _iterate(chunks, batch_size=1):
+        yield chunk
+
+
+async def download_file(path, bucket=None, local_file_path=None,
+                        show_progressbar=False, transfer_config=None):
+    """Asynchronous version of 'rivet.download_file'"""
+    await _run(s3_read.download_file, path, bucket, local_file_path,
+               show_progressbar, transfer_config)
+
+
+async def write(obj, path, bucket=None, show_progressbar=False, *args,
+                transfer_config=None, **kwargs):
+    """
+    Asynchronous version of 'rivet.write'
+
+    Returns:
+        str: The full path to the object in S3, without the 's3://' prefix
+    """
+    return await _run(s3_write.write, obj, path, bucket, show_progressbar,
+                      *args, transfer_config=transfer_config, **kwargs)
+
+
+async def upload_file(local_file_path, path, bucket=None,
+                      show_progressbar=False, transfer_config=None):
+    """Asynchronous version of 'rivet.upload_file'"""
+    await _run(s3_write.upload_file, local_file_path, path, bucket,
+               show_progressbar, transfer_config)
+
+
+async def list_objects(path='', bucket=None, matches=None,
+                       include_prefix=False, recursive=False,
+                       parallel=False, shard_chars=None, max_workers=None):
+    """
+    Asynchronous version of 'rivet.list_objects'
+
+    Returns:
+        list<str>: The keys of the objects
+    """
+    return await _run(s3_list.list_objects, path, bucket, matches,
+                      include_prefix, recursive, parallel, shard_chars,
+                      max_workers)
+
+
+async def iter_objects(path='', bucket=None, matches=None,
+                       include_prefix=False, recursive=False,
+                       parallel=False, shard_chars=None, max_workers=None):
+    """
+    Asynchronous version of 'rivet.iter_objects', for use with
+    'async for'. About a page of the listing is made in the executor at
+    a time.
+
+    Yields:
+        dict: The key of each object, along with its metadata
+    """
+    objects = s3_list.iter_objects(path, bucket, matches, include_prefix,
+                                   recursive, parallel, shard_chars,
+                                   max_workers)
+    async for obj in _iterate(objects, batch_size=LIST_BATCH_SIZE):
+        yield obj
+
+
+async def exists(path, bucket=None):
+    """
+    Asynchronous version of 'rivet.exists'
+
+    Returns:
+        bool: Whether an object exists at the key
+    """
+    return await _run(s3_list.exists, path, bucket)
+
+
+async def exists_many(paths, bucket=None, max_workers=None):
+    """
+    Asynchronous version of 'rivet.exists_many'
+
+    Returns:
+        dict<str, bool>: Whether an object exists at each key
+    """
+    return await _run(s3_list.exists_many, paths, bucket, max_workers)
+
+
+async def delete(path, bucket=None, recursive=False, max_workers=None):
+    """
+    Asynchronous version of 'rivet.delete'
+
+    Returns:
+        DeleteResult: The keys that were deleted, and errors for any
+            keys that could not be
+    """
+    return await _run(s3_delete.delete, path, bucket, recursive, max_workers)
+
+
+async def copy(source_path, dest_path, source_bucket=None, dest_bucket=None,
+               show_progressbar=False, clean_source_path=True,
+               transfer_config=None, recursive=False, preserve_metadata=True,
+               max_workers=None):
+    """
+    Asynchronous version of 'rivet.copy'
+
+    Returns:
+        CopyResult: For recursive copies only, the keys copied, errors for
+            any objects that could not be, and the throughput of the copy
+    """
+    return await _run(s3_copy.copy, source_path, dest_path, source_bucket,
+                      dest_bucket, show_progressbar, clean_source_path,
+                      transfer_config, recursive, preserve_metadata,
+                      max_workers)
+
+
+def _get_executor():
+    """
+    Gets the executor that asynchronous operations run in
+
+    Returns:
+        concurrent.futures.Executor: The executor
+    """
+    global _default_executor, _default_executor_size
+
+    max_concurrency = get_option('aio_max_concurrency')
+    with _lock:
+        if _user_executor is not None:
+            return _user_executor
+        if (_default_executor is None
+                or _default_executor_size != max_concurrency):
+            if _default_executor is not None:
+                _default_executor.shutdown(wait=False)
+            _default_executor = ThreadPoolExecutor(
+                max_workers=max_concurrency, thread_name_prefix='rivet-aio')
+            _default_executor_size = max_concurrency
+        return _default_executor
+
+
+def _get_semaphore():
+    """
+    Gets the semaphore that caps the number of asynchronous operations in
+    flight at once in the running event loop
+
+    Returns:
+        asyncio.Semaphore: The semaphore
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        semaphore = _semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(get_option('aio_max_concurrency'))
+            _semaphores[loop] = semaphore
+        return semaphore
+
+
+async def _run(fn, *args, **kwargs):
+    """
+    Runs a blocking function in the executor, once fewer than the
+    'aio_max_concurrency' option of operations are in flight
+
+    Args:
+        fn (function): The function to run
+    Returns:
+        object: The return value of the function
+    """
+    async with _get_semaphore():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+async def _iterate(iterator, batch_size):
+    """
+    Iterates over a blocking iterator, advancing it in the executor
+
+    Args:
+        iterator (iterator): The iterator to iterate over
+        batch_size (int):
+            The number of items to take from the iterator in each step
+    Yields:
+        object: Each item of the iterator
+    """
+    iterator = iter(iterator)
+    try:
+        while True:
+            batch = await _run(list, itertools.islice(iterator, batch_size))
+            if not batch:
+                return
+            for item in batch:
+                yield item
+    finally:
+        # Releases any resources held by an unfinished generator, e.g. an
+        # open download or a listing in progress
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await _run(close)
@@ -1,5 +1,32 @@
 _options = {
-    'verbose': True
+    'verbose': True,
+    # Objects up to this size (in bytes) are read from an in-memory buffer.
+    # Larger objects are spilled to a temporary file on disk.
+    'read_buffer_max_size': 64 * 1024 ** 2,
+    # Size of the connection pool of the S3 client shared by rivet operations
+    'max_pool_connections': 10,
+    # Transfer tuning for uploads, downloads and copies (see
+    # boto3.s3.transfer.TransferConfig). Defaults match boto3's defaults.
+    'multipart_threshold': 8 * 1024 ** 2,
+    'multipart_chunksize': 8 * 1024 ** 2,
+    'max_concurrency': 10,
+    'use_threads': True,
+    # Number of threads used by operations that act on many objects at once
+    'max_workers': 10,
+    # Directory of the local disk cache of downloaded objects, which is
+    # disabled while this is None
+    'cache_dir': None,
+    # Size (in bytes) that the least recently used objects are evicted from
+    # the local disk cache beyond
+    'cache_max_size': 10 * 1024 ** 3,
+    # Size (in bytes, as estimated for DataFrames by 'memory_usage') of the
+    # in-memory cache of objects read, which is disabled while this is 0
+    'object_cache_max_size': 0,
+    # Whether objects from the in-memory cache are returned as copies, rather
+    # than shared with their DataFrames made read-only
+    'object_cache_copy': True,
+    # Number of operations of rivet.aio that are in flight at once
+    'aio_max_concurrency': 64
 }
 
 
@@ -0,0 +1,507 @@
+import collections
+import contextvars
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+
+# The phases that operations report the time spent in
+phases = ['list', 'download', 'deserialize', 'serialize', 'upload', 'copy',
+          'delete', 'compare']
+
+OperationEvent = namedtuple('OperationEvent', [
+    'operation', 'bucket', 'path', 'filetype', 'seconds', 'phases',
+    'bytes_transferred', 'object_size', 'api_calls', 'retries', 'error'])
+OperationEvent.__doc__ = """
+A record of a single rivet operation, emitted once it has finished
+
+Attributes:
+    operation (str): The name of the function called, e.g. 'read'
+    bucket (str): The bucket operated on
+    path (str): The key or prefix operated on
+    filetype (str): The storage format of the object, if any
+    seconds (float):
+        The wall time of the operation. For generators, such as
+        'read_df_in_chunks', this leaves out the time spent between items
+        by their caller.
+    phases (dict<str, float>):
+        The time spent in each of its phases (see 'phases'), e.g.
+        'download' and 'deserialize' for a read. For operations that act
+        on several objects at once, this is summed across all of them, so
+        may exceed the wall time.
+    bytes_transferred (int):
+        The number of bytes downloaded from and uploaded to S3
+    object_size (int): The total size of the objects operated on
+    api_calls (int): The number of S3 API requests made
+    retries (int): The number of those requests that were retried
+    error (Exception): The error the operation failed with, if any
+"""
+
+_lock = threading.Lock()
+_callbacks = []
+_active_operations = set()
+_current_operation = contextvars.ContextVar('rivet_operation', default=None)
+
+
+def add_callback(callback):
+    """
+    Registers a function to be called with an 'OperationEvent' each time a
+    rivet operation finishes. Operations are only instrumented while at
+    least one callback is registered.
+
+    Callbacks are called in the thread that ran the operation, and should
+    be quick and thread-safe. Errors raised by callbacks are logged rather
+    than raised.
+
+    Args:
+        callback (callable): The function to call, e.g. a 'StatsAggregator'
+    """
+    with _lock:
+        _callbacks.append(callback)
+
+
+def remove_callback(callback):
+    """
+    Unregisters a function registered with 'add_callback'
+
+    Args:
+        callback (callable): The function to unregister
+    Raises:
+        ValueError: If the function is not registered
+    """
+    with _lock:
+        _callbacks.remove(callback)
+
+
+class StatsAggregator(object):
+    def __init__(self, max_samples=10000):
+        """
+        Collects the events of operations in memory, to report percentiles
+        of their timings by operation and format. Enabled by registering it
+        as a callback:
+
+            stats = StatsAggregator()
+            add_callback(stats)
+            ...
+            stats.report()
+
+        Args:
+            max_samples (int, default 10000):
+                The number of most recent events to keep for each operation
+                and format
+        """
+        self.max_samples = max_samples
+        self._events = collections.defaultdict(
+            lambda: collections.deque(maxlen=self.max_samples))
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            self._events[(event.operation, event.filetype)].append(event)
+
+    def reset(self):
+        """Discards all events collected so far"""
+        with self._lock:
+            self._events.clear()
+
+    def report(self):
+        """
+        Summarizes the events collected so far
+
+        Returns:
+            pd.DataFrame: For each operation and filetype, the number of
+                events and errors, the p50 and p95 of the wall time and of
+                each phase (in seconds), and the total bytes transferred,
+                API calls and retries
+        """
+        with self._lock:
+            events = {key: list(samples)
+                      for key, samples in self._events.items()}
+
+        rows = []
+        for (operation, filetype), samples in sorted(
+                events.items(), key=lambda item: (item[0][0],
+                                                  item[0][1] or '')):
+            row = {'operation': operation,
+                   'filetype': filetype,
+                   'count': len(samples),
+                   'errors': sum(event.error is not None
+                                 for event in samples)}
+            row.update(_percentiles('seconds',
+                                    [event.seconds for event in samples]))
+            for phase_name in phases:
+                timings = [event.phases[phase_name] for event in samples
+                           if phase_name in event.phases]
+                if timings:
+                    row.update(_percentiles(phase_name, timings))
+            for field in ['bytes_transferred', 'api_calls', 'retries']:
+                row[field] = sum(getattr(event, field) for event in samples)
+            rows.append(row)
+
+        columns = ['operation', 'filetype', 'count', 'errors',
+                   'seconds_p50', 'seconds_p95']
+        for phase_name in phases:
+            for percentile in ['p50', 'p95']:
+                column = '{}_{}'.format(phase_name, percentile)
+                if any(column in row for row in rows):
+                    columns.append(column)
+        columns += ['bytes_transferred', 'api_calls', 'retries']
+        return pd.DataFrame(rows, columns=columns).set_index(
+            ['operation', 'filetype'])
+
+
+def instrumented(operation_name):
+    """
+    Makes a function report an 'OperationEvent' to the registered
+    callbacks each time it is called. Functions called from within an
+    instrumented function count towards its event, rather than reporting
+    their own. Generator functions are instrumented from their first item
+    until they are exhausted or closed, without counting the time spent
+    between items by their caller.
+
+    Args:
+        operation_name (str): The name of the operation in its events
+    Returns:
+        function: A decorator for the function
+    """
+    def decorator(fn):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                operation = _start(operation_name)
+                if operation is None:
+                    yield from fn(*args, **kwargs)
+                    return
+
+                iterator = fn(*args, **kwargs)
+                error = None
+                busy_seconds = 0.0
+                try:
+                    while True:
+                        token = _current_operation.set(operation)
+                        start = time.perf_counter()
+                        try:
+                            item = next(iterator)
+                        except StopIteration:
+                            return
+                        finally:
+                            busy_seconds += time.perf_counter() - start
+                            _current_operation.reset(token)
+                        yield item
+                except GeneratorExit:
+                    raise
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    token = _current_operation.set(operation)
+                    try:
+                        iterator.close()
+                    finally:
+                        _current_operation.reset(token)
+                        _finish(operation, error, busy_seconds)
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            operation = _start(operation_name)
+            if operation is None:
+                return fn(*args, **kwargs)
+
+            token = _current_operation.set(operation)
+            error = None
+            try:
+                return fn(*args, **kwargs)
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                _current_operation.reset(token)
+                _finish(operation, error)
+        return wrapper
+    return decorator
+
+
+def annotate(bucket=None, path=None, filetype=None):
+    """
+    Describes what the current operation acts on, if it is instrumented.
+    Only the first description given is kept.
+
+    Args:
+        bucket (str, optional): The bucket operated on
+        path (str, optional): The key or prefix operated on
+        filetype (str, optional): The storage format of the object
+    """
+    operation = _current_operation.get()
+    if operation is None:
+        return
+    with operation.lock:
+        operation.bucket = operation.bucket or bucket
+        operation.path = operation.path or path
+        operation.filetype = operation.filetype or filetype
+
+
+@contextmanager
+def phase(phase_name):
+    """
+    Times a phase of the current operation, if it is instrumented
+
+    Args:
+        phase_name (str): The name of the phase, one of 'phases'
+    """
+    operation = _current_operation.get()
+    if operation is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        with operation.lock:
+            operation.phases[phase_name] = (
+                operation.phases.get(phase_name, 0.0) + seconds)
+
+
+def add_bytes(num_bytes):
+    """
+    Counts bytes transferred by the current operation, if it is
+    instrumented
+
+    Args:
+        num_bytes (int): The number of bytes downloaded or uploaded
+    """
+    operation = _current_operation.get()
+    if operation is None:
+        return
+    with operation.lock:
+        operation.bytes_transferred += num_bytes
+
+
+def add_object_size(size):
+    """
+    Counts the size of an object acted on by the current operation, if it
+    is instrumented
+
+    Args:
+        size (int): The size of the object, in bytes
+    """
+    operation = _current_operation.get()
+    if operation is None:
+        return
+    with operation.lock:
+        operation.object_size += size
+
+
+def iterate_in_phase(iterator, phase_name):
+    """
+    Times each step of an iterator as a phase of the current operation,
+    leaving out the time spent between steps by the caller
+
+    Args:
+        iterator (iterator): The iterator, e.g. a reader of chunks
+        phase_name (str): The name of the phase, one of 'phases'
+    Yields:
+        object: Each item of the iterator
+    """
+    iterator = iter(iterator)
+    while True:
+        with phase(phase_name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def bind(fn):
+    """
+    Binds a function to the current operation, so that it counts towards
+    the operation when run in another thread, e.g. by an executor
+
+    Args:
+        fn (callable): The function to bind
+    Returns:
+        callable: The bound function, or 'fn' itself if no operation is
+            being instrumented
+    """
+    operation = _current_operation.get()
+    if operation is None:
+        return fn
+
+    @functools.wraps(fn)
+    def bound(*args, **kwargs):
+        token = _current_operation.set(operation)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_operation.reset(token)
+    return bound
+
+
+def register_client(client):
+    """
+    Counts the API requests made with a boto3 S3 client, and their retries,
+    towards the operations that make them. Requests made in threads that
+    rivet does not manage (e.g. by boto3's managed transfers) are counted
+    towards the operation in progress only if there is exactly one.
+
+    Args:
+        client (boto3.client): The S3 client
+    """
+    events = client.meta.events
+    events.register('before-call.s3', _count_call,
+                    unique_id='rivet-instrumentation-call')
+    events.register('after-call.s3', _count_retries,
+                    unique_id='rivet-instrumentation-retries')
+    events.register('after-call-error.s3', _count_retries_of_error,
+                    unique_id='rivet-instrumentation-retries-of-error')
+
+
+class _Operation(object):
+    def __init__(self, name):
+        """
+        The state of an operation being instrumented
+
+        Args:
+            name (str): The name of the operation
+        """
+        self.name = name
+        self.bucket = None
+        self.path = None
+        self.filetype = None
+        self.phases = {}
+        self.bytes_transferred = 0
+        self.object_size = 0
+        self.api_calls = 0
+        self.retries = 0
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+
+
+def _start(operation_name):
+    """
+    Starts instrumenting an operation, unless it is called from within
+    another or no callbacks are registered
+
+    Args:
+        operation_name (str): The name of the operation
+    Returns:
+        _Operation: The operation, or 'None' if it is not instrumented
+    """
+    if not _callbacks or _current_operation.get() is not None:
+        return None
+    operation = _Operation(operation_name)
+    with _lock:
+        _active_operations.add(operation)
+    return operation
+
+
+def _finish(operation, error=None, seconds=None):
+    """
+    Stops instrumenting an operation, and reports its event to the
+    registered callbacks
+
+    Args:
+        operation (_Operation): The operation
+        error (Exception, optional): The error the operation failed with
+        seconds (float, optional):
+            The time the operation took, if not the time since it started
+    """
+    if seconds is None:
+        seconds = time.perf_counter() - operation.start
+    with _lock:
+        _active_operations.discard(operation)
+        callbacks = list(_callbacks)
+    with operation.lock:
+        event = OperationEvent(
+            operation=operation.name, bucket=operation.bucket,
+            path=operation.path, filetype=operation.filetype,
+            seconds=seconds, phases=dict(operation.phases),
+            bytes_transferred=operation.bytes_transferred,
+            object_size=operation.object_size,
+            api_calls=operation.api_calls, retries=operation.retries,
+            error=error)
+    for callback in callbacks:
+        try:
+            callback(event)
+        except Exception:
+            logging.warning('Instrumentation callback {!r} failed'
+                            .format(callback), exc_info=True)
+
+
+def _get_request_operation():
+    """
+    Finds the operation that an API request is being made for
+
+    Returns:
+        _Operation: The operation, or 'None' if it cannot be told
+    """
+    operation = _current_operation.get()
+    if operation is None and _active_operations:
+        with _lock:
+            if len(_active_operations) == 1:
+                operation = next(iter(_active_operations))
+    return operation
+
+
+def _count_call(**kwargs):
+    """Counts an API request, on botocore's 'before-call' event"""
+    operation = _get_request_operation()
+    if operation is None:
+        return
+    with operation.lock:
+        operation.api_calls += 1
+
+
+def _count_retries(parsed=None, **kwargs):
+    """Counts the retries of an API request, on its 'after-call' event"""
+    _add_retries((parsed or {}).get('ResponseMetadata', {}))
+
+
+def _count_retries_of_error(exception=None, **kwargs):
+    """
+    Counts the retries of a failed API request, on its 'after-call-error'
+    event
+    """
+    response = getattr(exception, 'response', None) or {}
+    _add_retries(response.get('ResponseMetadata', {}))
+
+
+def _add_retries(response_metadata):
+    """
+    Adds the retries reported in a response's metadata to its operation
+
+    Args:
+        response_metadata (dict): The 'ResponseMetadata' of the response
+    """
+    retries = response_metadata.get('RetryAttempts', 0)
+    if not retries:
+        return
+    operation = _get_request_operation()
+    if operation is None:
+        return
+    with operation.lock:
+        operation.retries += retries
+
+
+def _percentiles(name, values):
+    """
+    Computes the p50 and p95 of a set of values
+
+    Args:
+        name (str): The name to prefix the percentiles with
+        values (list<float>): The values
+    Returns:
+        dict<str, float>: The '<name>_p50' and '<name>_p95' of the values
+    """
+    p50, p95 = np.percentile(values, [50, 95])
+    return {name + '_p50': p50, name + '_p95': p95}
@@ -0,0 +1,181 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+from rivet import get_option, inform, instrumentation
+from rivet.s3_client import get_s3_client
+from rivet.s3_client_config import get_transfer_config
+from rivet.s3_ranged_get import download_in_ranges
+
+
+# Prefix and suffix of files that are still being downloaded into the cache
+PARTIAL_PREFIX = 'rivet-'
+PARTIAL_SUFFIX = '.part'
+
+# Names of the files in a cache directory that rivet manages: cached copies
+# (named by '_get_entry_name') and partial downloads. Anything else in the
+# directory is left alone.
+ENTRY_NAME_PATTERN = re.compile(r'[0-9a-f]{64}')
+PARTIAL_NAME_PATTERN = re.compile(
+    re.escape(PARTIAL_PREFIX) + r'.+' + re.escape(PARTIAL_SUFFIX))
+
+# Partially downloaded files older than this (in seconds) were left behind by
+# interrupted downloads, and are removed when the cache is evicted
+STALE_PARTIAL_AGE = 24 * 60 * 60
+
+
+def cache_enabled():
+    """
+    Checks whether downloads should go through the local disk cache, i.e.
+    whether the 'cache_dir' option is set
+
+    Returns:
+        bool: Whether the cache is enabled
+    """
+    return bool(get_option('cache_dir'))
+
+
+def open_cached(bucket, path, transfer_config=None, callback_factory=None):
+    """
+    Opens the copy of an object in the local disk cache, downloading it
+    into the cache first if there is no copy of its current version.
+
+    Cached copies are keyed on the bucket, key and ETag of the object, whose
+    current ETag is looked up with a HEAD request on every call. Copies are
+    downloaded under a temporary name and then renamed into place, so other
+    processes sharing the cache never see a partial copy. Once a download
+    completes, the least recently used copies are evicted until the cache is
+    within the 'cache_max_size' option.
+
+    Args:
+        bucket (str): The S3 bucket to search for the object in
+        path (str): The path of the file to read from in S3
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Transfer settings for downloading the object
+        callback_factory (callable, optional):
+            Called with the size of the object if it needs to be downloaded,
+            returning a callback to report the number of bytes downloaded
+            to, e.g. an 'S3ProgressBar'
+    Returns:
+        file: The cached copy of the object, open for reading in binary mode
+    """
+    s3 = get_s3_client()
+    head = s3.head_object(Bucket=bucket, Key=path)
+
+    cache_dir = get_option('cache_dir')
+    os.makedirs(cache_dir, exist_ok=True)
+    entry = os.path.join(cache_dir,
+                         _get_entry_name(bucket, path, head['ETag']))
+    try:
+        cached = open(entry, 'rb')
+    except FileNotFoundError:
+        pass
+    else:
+        inform('Reading s3://{}/{} from cache...'.format(bucket, path))
+        # Modification times record when copies were last used, for eviction
+        os.utime(entry)
+        instrumentation.add_object_size(os.fstat(cached.fileno()).st_size)
+        return cached
+
+    inform('Downloading s3://{}/{} into cache...'.format(bucket, path))
+    config = get_transfer_config(transfer_config)
+    fd, partial = tempfile.mkstemp(prefix=PARTIAL_PREFIX,
+                                   suffix=PARTIAL_SUFFIX, dir=cache_dir)
+    partial_file = os.fdopen(fd, 'w+b')
+    try:
+        # The downloaded file is kept open while being renamed into place,
+        # so that it stays readable even if another process evicts it
+        cached = download_in_ranges(
+            bucket, path,
+            part_size=config.multipart_chunksize,
+            max_workers=(config.max_request_concurrency
+                         if config.use_threads else 1),
+            callback_factory=callback_factory,
+            fileobj=partial_file,
+            etag=head['ETag'])
+        os.replace(partial, entry)
+    except BaseException:
+        partial_file.close()
+        _remove(partial)
+        raise
+
+    evict(cache_dir, get_option('cache_max_size'), keep=entry)
+    return cached
+
+
+def evict(cache_dir=None, max_size=None, keep=None):
+    """
+    Removes the least recently used copies from a local disk cache until
+    it is within a maximum size, along with any stale partial downloads.
+    Only files named like cached copies or partial downloads are counted
+    or removed, so other files and directories in 'cache_dir' are kept.
+
+    Args:
+        cache_dir (str, optional):
+            The cache directory. Defaults to the 'cache_dir' option.
+        max_size (int, optional):
+            The maximum total size of the cache, in bytes. If 'None', only
+            stale partial downloads are removed.
+        keep (str, optional): A copy not to remove, e.g. one just downloaded
+    """
+    cache_dir = cache_dir or get_option('cache_dir')
+    now = time.time()
+
+    entries = []
+    for dir_entry in os.scandir(cache_dir):
+        is_entry = ENTRY_NAME_PATTERN.fullmatch(dir_entry.name)
+        is_partial = PARTIAL_NAME_PATTERN.fullmatch(dir_entry.name)
+        if not is_entry and not is_partial:
+            continue
+        try:
+            if not dir_entry.is_file(follow_symlinks=False):
+                continue
+            stat = dir_entry.stat(follow_symlinks=False)
+        except FileNotFoundError:
+            # Evicted by another process in the meantime
+            continue
+        if is_partial:
+            if now - stat.st_mtime > STALE_PARTIAL_AGE:
+                _remove(dir_entry.path)
+        else:
+            entries.append((stat.st_mtime, stat.st_size, dir_entry.path))
+
+    if max_size is None:
+        return
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries):
+        if total_size <= max_size:
+            break
+        if entry != keep:
+            _remove(entry)
+            total_size -= size
+
+
+def _get_entry_name(bucket, path, etag):
+    """
+    Gets the name of the cached copy of a version of an object
+
+    Args:
+        bucket (str): The S3 bucket of the object
+        path (str): The path of the object in S3
+        etag (str): The ETag of the version of the object
+    Returns:
+        str: The file name of the copy in the cache directory
+    """
+    return hashlib.sha256(
+        '\n'.join([bucket, path, etag]).encode('utf-8')).hexdigest()
+
+
+def _remove(filename):
+    """
+    Removes a file, if it has not already been removed
+
+    Args:
+        filename (str): The file to remove
+    """
+    try:
+        os.remove(filename)
+    except FileNotFoundError:
+        pass
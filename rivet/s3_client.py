@@ -0,0 +1,64 @@
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+from rivet import get_option, instrumentation
+
+
+_lock = threading.Lock()
+_pooled_client = None
+_pooled_client_key = None
+_user_client = None
+
+
+def get_s3_client():
+    """
+    Gets the S3 client shared by all rivet operations in this process.
+
+    The client is created once, from its own boto3 session (sessions are
+    not thread-safe, but the clients they create are), and then reused so
+    that credential resolution, endpoint setup and keep-alive connections
+    are shared across calls. A new client is created if the process has
+    been forked or the 'max_pool_connections' option has changed since.
+
+    Returns:
+        boto3.client: The S3 client
+    """
+    global _pooled_client, _pooled_client_key
+
+    if _user_client is not None:
+        return _user_client
+
+    client_key = (os.getpid(), get_option('max_pool_connections'))
+    with _lock:
+        if _pooled_client is None or _pooled_client_key != client_key:
+            session = boto3.session.Session()
+            _pooled_client = session.client(
+                's3',
+                config=Config(max_pool_connections=client_key[1]))
+            instrumentation.register_client(_pooled_client)
+            _pooled_client_key = client_key
+        return _pooled_client
+
+
+def set_client(client=None):
+    """
+    Sets the S3 client to be used by all rivet operations, e.g. one created
+    from a session with specific credentials, region or endpoint.
+
+    Args:
+        client (boto3.client, optional):
+            The S3 client to use. If 'None', any previously set or pooled
+            client is discarded and a new pooled client will be created
+            on next use.
+    """
+    global _pooled_client, _pooled_client_key, _user_client
+
+    if client is not None:
+        instrumentation.register_client(client)
+    with _lock:
+        _user_client = client
+        _pooled_client = None
+        _pooled_client_key = None
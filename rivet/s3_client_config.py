@@ -1,9 +1,20 @@
+from boto3.s3.transfer import TransferConfig
+
 from rivet import get_option
 from rivet.s3_progressbar import S3ProgressBar
 
 
+transfer_options = [
+    'multipart_threshold',
+    'multipart_chunksize',
+    'max_concurrency',
+    'use_threads'
+]
+
+
 def get_s3_client_kwargs(path, bucket, operation,
-                         show_progressbar):
+                         show_progressbar, filesize=None,
+                         transfer_config=None):
     """
     Assembles and returns a dictionary of kwargs for the boto3 S3 client to use
 
@@ -14,9 +25,43 @@ def get_s3_client_kwargs(path, bucket, operation,
             What type of interaction with S3 will be performed. Possible values
             are 'read', 'write', and 'copy'
         show_progresbar (bool, default True): Whether to show a progress bar
+        filesize (int, optional):
+            The size of the object being transferred, if already known.
+            Saves the progress bar from having to look it up.
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Per-call transfer settings, see 'get_transfer_config'
     """
-    s3_kwargs = {}
+    s3_kwargs = {'Config': get_transfer_config(transfer_config)}
     if show_progressbar and get_option('verbose'):
-        progressbar = S3ProgressBar(path, bucket, operation)
+        progressbar = S3ProgressBar(path, bucket, operation,
+                                    filesize=filesize)
         s3_kwargs['Callback'] = progressbar
     return s3_kwargs
+
+
+def get_transfer_config(transfer_config=None):
+    """
+    Builds the boto3 TransferConfig for a transfer, based on rivet's
+    session-level transfer options.
+
+    Args:
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Per-call transfer settings. A TransferConfig is used as-is,
+            while a dict overrides individual options (e.g.
+            {'max_concurrency': 32}) on top of the session-level ones.
+    Returns:
+        boto3.s3.transfer.TransferConfig: The configuration for the transfer
+    Raises:
+        ValueError: If 'transfer_config' contains an unknown option
+    """
+    if isinstance(transfer_config, TransferConfig):
+        return transfer_config
+
+    config_kwargs = {opt: get_option(opt) for opt in transfer_options}
+    for opt, val in (transfer_config or {}).items():
+        if opt not in transfer_options:
+            raise ValueError(
+                '\'{}\' is not a valid transfer option. Valid options are: '
+                '{}'.format(opt, ', '.join(transfer_options)))
+        config_kwargs[opt] = val
+    return TransferConfig(**config_kwargs)
@@ -1,24 +1,82 @@
-import boto3
+import logging
+import math
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-from rivet import inform, s3_path_utils
-from rivet.s3_client_config import get_s3_client_kwargs
+from botocore.exceptions import ClientError
 
+from rivet import get_option, inform, instrumentation, s3_path_utils
+from rivet.s3_client import get_s3_client
+from rivet.s3_client_config import get_s3_client_kwargs, get_transfer_config
+from rivet.s3_list import _list_pages
+from rivet.s3_multipart import MAX_PARTS
+from rivet.s3_progressbar import S3ProgressBar, _format_bytes
 
+
+# The largest object S3 copies with a single 'copy_object' request
+MAX_COPY_OBJECT_SIZE = 5 * 1024 ** 3
+
+# The object settings that are carried over to multipart copies, which
+# (unlike 'copy_object') do not copy them from the source by themselves
+COPIED_HEAD_FIELDS = ['CacheControl', 'ContentDisposition', 'ContentEncoding',
+                      'ContentLanguage', 'ContentType', 'Expires', 'Metadata']
+
+CopyResult = namedtuple('CopyResult', ['copied', 'errors', 'bytes_copied',
+                                       'seconds', 'objects_per_second',
+                                       'bytes_per_second'])
+CopyResult.__doc__ = """
+The outcome of a recursive copy operation
+
+Attributes:
+    copied (list<str>): The destination keys that were copied to
+    errors (list<dict>):
+        The source keys that could not be copied, as dicts with the
+        fields 'Key', 'Code' and 'Message'
+    bytes_copied (int): The total size of the objects copied
+    seconds (float): How long the copy took
+    objects_per_second (float): The number of objects copied per second
+    bytes_per_second (float): The number of bytes copied per second
+"""
+
+
+@instrumentation.instrumented('copy')
 def copy(source_path,
          dest_path,
          source_bucket=None,
          dest_bucket=None,
          show_progressbar=True,
-         clean_source_path=True):
+         clean_source_path=True,
+         transfer_config=None,
+         recursive=False,
+         preserve_metadata=True,
+         max_workers=None):
     """
     Copy an object from one S3 location into another.
 
+    With 'recursive', every object under the 'source_path' prefix is copied
+    under the 'dest_path' prefix instead, see 'copy_prefix'.
+
     Args:
         source_path (str): Path of file to copy
         dest_path (str): Path to copy file to
         source_bucket (str): Bucket of file to copy
         dest_bucket (str): Bucket to copy to
         show_progressbar (bool, default True): Whether to show a progress bar
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Transfer settings for this call, overriding the session-level
+            transfer options
+        recursive (bool, default False):
+            Whether to copy all objects under 'source_path'
+        preserve_metadata (bool, default True):
+            Whether recursively copied objects keep the metadata and
+            content settings of their source objects
+        max_workers (int, optional):
+            The number of objects to copy concurrently when copying
+            recursively. Defaults to the 'max_workers' option.
+    Returns:
+        CopyResult: For recursive copies only, the keys copied, errors for
+            any objects that could not be, and the throughput of the copy
     """
     source_bucket = source_bucket or s3_path_utils.get_default_bucket()
     dest_bucket = dest_bucket or s3_path_utils.get_default_bucket()
@@ -26,11 +84,22 @@ def copy(source_path,
     if clean_source_path:
         source_path = s3_path_utils.clean_path(source_path)
     dest_path = s3_path_utils.clean_path(dest_path)
+    instrumentation.annotate(source_bucket, source_path,
+                             None if recursive
+                             else s3_path_utils.get_filetype(source_path))
+
+    if recursive:
+        return copy_prefix(source_path, dest_path, source_bucket, dest_bucket,
+                           show_progressbar=show_progressbar,
+                           transfer_config=transfer_config,
+                           preserve_metadata=preserve_metadata,
+                           max_workers=max_workers)
 
-    s3 = boto3.client('s3')
+    s3 = get_s3_client()
     s3_kwargs = get_s3_client_kwargs(source_path, source_bucket,
                                      operation='copy',
-                                     show_progressbar=show_progressbar)
+                                     show_progressbar=show_progressbar,
+                                     transfer_config=transfer_config)
 
     copy_source = {
         'Bucket': source_bucket,
@@ -43,5 +112,235 @@ def copy(source_path,
         dest_bucket,
         dest_path
     ))
-    s3.copy(CopySource=copy_source, Bucket=dest_bucket, Key=dest_path,
-            **s3_kwargs)
+    with instrumentation.phase('copy'):
+        s3.copy(CopySource=copy_source, Bucket=dest_bucket, Key=dest_path,
+                **s3_kwargs)
+
+
+@instrumentation.instrumented('copy_prefix')
+def copy_prefix(source_prefix, dest_prefix, source_bucket=None,
+                dest_bucket=None, show_progressbar=True, transfer_config=None,
+                preserve_metadata=True, max_workers=None):
+    """
+    Copies every object under a prefix in S3 to another prefix, within or
+    between buckets, without downloading them.
+
+    Objects are copied while the listing is still paging, several at a time.
+    Objects smaller than the 'multipart_threshold' transfer option are copied
+    with a single request, while larger ones are copied in parts of the
+    'multipart_chunksize' transfer option, several parts at a time. Every
+    copy is conditional on the source object being unchanged since it was
+    listed.
+
+    Args:
+        source_prefix (str):
+            The prefix to copy objects from, usually ending in '/'
+        dest_prefix (str):
+            The prefix to copy objects to, which replaces 'source_prefix'
+            in their keys
+        source_bucket (str, optional): The bucket to copy objects from
+        dest_bucket (str, optional): The bucket to copy objects to
+        show_progressbar (bool, default True): Whether to show a progress bar
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Transfer settings for this call, overriding the session-level
+            transfer options
+        preserve_metadata (bool, default True):
+            Whether objects keep the metadata and content settings (e.g.
+            'ContentType') of their source objects
+        max_workers (int, optional):
+            The number of objects to copy concurrently. Defaults to the
+            'max_workers' option.
+    Returns:
+        CopyResult: The keys copied, errors for any objects that could not
+            be (including those whose destination key would not follow
+            rivet's path conventions), and the throughput of the copy
+    Raises:
+        ValueError: If 'dest_prefix' violates rivet's S3 path conventions
+    """
+    source_bucket = source_bucket or s3_path_utils.get_default_bucket()
+    dest_bucket = dest_bucket or s3_path_utils.get_default_bucket()
+    dest_prefix = s3_path_utils.clean_path(dest_prefix)
+    instrumentation.annotate(source_bucket, source_prefix)
+    max_workers = max_workers or get_option('max_workers')
+    config = get_transfer_config(transfer_config)
+    part_workers = config.max_request_concurrency if config.use_threads else 1
+
+    progressbar = None
+    if show_progressbar and get_option('verbose'):
+        progressbar = S3ProgressBar(filesize=0)
+
+    inform('Copying objects from s3://{}/{} to s3://{}/{}...'.format(
+        source_bucket, source_prefix, dest_bucket, dest_prefix))
+    start_time = time.time()
+    copied, errors, bytes_copied = [], [], 0
+
+    def collect(futures):
+        nonlocal bytes_copied
+        for future in futures:
+            dest_key, size, error = future.result()
+            if error is None:
+                copied.append(dest_key)
+                bytes_copied += size
+            else:
+                errors.append(error)
+
+    # Parts are copied in their own pool, so that objects waiting on their
+    # parts do not hold up the parts themselves
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            ThreadPoolExecutor(max_workers=part_workers) as part_executor:
+        pending = set()
+        for response in _list_pages(source_bucket, source_prefix):
+            for obj in response.get('Contents', []):
+                try:
+                    dest_key = s3_path_utils.clean_path(
+                        dest_prefix + obj['Key'][len(source_prefix):])
+                except ValueError as e:
+                    errors.append({'Key': obj['Key'],
+                                   'Code': 'InvalidDestinationKey',
+                                   'Message': str(e)})
+                    continue
+                if progressbar is not None:
+                    progressbar.add_transfer(obj['Size'])
+
+                # Bound the number of copies queued if listing outpaces
+                # copying
+                if len(pending) >= max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending.add(executor.submit(
+                    instrumentation.bind(_copy_object), obj,
+                    source_bucket, dest_bucket, dest_key, config,
+                    preserve_metadata, part_executor, progressbar))
+        collect(wait(pending).done)
+
+    seconds = time.time() - start_time
+    result = CopyResult(
+        copied=copied, errors=errors, bytes_copied=bytes_copied,
+        seconds=seconds,
+        objects_per_second=len(copied) / seconds if seconds else 0.0,
+        bytes_per_second=bytes_copied / seconds if seconds else 0.0)
+
+    inform('Copied {} objects ({}) at {:.1f} objects/s ({}/s)'.format(
+        len(copied), _format_bytes(bytes_copied), result.objects_per_second,
+        _format_bytes(result.bytes_per_second)))
+    if errors:
+        logging.warning('{} object(s) could not be copied from s3://{}/{}'
+                        .format(len(errors), source_bucket, source_prefix))
+    return result
+
+
+def _copy_object(obj, source_bucket, dest_bucket, dest_key, config,
+                 preserve_metadata, part_executor, progressbar=None):
+    """
+    Copies a single listed object, with a single request or in parts
+    depending on its size
+
+    Args:
+        obj (dict): The object as listed, with its 'Key', 'Size' and 'ETag'
+        source_bucket (str): The bucket to copy the object from
+        dest_bucket (str): The bucket to copy the object to
+        dest_key (str): The key to copy the object to
+        config (boto3.s3.transfer.TransferConfig): Transfer settings
+        preserve_metadata (bool):
+            Whether to keep the metadata and content settings of the object
+        part_executor (concurrent.futures.Executor):
+            The executor to copy the parts of large objects in
+        progressbar (S3ProgressBar, optional):
+            A progress bar to report the bytes copied to
+    Returns:
+        tuple(str, int, dict): The key copied to, the size of the object,
+            and an error if the object could not be copied (or 'None')
+    """
+    s3 = get_s3_client()
+    copy_source = {'Bucket': source_bucket, 'Key': obj['Key']}
+    size = obj['Size']
+    instrumentation.add_object_size(size)
+    try:
+        if size == 0 or (size < config.multipart_threshold
+                         and size <= MAX_COPY_OBJECT_SIZE):
+            metadata_kwargs = ({} if preserve_metadata
+                               else {'MetadataDirective': 'REPLACE'})
+            with instrumentation.phase('copy'):
+                s3.copy_object(CopySource=copy_source, Bucket=dest_bucket,
+                               Key=dest_key, CopySourceIfMatch=obj['ETag'],
+                               **metadata_kwargs)
+            if progressbar is not None:
+                progressbar(size)
+        else:
+            with instrumentation.phase('copy'):
+                _copy_object_in_parts(obj, copy_source, dest_bucket,
+                                      dest_key, config.multipart_chunksize,
+                                      preserve_metadata, part_executor,
+                                      progressbar)
+    except ClientError as e:
+        error = e.response.get('Error', {})
+        return dest_key, size, {'Key': obj['Key'],
+                                'Code': error.get('Code'),
+                                'Message': error.get('Message', str(e))}
+    return dest_key, size, None
+
+
+def _copy_object_in_parts(obj, copy_source, dest_bucket, dest_key, part_size,
+                          preserve_metadata, part_executor, progressbar=None):
+    """
+    Copies a large object with a multipart upload whose parts are copied
+    from ranges of the object, several at a time
+
+    Args:
+        obj (dict): The object as listed, with its 'Key', 'Size' and 'ETag'
+        copy_source (dict): The 'Bucket' and 'Key' of the object
+        dest_bucket (str): The bucket to copy the object to
+        dest_key (str): The key to copy the object to
+        part_size (int):
+            The size of each part, raised if needed to keep within the
+            maximum number of parts
+        preserve_metadata (bool):
+            Whether to keep the metadata and content settings of the object
+        part_executor (concurrent.futures.Executor):
+            The executor to copy the parts in
+        progressbar (S3ProgressBar, optional):
+            A progress bar to report the bytes copied to
+    """
+    s3 = get_s3_client()
+    size = obj['Size']
+    part_size = max(part_size, int(math.ceil(float(size) / MAX_PARTS)))
+
+    upload_kwargs = {}
+    if preserve_metadata:
+        head = s3.head_object(IfMatch=obj['ETag'], **copy_source)
+        upload_kwargs = {field: head[field] for field in COPIED_HEAD_FIELDS
+                         if field in head}
+    upload_id = s3.create_multipart_upload(
+        Bucket=dest_bucket, Key=dest_key, **upload_kwargs)['UploadId']
+
+    def copy_part(part_number):
+        start = (part_number - 1) * part_size
+        end = min(start + part_size, size) - 1
+        response = s3.upload_part_copy(
+            Bucket=dest_bucket, Key=dest_key, UploadId=upload_id,
+            PartNumber=part_number, CopySource=copy_source,
+            CopySourceRange='bytes={}-{}'.format(start, end),
+            CopySourceIfMatch=obj['ETag'])
+        if progressbar is not None:
+            progressbar(end - start + 1)
+        return {'PartNumber': part_number,
+                'ETag': response['CopyPartResult']['ETag']}
+
+    futures = []
+    try:
+        part_numbers = range(1, int(math.ceil(float(size) / part_size)) + 1)
+        futures = [part_executor.submit(instrumentation.bind(copy_part),
+                                        part_number)
+                   for part_number in part_numbers]
+        parts = [future.result() for future in futures]
+        s3.complete_multipart_upload(
+            Bucket=dest_bucket, Key=dest_key, UploadId=upload_id,
+            MultipartUpload={'Parts': parts})
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        # Parts already in progress would otherwise outlive the upload
+        wait(futures)
+        s3.abort_multipart_upload(Bucket=dest_bucket, Key=dest_key,
+                                  UploadId=upload_id)
+        raise
@@ -1,14 +1,38 @@
+import itertools
 import logging
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-import boto3
+from botocore.exceptions import ClientError
 
-from rivet import s3_path_utils
-from rivet.s3_list import list_objects
+from rivet import get_option, instrumentation, s3_path_utils
+from rivet.s3_client import get_s3_client
+from rivet.s3_list import _list_pages
 
 
-def delete(path, bucket=None, recursive=False):
+# The maximum number of keys S3 accepts in a single 'delete_objects' request
+MAX_KEYS_PER_DELETE = 1000
+
+DeleteResult = namedtuple('DeleteResult', ['deleted', 'errors'])
+DeleteResult.__doc__ = """
+The outcome of a delete operation
+
+Attributes:
+    deleted (list<str>): The keys that were deleted
+    errors (list<dict>):
+        The keys that could not be deleted, as dicts with the
+        fields 'Key', 'Code' and 'Message'
+"""
+
+
+@instrumentation.instrumented('delete')
+def delete(path, bucket=None, recursive=False, max_workers=None):
     """
-    Deletes object(s) at specified path
+    Deletes object(s) at specified path.
+
+    Objects are deleted in batches of up to 1000 keys per request, with
+    several batches in flight at once. Deletion starts as soon as the first
+    page of the listing arrives, rather than after all of it.
 
     Args:
         path (str): The S3 path to the object(s) to be deleted
@@ -16,6 +40,12 @@ def delete(path, bucket=None, recursive=False):
         recursive (bool):
             Whether to delete all objects in the 'folder' specified in 'path',
             or to just delete a single object.
+        max_workers (int, optional):
+            The number of batches to delete concurrently. Defaults to the
+            'max_workers' option.
+    Returns:
+        DeleteResult: The keys that were deleted, and errors for any
+            keys that could not be
     """
     if path == '':
         raise ValueError(
@@ -23,18 +53,119 @@ def delete(path, bucket=None, recursive=False):
             'That seems unsafe, and has been prevented.'
         )
     bucket = bucket or s3_path_utils.get_default_bucket()
+    instrumentation.annotate(bucket, path)
+    max_workers = max_workers or get_option('max_workers')
+
+    keys = _iter_keys(bucket, path)
+    if recursive:
+        batches = _batch(keys, MAX_KEYS_PER_DELETE)
+    else:
+        # Only enough of the listing to tell if 'path' is ambiguous is needed
+        first_keys = list(itertools.islice(keys, 2))
+        if len(first_keys) > 1:
+            raise KeyError(
+                'Multiple matching objects found with provided path. '
+                'Set "recursive" to True if you wish to delete all of them.')
+        batches = [first_keys] if first_keys else []
+
+    result = DeleteResult(deleted=[], errors=[])
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for batch in batches:
+            # Bound the number of batches held in memory if listing
+            # outpaces deletion
+            if len(pending) >= max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                _collect(done, result)
+            pending.add(executor.submit(
+                instrumentation.bind(_delete_batch), bucket, batch))
+        _collect(wait(pending).done, result)
+
+    if not result.deleted and not result.errors:
+        logging.warning('No objects found for deletion at provided path: '
+                        's3://' + '/'.join([bucket, path]))
+    if result.errors:
+        logging.warning('{} object(s) could not be deleted from s3://{}/{}'
+                        .format(len(result.errors), bucket, path))
+    return result
+
+
+def _iter_keys(bucket, prefix):
+    """
+    Lists the keys under a prefix, paging through the listing lazily
+
+    Args:
+        bucket (str): The bucket to list keys from
+        prefix (str): The prefix to list keys under
+    Yields:
+        str: Each key under the prefix
+    """
+    for response in _list_pages(bucket, prefix):
+        for obj in response.get('Contents', []):
+            yield obj['Key']
+
 
-    objects = list_objects(path=path, bucket=bucket,
-                           include_prefix=True, recursive=True)
+def _batch(iterable, size):
+    """
+    Splits an iterable into lists of a maximum size
+
+    Args:
+        iterable (iterable): The iterable to split
+        size (int): The maximum size of each list
+    Yields:
+        list: The next batch of items
+    """
+    iterator = iter(iterable)
+    batch = list(itertools.islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(itertools.islice(iterator, size))
 
-    if not objects:
-        logging.warn('No objects found for deletion at provided path: '
-                     's3://' + '/'.join([bucket, path]))
-    if len(objects) > 1 and not recursive:
-        raise KeyError(
-            'Multiple matching objects found with provided path. '
-            'Set "recursive" to True if you wish to delete all of them.')
 
-    s3 = boto3.client('s3')
-    for key in objects:
-        s3.delete_object(Bucket=bucket, Key=key)
+def _delete_batch(bucket, keys):
+    """
+    Deletes a batch of keys with a single multi-object delete request
+
+    Args:
+        bucket (str): The bucket containing the objects to be deleted
+        keys (list<str>): The keys to delete, no more than 1000
+    Returns:
+        tuple(list<str>, list<dict>): The deleted keys, and the errors
+            for keys that could not be deleted
+    """
+    s3 = get_s3_client()
+    try:
+        with instrumentation.phase('delete'):
+            response = s3.delete_objects(
+                Bucket=bucket,
+                Delete={'Objects': [{'Key': key} for key in keys],
+                        'Quiet': True})
+    except ClientError as e:
+        error = e.response.get('Error', {})
+        return [], [{'Key': key,
+                     'Code': error.get('Code'),
+                     'Message': error.get('Message', str(e))}
+                    for key in keys]
+
+    errors = [{'Key': error['Key'],
+               'Code': error.get('Code'),
+               'Message': error.get('Message')}
+              for error in response.get('Errors', [])]
+    failed_keys = {error['Key'] for error in errors}
+    deleted = [key for key in keys if key not in failed_keys]
+    return deleted, errors
+
+
+def _collect(futures, result):
+    """
+    Adds the outcomes of completed batch deletions to a result
+
+    Args:
+        futures (iterable<concurrent.futures.Future>):
+            Completed calls to '_delete_batch'
+        result (DeleteResult): The result to add the outcomes to
+    """
+    for future in futures:
+        deleted, errors = future.result()
+        result.deleted.extend(deleted)
+        result.errors.extend(errors)
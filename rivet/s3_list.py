@@ -1,15 +1,28 @@
+import heapq
+import math
 import os
+import queue
 import re
+import string
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-import boto3
+from botocore.exceptions import ClientError
 
-from rivet import s3_path_utils
+from rivet import get_option, instrumentation, s3_path_utils
+from rivet.s3_client import get_s3_client
 
 
+# Shard boundaries for parallel listings, when none can be discovered
+DEFAULT_SHARD_CHARS = string.digits + string.ascii_letters
+
+
+@instrumentation.instrumented('list_objects')
 def list_objects(path='',
                  bucket=None,
                  matches=None,
-                 include_prefix=False, recursive=False):
+                 include_prefix=False, recursive=False,
+                 parallel=False, shard_chars=None, max_workers=None):
     """
     Lists objects in an S3 bucket.
 
@@ -41,28 +54,33 @@ def list_objects(path='',
         include_prefix (bool):
             Whether to include the objects' prefixes in the returned S3 paths
         recursive (bool): Whether to list contents of nested folders
+        parallel (bool):
+            Whether to split the listing into shards that are listed
+            concurrently, see '_list_pages_sharded'. Useful for listing
+            very large numbers of objects.
+        shard_chars (str, optional):
+            Characters to split a parallel listing on, see
+            '_list_pages_sharded'
+        max_workers (int, optional):
+            The number of shards to list concurrently. Defaults to the
+            'max_workers' option.
     Returns:
         list<str>: List of S3 paths
     """
     bucket = bucket or s3_path_utils.get_default_bucket()
-    s3 = boto3.client('s3')
+    instrumentation.annotate(bucket, path)
+
+    if parallel:
+        pages = _list_pages_sharded(bucket, path, shard_chars=shard_chars,
+                                    max_workers=max_workers)
+    else:
+        pages = _list_pages(bucket, path)
 
     keys = []
-    continuation_token = None
-    continue_listing = True
-    while continue_listing:
-        list_kwargs = {}
-        if continuation_token:
-            list_kwargs['ContinuationToken'] = continuation_token
-        response = s3.list_objects_v2(Bucket=bucket, Prefix=path,
-                                      **list_kwargs)
+    for response in pages:
         if 'Contents' in response:
             keys.extend([obj['Key'] for obj in response['Contents']])
 
-        continue_listing = response['IsTruncated']
-        if continue_listing:
-            continuation_token = response['NextContinuationToken']
-
     if matches:
         if matches.startswith(path):
             matches = matches[len(path):]
@@ -80,9 +98,95 @@ def list_objects(path='',
     return sorted(keys)
 
 
-def exists(path, bucket=os.getenv('RV_DEFAULT_S3_BUCKET')):
+@instrumentation.instrumented('iter_objects')
+def iter_objects(path='',
+                 bucket=None,
+                 matches=None,
+                 include_prefix=False, recursive=False,
+                 parallel=False, shard_chars=None, max_workers=None):
     """
-    Checks if an object exists at a specific S3 key
+    Iterates over objects in an S3 bucket, along with their metadata.
+
+    Unlike 'list_objects', results are yielded page by page as the listing
+    progresses, so the first results arrive after a single request and
+    memory use does not grow with the number of objects. Breaking out of
+    the iteration stops any further requests from being made.
+    When not listing recursively, nested folders are collapsed by S3 itself
+    (using '/' as a delimiter) rather than by listing all of their contents.
+
+    Args:
+        path (str, optional): The path to look in
+        bucket (str): The bucket to list files from
+        matches (str, optional):
+            Regular expression to match the keys to, as in 'list_objects'.
+            When not listing recursively, folders are matched on their own
+            key (e.g. 'folder1/') rather than on the keys nested in them.
+        include_prefix (bool):
+            Whether to include the objects' prefixes in the returned S3 paths
+        recursive (bool): Whether to list contents of nested folders
+        parallel (bool):
+            Whether to split a recursive listing into shards that are
+            listed concurrently, see '_list_pages_sharded'. Non-recursive
+            listings are already collapsed by S3, and are not split.
+        shard_chars (str, optional):
+            Characters to split a parallel listing on, see
+            '_list_pages_sharded'
+        max_workers (int, optional):
+            The number of shards to list concurrently. Defaults to the
+            'max_workers' option.
+    Yields:
+        dict: The object's 'Key', 'Size', 'ETag', 'LastModified' and
+            'StorageClass', in key order. Folders have a 'Key' ending
+            in '/', and 'None' for all other fields.
+    """
+    bucket = bucket or s3_path_utils.get_default_bucket()
+    instrumentation.annotate(bucket, path)
+
+    list_kwargs = {}
+    if not recursive:
+        list_kwargs['Delimiter'] = '/'
+    if matches:
+        if matches.startswith(path):
+            matches = matches[len(path):]
+        pattern = re.compile(re.escape(path) + matches)
+
+    if parallel and recursive:
+        pages = _list_pages_sharded(bucket, path, shard_chars=shard_chars,
+                                    max_workers=max_workers)
+    else:
+        pages = _list_pages(bucket, path, **list_kwargs)
+
+    for response in pages:
+        objects = [
+            {'Key': obj['Key'],
+             'Size': obj['Size'],
+             'ETag': obj['ETag'],
+             'LastModified': obj['LastModified'],
+             'StorageClass': obj.get('StorageClass')}
+            for obj in response.get('Contents', [])]
+        folders = [
+            {'Key': folder['Prefix'],
+             'Size': None,
+             'ETag': None,
+             'LastModified': None,
+             'StorageClass': None}
+            for folder in response.get('CommonPrefixes', [])]
+
+        for obj in heapq.merge(objects, folders, key=lambda x: x['Key']):
+            if matches and not pattern.match(obj['Key']):
+                continue
+            if '/' in path and not include_prefix:
+                obj['Key'] = obj['Key'][path.rfind('/') + 1:]
+            yield obj
+
+
+@instrumentation.instrumented('exists')
+def exists(path, bucket=None):
+    """
+    Checks if an object exists at a specific S3 key, with a single request.
+
+    Paths ending in '/' are treated as folders, which exist if any
+    object exists under them.
 
     Args:
         path (str): S3 path to check for object existence at
@@ -91,9 +195,236 @@ def exists(path, bucket=os.getenv('RV_DEFAULT_S3_BUCKET')):
     Returns:
         bool: Whether an object exists at the specified key
     """
-    matches = list_objects(path=path,
-                           bucket=bucket,
-                           include_prefix=True)
-    if path in matches:
-        return True
-    return False
+    bucket = bucket or s3_path_utils.get_default_bucket()
+    instrumentation.annotate(bucket, path)
+    s3 = get_s3_client()
+
+    if path.endswith('/'):
+        response = s3.list_objects_v2(Bucket=bucket, Prefix=path, MaxKeys=1)
+        return response['KeyCount'] > 0
+
+    try:
+        s3.head_object(Bucket=bucket, Key=path)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+            return False
+        raise
+    return True
+
+
+@instrumentation.instrumented('exists_many')
+def exists_many(paths, bucket=None, max_workers=None):
+    """
+    Checks if objects exist at many S3 keys at once.
+
+    Keys are first looked up in a listing of their common prefix, for as
+    many pages as it would take a pool of 'max_workers' threads to check
+    each key individually. Any keys beyond what that listing covered are
+    then checked individually by the pool.
+
+    Args:
+        paths (iterable<str>): S3 paths to check for object existence at
+        bucket (str): S3 bucket to check in
+        max_workers (int, optional):
+            The number of keys to check concurrently. Defaults to the
+            'max_workers' option.
+
+    Returns:
+        dict<str, bool>: Whether an object exists at each specified key,
+            in the order the keys were provided
+    """
+    bucket = bucket or s3_path_utils.get_default_bucket()
+    instrumentation.annotate(bucket)
+    max_workers = max_workers or get_option('max_workers')
+    paths = list(dict.fromkeys(paths))
+
+    results = {}
+    unresolved = [path for path in paths if path.endswith('/')]
+    keys = sorted(path for path in paths if not path.endswith('/'))
+    if keys:
+        max_pages = math.ceil(len(keys) / max_workers)
+        listed_keys = set()
+        last_listed_key = None
+        complete_listing = False
+        list_kwargs = {}
+        if keys[0][:-1]:
+            # Starting just before the first key skips over any keys in the
+            # common prefix that sort before it
+            list_kwargs['StartAfter'] = keys[0][:-1]
+        pages = _list_pages(bucket, os.path.commonprefix(keys), **list_kwargs)
+        for page_number, response in enumerate(pages, 1):
+            contents = response.get('Contents', [])
+            listed_keys.update(obj['Key'] for obj in contents)
+            if contents:
+                last_listed_key = contents[-1]['Key']
+            if (not response['IsTruncated']
+                    or (last_listed_key and last_listed_key >= keys[-1])):
+                complete_listing = True
+                break
+            if page_number >= max_pages:
+                break
+        pages.close()
+
+        for key in keys:
+            if complete_listing or (last_listed_key
+                                    and key <= last_listed_key):
+                results[key] = key in listed_keys
+            else:
+                unresolved.append(key)
+
+    if unresolved:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            unresolved_results = executor.map(
+                instrumentation.bind(lambda path: exists(path, bucket)),
+                unresolved)
+            results.update(zip(unresolved, unresolved_results))
+
+    return {path: results[path] for path in paths}
+
+
+def _list_pages(bucket, prefix, **list_kwargs):
+    """
+    Lists objects in an S3 bucket, one page of results at a time. Pages
+    are requested as they are consumed, so callers can act on a page
+    while the rest of the listing is still to come.
+
+    Args:
+        bucket (str): The bucket to list objects from
+        prefix (str): The prefix to list objects under
+        **list_kwargs: Additional arguments for 'list_objects_v2'
+    Yields:
+        dict: The 'list_objects_v2' response for each page
+    """
+    s3 = get_s3_client()
+
+    continuation_token = None
+    continue_listing = True
+    while continue_listing:
+        if continuation_token:
+            list_kwargs['ContinuationToken'] = continuation_token
+        with instrumentation.phase('list'):
+            response = s3.list_objects_v2(Bucket=bucket, Prefix=prefix,
+                                          **list_kwargs)
+        yield response
+
+        continue_listing = response['IsTruncated']
+        if continue_listing:
+            continuation_token = response['NextContinuationToken']
+
+
+def _list_pages_sharded(bucket, prefix, shard_chars=None, max_workers=None,
+                        max_buffered_pages=100):
+    """
+    Lists objects in an S3 bucket by splitting the listing into shards
+    that are listed concurrently, yielding pages in key order.
+
+    The keys under 'prefix' are split into consecutive ranges at a set of
+    boundaries, and each range is listed with its own continuation chain,
+    starting after the previous boundary and ending at its own. Boundaries
+    are either 'prefix' followed by each of 'shard_chars', or otherwise the
+    folders found directly under 'prefix' (falling back to alphanumeric
+    characters if there are fewer than two of those). Because the ranges
+    cover all keys, any keys outside of the boundaries are still listed,
+    just by a less evenly-sized shard.
+
+    Args:
+        bucket (str): The bucket to list objects from
+        prefix (str): The prefix to list objects under
+        shard_chars (str, optional):
+            The characters that keys directly under 'prefix' commonly
+            start with, e.g. '0123456789abcdef' for keys starting with
+            hex-encoded hashes
+        max_workers (int, optional):
+            The number of shards to list concurrently. Defaults to the
+            'max_workers' option.
+        max_buffered_pages (int):
+            The number of pages that may be held in memory for each shard
+            that is not yet being yielded from
+    Yields:
+        dict: The 'list_objects_v2' response for each page, with 'Contents'
+            limited to the keys within the page's shard
+    """
+    max_workers = max_workers or get_option('max_workers')
+    boundaries = _get_shard_boundaries(bucket, prefix, shard_chars)
+    shards = list(zip([None] + boundaries, boundaries + [None]))
+    shard_queues = [queue.Queue(maxsize=max_buffered_pages) for _ in shards]
+    stop_listing = threading.Event()
+
+    def put(shard_queue, item):
+        # Wait for room in the queue, unless the consumer has gone away
+        while not stop_listing.is_set():
+            try:
+                shard_queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def list_shard(start_after, end, shard_queue):
+        try:
+            list_kwargs = {}
+            if start_after is not None:
+                list_kwargs['StartAfter'] = start_after
+            pages = _list_pages(bucket, prefix, **list_kwargs)
+            # Checked before each page is requested, so that shards that
+            # start after the consumer has gone away make no requests
+            while not stop_listing.is_set():
+                response = next(pages, None)
+                if response is None:
+                    break
+                contents = response.get('Contents', [])
+                shard_contents = [obj for obj in contents
+                                  if end is None or obj['Key'] <= end]
+                put(shard_queue, dict(response, Contents=shard_contents))
+                if len(shard_contents) < len(contents):
+                    break
+        except Exception as e:
+            put(shard_queue, ('error', e))
+        finally:
+            put(shard_queue, ('done', None))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        try:
+            for (start_after, end), shard_queue in zip(shards, shard_queues):
+                futures.append(executor.submit(
+                    instrumentation.bind(list_shard),
+                    start_after, end, shard_queue))
+            for shard_queue in shard_queues:
+                while True:
+                    item = shard_queue.get()
+                    if isinstance(item, tuple):
+                        status, error = item
+                        if status == 'error':
+                            raise error
+                        break
+                    yield item
+        finally:
+            stop_listing.set()
+            for future in futures:
+                future.cancel()
+
+
+def _get_shard_boundaries(bucket, prefix, shard_chars=None):
+    """
+    Determines the keys at which to split a sharded listing
+
+    Args:
+        bucket (str): The bucket to list objects from
+        prefix (str): The prefix to list objects under
+        shard_chars (str, optional):
+            The characters that keys directly under 'prefix' commonly
+            start with. If not provided, the folders directly under
+            'prefix' are used.
+    Returns:
+        list<str>: The sorted shard boundaries
+    """
+    if shard_chars is None:
+        s3 = get_s3_client()
+        response = s3.list_objects_v2(Bucket=bucket, Prefix=prefix,
+                                      Delimiter='/')
+        folders = [folder['Prefix']
+                   for folder in response.get('CommonPrefixes', [])]
+        if len(folders) > 1:
+            return folders
+        shard_chars = DEFAULT_SHARD_CHARS
+    return sorted({prefix + char for char in shard_chars})
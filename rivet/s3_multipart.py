@@ -0,0 +1,199 @@
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from rivet import instrumentation
+from rivet.s3_client import get_s3_client
+
+
+# S3 requires all parts of a multipart upload but the last to be this large
+MIN_PART_SIZE = 5 * 1024 ** 2
+
+# The largest part S3 accepts
+MAX_PART_SIZE = 5 * 1024 ** 3
+
+# The maximum number of parts in a multipart upload
+MAX_PARTS = 10000
+
+# The number of parts uploaded at each part size before the part size is
+# doubled, so that uploads of unknown size do not run out of parts. Starting
+# from 8 MiB parts, this reaches the 5 TiB maximum object size within
+# 'MAX_PARTS' parts.
+PARTS_PER_PART_SIZE = 1000
+
+
+class S3MultipartWriter(io.RawIOBase):
+    def __init__(self, bucket, path, part_size, max_concurrency):
+        """
+        A writable, binary file-like object that uploads its contents to S3
+        as they are written. Once enough data has been written to fill a
+        part, it is uploaded as part of a multipart upload in the background
+        while writing continues. At most 'max_concurrency' parts are held in
+        memory awaiting upload, after which writing blocks until one of them
+        completes.
+
+        Closing the writer uploads any remaining data and completes the
+        upload (objects smaller than a single part are uploaded with a
+        single request instead). 'abort' discards the upload.
+
+        As the size of the object is not known up front, and S3 allows at
+        most 10,000 parts per upload, the part size is doubled after every
+        'PARTS_PER_PART_SIZE' parts (up to the 5 GiB maximum part size).
+        Later parts, and so the memory they are buffered in, are larger.
+
+        Args:
+            bucket (str): The S3 bucket to upload to
+            path (str): The key to upload to
+            part_size (int):
+                The size of the first parts, in bytes. Raised to the S3
+                minimum of 5 MiB if smaller.
+            max_concurrency (int): The number of parts to upload concurrently
+        """
+        self.bucket = bucket
+        self.path = path
+        self.part_size = min(max(part_size, MIN_PART_SIZE), MAX_PART_SIZE)
+
+        self._s3 = get_s3_client()
+        self._buffer = bytearray()
+        self._position = 0
+        self._upload_id = None
+        self._part_futures = []
+        self._error = None
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self._upload_slots = threading.BoundedSemaphore(max_concurrency)
+
+    def __del__(self):
+        # Unlike other file objects, a writer that is never closed should
+        # not leave a (partial) object behind
+        try:
+            self.abort()
+        except Exception:
+            pass
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def write(self, b):
+        """
+        Writes bytes to the object, uploading any parts that are filled
+
+        Args:
+            b (bytes-like): The bytes to write
+        Returns:
+            int: The number of bytes written
+        """
+        if self.closed:
+            raise ValueError('I/O operation on closed writer.')
+        self._raise_failed_parts()
+
+        self._buffer += b
+        self._position += len(b)
+        while len(self._buffer) >= self.part_size:
+            part = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            self._upload_part(part)
+        return len(b)
+
+    def close(self):
+        """Uploads any remaining data and completes the upload"""
+        if self.closed:
+            return
+        try:
+            if self._upload_id is None:
+                self._s3.put_object(Bucket=self.bucket, Key=self.path,
+                                    Body=bytes(self._buffer))
+                instrumentation.add_bytes(len(self._buffer))
+            else:
+                if self._buffer:
+                    self._upload_part(bytes(self._buffer))
+                parts = [future.result() for future in self._part_futures]
+                self._s3.complete_multipart_upload(
+                    Bucket=self.bucket, Key=self.path,
+                    UploadId=self._upload_id,
+                    MultipartUpload={'Parts': parts})
+        except BaseException:
+            self.abort()
+            raise
+        instrumentation.add_object_size(self._position)
+        self._buffer = bytearray()
+        self._executor.shutdown()
+        super().close()
+
+    def abort(self):
+        """Discards the upload, and any parts uploaded so far"""
+        if self.closed:
+            return
+        for future in self._part_futures:
+            future.cancel()
+        self._executor.shutdown()
+        self._buffer = bytearray()
+        if self._upload_id is not None:
+            self._s3.abort_multipart_upload(Bucket=self.bucket,
+                                            Key=self.path,
+                                            UploadId=self._upload_id)
+        super().close()
+
+    def _upload_part(self, data):
+        """
+        Queues a part for upload, starting the multipart upload if needed,
+        and grows the part size once enough parts have been queued
+
+        Args:
+            data (bytes): The contents of the part
+        Raises:
+            ValueError: If the upload would exceed the maximum number of parts
+        """
+        part_number = len(self._part_futures) + 1
+        if part_number > MAX_PARTS:
+            raise ValueError(
+                'Multipart uploads are limited to {} parts. Increase the '
+                '\'multipart_chunksize\' transfer option to upload larger '
+                'objects.'.format(MAX_PARTS))
+        if self._upload_id is None:
+            response = self._s3.create_multipart_upload(Bucket=self.bucket,
+                                                        Key=self.path)
+            self._upload_id = response['UploadId']
+
+        self._upload_slots.acquire()
+        future = self._executor.submit(
+            instrumentation.bind(self._send_part), part_number, data)
+        future.add_done_callback(self._on_part_done)
+        self._part_futures.append(future)
+        if part_number % PARTS_PER_PART_SIZE == 0:
+            self.part_size = min(2 * self.part_size, MAX_PART_SIZE)
+
+    def _on_part_done(self, future):
+        """
+        Frees up an upload slot once a part is done uploading, and records
+        the error if it failed
+
+        Args:
+            future (concurrent.futures.Future): The part's upload
+        """
+        self._upload_slots.release()
+        if not future.cancelled() and future.exception() is not None:
+            self._error = self._error or future.exception()
+
+    def _send_part(self, part_number, data):
+        """
+        Uploads a single part
+
+        Args:
+            part_number (int): The number of the part, starting from 1
+            data (bytes): The contents of the part
+        Returns:
+            dict: The part's 'PartNumber' and 'ETag'
+        """
+        response = self._s3.upload_part(Bucket=self.bucket, Key=self.path,
+                                        UploadId=self._upload_id,
+                                        PartNumber=part_number, Body=data)
+        instrumentation.add_bytes(len(data))
+        return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+    def _raise_failed_parts(self):
+        """Raises the error of the first part that failed to upload, if any"""
+        if self._error is not None:
+            raise self._error
@@ -0,0 +1,209 @@
+import copy
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from botocore.exceptions import ClientError
+
+from rivet import get_option, inform
+from rivet.s3_client import get_s3_client
+
+
+# Error codes botocore reports for a '304 Not Modified' response
+NOT_MODIFIED_CODES = ['304', 'NotModified']
+
+_CacheEntry = namedtuple('_CacheEntry', ['etag', 'obj', 'size'])
+
+_entries = OrderedDict()
+_entries_size = 0
+_lock = threading.Lock()
+
+
+def object_cache_enabled():
+    """
+    Checks whether objects that are read should be cached in memory, i.e.
+    whether the 'object_cache_max_size' option is set
+
+    Returns:
+        bool: Whether the in-memory cache is enabled
+    """
+    return bool(get_option('object_cache_max_size'))
+
+
+def read_through(bucket, path, read_args, read_object):
+    """
+    Gets an object as read from S3 from the in-memory cache, or reads it if
+    the cache has no copy of its current version.
+
+    Cached objects are keyed on the bucket, key and reading arguments of the
+    object, and are revalidated with a GET request conditional on their
+    ETag, which costs a single '304 Not Modified' response when the object
+    is unchanged. Once an object is added, the least recently used objects
+    are evicted until the cache is within the 'object_cache_max_size'
+    option.
+
+    Objects are handed out as deep copies if the 'object_cache_copy' option
+    is set. Otherwise, the cached objects are shared, with the NumPy arrays
+    of DataFrames made read-only so that they cannot be modified in place.
+
+    Args:
+        bucket (str): The S3 bucket to search for the object in
+        path (str): The path of the file to read from in S3
+        read_args (object):
+            The arguments the object is read with, which must have a
+            'repr' that tells different arguments apart
+        read_object (callable):
+            Called with the current ETag of the object to read it, if needed
+    Returns:
+        object: The object read from S3
+    """
+    cache_key = (bucket, path, repr(read_args))
+    with _lock:
+        entry = _entries.get(cache_key)
+    cached_etag = entry.etag if entry is not None else None
+
+    etag = _get_current_etag(bucket, path, cached_etag)
+    if entry is not None and etag == cached_etag:
+        inform('Reading s3://{}/{} from memory cache...'.format(bucket, path))
+        with _lock:
+            if cache_key in _entries:
+                _entries.move_to_end(cache_key)
+        return _hand_out(entry.obj)
+
+    obj = read_object(etag)
+    # Estimated first, as pandas cannot measure read-only object columns
+    size = _estimate_size(obj)
+    if not get_option('object_cache_copy'):
+        obj = _make_read_only(obj)
+    _add(cache_key, _CacheEntry(etag, obj, size))
+    return _hand_out(obj)
+
+
+def clear():
+    """Removes all objects from the in-memory cache"""
+    global _entries_size
+    with _lock:
+        _entries.clear()
+        _entries_size = 0
+
+
+def _get_current_etag(bucket, path, cached_etag=None):
+    """
+    Gets the current ETag of an object, with a GET request for as little
+    of the object as possible, which is conditional on a cached ETag
+
+    Args:
+        bucket (str): The S3 bucket to search for the object in
+        path (str): The path of the object in S3
+        cached_etag (str, optional): The ETag of a cached copy of the object
+    Returns:
+        str: The current ETag of the object
+    """
+    s3 = get_s3_client()
+    conditions = {'IfNoneMatch': cached_etag} if cached_etag else {}
+    # Empty objects have no satisfiable byte ranges, and are requested whole
+    for range_kwargs in [{'Range': 'bytes=0-0'}, {}]:
+        try:
+            response = s3.get_object(Bucket=bucket, Key=path,
+                                     **range_kwargs, **conditions)
+        except ClientError as e:
+            code = e.response['Error']['Code']
+            if code in NOT_MODIFIED_CODES:
+                return cached_etag
+            if code == 'InvalidRange':
+                continue
+            raise
+        response['Body'].close()
+        return response['ETag']
+
+
+def _add(cache_key, entry):
+    """
+    Adds an object to the in-memory cache, evicting the least recently used
+    objects to keep the cache within its maximum size
+
+    Args:
+        cache_key (tuple): The key to cache the object under
+        entry (_CacheEntry): The object to cache
+    """
+    global _entries_size
+    max_size = get_option('object_cache_max_size')
+    with _lock:
+        previous_entry = _entries.pop(cache_key, None)
+        if previous_entry is not None:
+            _entries_size -= previous_entry.size
+        if entry.size > max_size:
+            return
+
+        _entries[cache_key] = entry
+        _entries_size += entry.size
+        while _entries_size > max_size:
+            _, evicted_entry = _entries.popitem(last=False)
+            _entries_size -= evicted_entry.size
+
+
+def _estimate_size(obj):
+    """
+    Estimates the memory used by an object
+
+    Args:
+        obj (object): The object to estimate the size of
+    Returns:
+        int: The estimated size of the object, in bytes
+    """
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if isinstance(obj, pa.Table):
+        return obj.nbytes
+    return sys.getsizeof(obj)
+
+
+def _make_read_only(obj):
+    """
+    Prevents the NumPy-backed columns of a DataFrame from being modified
+    in place, by rebuilding it from read-only views of its columns (so that
+    each column is held separately, rather than in a writable block shared
+    with other columns). Other objects are left as they are.
+
+    Args:
+        obj (object): The object to make read-only
+    Returns:
+        object: The read-only DataFrame, or the object as it was
+    """
+    if not isinstance(obj, pd.DataFrame):
+        return obj
+    columns = {}
+    for position, dtype in enumerate(obj.dtypes):
+        column = obj.iloc[:, position]
+        if isinstance(dtype, np.dtype):
+            column = column.to_numpy()
+            column.flags.writeable = False
+        columns[position] = column
+    read_only = pd.DataFrame(columns, index=obj.index, copy=False)
+    read_only.columns = obj.columns
+    return read_only
+
+
+def _hand_out(obj):
+    """
+    Gets the object to return for a cached object: a deep copy, or a
+    shallow copy of DataFrames and Series (so that adding columns to them
+    does not change the cached object) if the cache is shared
+
+    Args:
+        obj (object): The cached object
+    Returns:
+        object: The object to return
+    """
+    deep = bool(get_option('object_cache_copy'))
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return obj.copy(deep=deep)
+    if isinstance(obj, pa.Table):
+        # Arrow tables are immutable, so they are never copied
+        return obj
+    return copy.deepcopy(obj) if deep else obj
@@ -1,36 +1,69 @@
 import os
 import sys
+import threading
+import time
 
-import boto3
+from rivet.s3_client import get_s3_client
 
 
 class S3ProgressBar(object):
-    def __init__(self, path, bucket, operation, width=30, fill_char='█'):
+    def __init__(self, path=None, bucket=None, operation=None, width=30,
+                 fill_char='█', filesize=None, redraw_interval=0.1,
+                 auto_finish=True):
         """
         Creates, updates, and displays an animated progress bar
-        for S3 operations
+        for S3 operations.
+
+        A single progress bar can be shared by several concurrent transfers
+        (e.g. the threads of a multipart transfer, or many objects being
+        transferred at once), in which case their progress is combined
+        into one display. Updates are thread-safe, and redraws are limited
+        to one per 'redraw_interval' seconds.
 
         Args:
-            path (str): Path to an object in S3 or on the local machine
-            bucket (str): The bucket that will be interacted with
-            operation (str):
+            path (str, optional):
+                Path to an object in S3 or on the local machine
+            bucket (str, optional): The bucket that will be interacted with
+            operation (str, optional):
                 What type of interaction with S3 will be performed.
                 Possible values are 'read', 'write', and 'copy'
             width (int): How wide the progress bar should be
             fill_char (str):
                 The character that should be used to fill the progress bar
+            filesize (int, optional):
+                The size of the transfer, in bytes, if already known.
+                If not provided, it will be determined from 'path',
+                'bucket' and 'operation'.
+            redraw_interval (float):
+                The minimum number of seconds between two redraws
+            auto_finish (bool):
+                Whether to draw the completed progress bar as soon as all
+                transfers added so far have completed. If False, it is only
+                drawn by 'finish', for when more transfers may still be
+                added (e.g. when objects are read one after another).
         """
         self.width = width
         self.fill_char = fill_char
+        self.redraw_interval = redraw_interval
+        self.auto_finish = auto_finish
 
         self.progress = 0
 
-        if operation == 'read':
+        if filesize is not None:
+            self.filesize = filesize
+        elif operation == 'read':
             self.filesize = self._get_s3_filesize(path, bucket)
         elif operation == 'write':
             self.filesize = os.stat(path).st_size
         elif operation == 'copy':
             self.filesize = self._get_s3_filesize(path, bucket)
+        else:
+            self.filesize = 0
+
+        self._lock = threading.Lock()
+        self._start_time = time.monotonic()
+        self._last_draw_time = None
+        self._finished = False
 
     def __call__(self, new_progress):
         """
@@ -42,21 +75,79 @@ class S3ProgressBar(object):
                 How much progress, in bytes, has been made in the
                 S3 operation since the last callback
         """
-        self.progress += new_progress
-        pct_progress = float(self.progress) / float(self.filesize)
+        with self._lock:
+            self.progress += new_progress
+            now = time.monotonic()
+            finished = self.auto_finish and self.progress >= self.filesize
+            if finished:
+                if self._finished:
+                    return
+                self._finished = True
+            elif (self._last_draw_time is not None
+                  and now - self._last_draw_time < self.redraw_interval):
+                return
+            self._last_draw_time = now
+            self._draw(now, finished)
+
+    def finish(self):
+        """
+        Draws the completed progress bar, unless it has already been drawn
+        or no transfer was ever added to it
+        """
+        with self._lock:
+            if self._finished or not self.filesize:
+                return
+            self._finished = True
+            self._draw(time.monotonic(), True)
+
+    def add_transfer(self, filesize):
+        """
+        Adds another transfer whose progress is to be combined into
+        this progress bar
+
+        Args:
+            filesize (int): The size of the transfer, in bytes
+        """
+        with self._lock:
+            self.filesize += filesize
+            self._finished = False
+
+    def _draw(self, now, finished):
+        """
+        Writes the current state of the progress bar to stdout
+
+        Args:
+            now (float): The current time, as given by 'time.monotonic'
+            finished (bool): Whether all transfers have completed
+        """
+        if self.filesize:
+            pct_progress = min(float(self.progress) / self.filesize, 1.0)
+        else:
+            pct_progress = 1.0
 
         filled_blocks = int(self.width * pct_progress)
         blank_blocks = self.width - filled_blocks
 
-        if filled_blocks == self.width:
+        elapsed = now - self._start_time
+        throughput = self.progress / elapsed if elapsed > 0 else 0
+        if finished:
+            timing = 'in {}'.format(_format_duration(elapsed))
             line_end_char = '\n'
         else:
+            if throughput:
+                timing = 'ETA {}'.format(_format_duration(
+                    (self.filesize - self.progress) / throughput))
+            else:
+                timing = 'ETA --:--'
             line_end_char = '\r'
+
         _ = sys.stdout.write(
-                '    |{}{}| ({:.2f}%){}'.format(
+                '    |{}{}| ({:.2f}%) {}/s {}{}'.format(
                     self.fill_char * filled_blocks,
                     ' ' * blank_blocks,
                     pct_progress * 100,
+                    _format_bytes(throughput),
+                    timing,
                     line_end_char))
 
         sys.stdout.flush()
@@ -69,6 +160,38 @@ class S3ProgressBar(object):
             path (str): Path to an object in S3
             bucket (str): The bucket that will be interacted with
         """
-        s3 = boto3.client('s3')
-        return s3.get_object(
+        s3 = get_s3_client()
+        return s3.head_object(
             Bucket=bucket, Key=path)['ContentLength']
+
+
+def _format_bytes(num_bytes):
+    """
+    Formats a number of bytes as a human-readable string
+
+    Args:
+        num_bytes (float): The number of bytes
+    Returns:
+        str: The number of bytes with a binary unit prefix, e.g. '1.5 MiB'
+    """
+    for unit in ['B', 'KiB', 'MiB', 'GiB']:
+        if num_bytes < 1024:
+            return '{:.1f} {}'.format(num_bytes, unit)
+        num_bytes /= 1024.0
+    return '{:.1f} TiB'.format(num_bytes)
+
+
+def _format_duration(seconds):
+    """
+    Formats a number of seconds as a human-readable duration
+
+    Args:
+        seconds (float): The number of seconds
+    Returns:
+        str: The duration, formatted as '[H:]MM:SS'
+    """
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return '{}:{:02d}:{:02d}'.format(hours, minutes, seconds)
+    return '{:02d}:{:02d}'.format(minutes, seconds)
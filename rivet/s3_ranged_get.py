@@ -0,0 +1,236 @@
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryFile
+
+import pyarrow as pa
+from botocore.exceptions import ClientError
+
+from rivet import instrumentation
+from rivet.s3_client import get_s3_client
+
+
+# Size of the range requested from the end of an object when opening it for
+# random access, large enough to hold most Parquet footers
+TAIL_READ_SIZE = 64 * 1024
+
+
+def download_in_ranges(bucket, path, part_size, max_workers,
+                       max_in_memory_size=None, callback_factory=None,
+                       fileobj=None, etag=None):
+    """
+    Downloads an object from S3 with concurrent byte-range GET requests.
+
+    The first range is requested on its own, which also reveals the size of
+    the object (so no separate HEAD request is needed). The remaining
+    ranges are then requested concurrently, all of them conditional on the
+    object being unchanged since the first, and written straight into their
+    place in a buffer preallocated to the size of the object.
+
+    Args:
+        bucket (str): The S3 bucket to search for the object in
+        path (str): The path of the file to read from in S3
+        part_size (int): The size of each range, in bytes
+        max_workers (int): The number of ranges to request concurrently
+        max_in_memory_size (int, optional):
+            Objects up to this size are downloaded into memory, while larger
+            ones are downloaded into a temporary file on disk. If 'None' or
+            0, objects are always downloaded into a temporary file.
+        callback_factory (callable, optional):
+            Called with the size of the object once it is known, returning
+            a callback to report the number of bytes downloaded to, e.g.
+            an 'S3ProgressBar'
+        fileobj (file-like, optional):
+            A file, open for reading and writing in binary mode, to download
+            the object into regardless of its size
+        etag (str, optional):
+            The ETag the object is expected to have. The download fails if
+            the object does not match it.
+    Returns:
+        file-like: The contents of the object, rewound to the start. For
+            in-memory downloads this is a 'pyarrow.BufferReader' over the
+            preallocated buffer, which readers can consume without copying.
+    """
+    s3 = get_s3_client()
+    conditions = {'IfMatch': etag} if etag else {}
+    try:
+        first_part = s3.get_object(Bucket=bucket, Key=path,
+                                   Range='bytes=0-{}'.format(part_size - 1),
+                                   **conditions)
+        size = int(first_part['ContentRange'].rsplit('/', 1)[1])
+    except ClientError as e:
+        # Empty objects have no satisfiable byte ranges
+        if e.response['Error']['Code'] != 'InvalidRange':
+            raise
+        first_part = s3.get_object(Bucket=bucket, Key=path, **conditions)
+        size = first_part['ContentLength']
+
+    instrumentation.add_object_size(size)
+    callback = callback_factory(size) if callback_factory else None
+    if fileobj is not None:
+        sink = _FileSink(size, fileobj)
+    elif max_in_memory_size and size <= max_in_memory_size:
+        sink = _MemorySink(size)
+    else:
+        sink = _FileSink(size)
+
+    def download_part(start, response=None):
+        if response is None:
+            end = min(start + part_size, size) - 1
+            response = s3.get_object(Bucket=bucket, Key=path,
+                                     Range='bytes={}-{}'.format(start, end),
+                                     IfMatch=first_part['ETag'])
+        data = response['Body'].read()
+        sink.write(start, data)
+        instrumentation.add_bytes(len(data))
+        if callback is not None:
+            callback(len(data))
+
+    try:
+        download_part(0, first_part)
+        part_starts = range(part_size, size, part_size)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Consuming the results raises the first error, if any
+            list(executor.map(instrumentation.bind(download_part),
+                              part_starts))
+    except BaseException:
+        sink.close()
+        raise
+    return sink.reader()
+
+
+class _MemorySink(object):
+    def __init__(self, size):
+        """
+        A preallocated in-memory buffer that ranges of an object are
+        written into
+
+        Args:
+            size (int): The size of the object, in bytes
+        """
+        self._buffer = bytearray(size)
+
+    def write(self, offset, data):
+        self._buffer[offset:offset + len(data)] = data
+
+    def reader(self):
+        return pa.BufferReader(pa.py_buffer(self._buffer))
+
+    def close(self):
+        self._buffer = None
+
+
+class _FileSink(object):
+    def __init__(self, size, fileobj=None):
+        """
+        A file on disk that ranges of an object are written into
+
+        Args:
+            size (int): The size of the object, in bytes
+            fileobj (file-like, optional):
+                The file to write into. Defaults to a new temporary file.
+        """
+        self._file = fileobj if fileobj is not None else TemporaryFile()
+        self._file.truncate(size)
+        self._lock = threading.Lock()
+
+    def write(self, offset, data):
+        with self._lock:
+            self._file.seek(offset)
+            self._file.write(data)
+
+    def reader(self):
+        self._file.seek(0)
+        return self._file
+
+    def close(self):
+        self._file.close()
+
+
+class S3RangeReader(io.RawIOBase):
+    def __init__(self, bucket, path, tail_size=TAIL_READ_SIZE):
+        """
+        A seekable, read-only file-like object over an object in S3, for
+        readers that only need some parts of a file.
+        Each read is made with its own byte-range GET request, apart from
+        reads of the end of the object, which is requested up front (this
+        also reveals the size of the object, without a separate HEAD
+        request). Every request is conditional on the object being
+        unchanged since the first.
+
+        Args:
+            bucket (str): The S3 bucket to search for the object in
+            path (str): The path of the file to read from in S3
+            tail_size (int, default TAIL_READ_SIZE):
+                The number of bytes to request from the end of the object
+                on opening it
+        """
+        self.bucket = bucket
+        self.path = path
+        self.bytes_read = 0
+        self._s3 = get_s3_client()
+        self._position = 0
+
+        try:
+            tail = self._s3.get_object(Bucket=bucket, Key=path,
+                                       Range='bytes=-{}'.format(tail_size))
+        except ClientError as e:
+            # Empty objects have no satisfiable byte ranges
+            if e.response['Error']['Code'] != 'InvalidRange':
+                raise
+            tail = self._s3.get_object(Bucket=bucket, Key=path)
+        if 'ContentRange' in tail:
+            self.size = int(tail['ContentRange'].rsplit('/', 1)[1])
+        else:
+            # The whole object was returned, as it is smaller than the range
+            self.size = tail['ContentLength']
+        self._etag = tail['ETag']
+        self._tail = tail['Body'].read()
+        self._tail_start = self.size - len(self._tail)
+        self.bytes_read += len(self._tail)
+        instrumentation.add_object_size(self.size)
+        instrumentation.add_bytes(len(self._tail))
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError('Invalid whence ({})'.format(whence))
+        if position < 0:
+            raise ValueError('Negative seek position {}'.format(position))
+        self._position = position
+        return position
+
+    def readinto(self, b):
+        start = self._position
+        end = min(start + len(b), self.size)
+        if start >= end:
+            return 0
+
+        if start >= self._tail_start:
+            data = self._tail[start - self._tail_start:end - self._tail_start]
+        else:
+            response = self._s3.get_object(
+                Bucket=self.bucket, Key=self.path,
+                Range='bytes={}-{}'.format(start, end - 1),
+                IfMatch=self._etag)
+            data = response['Body'].read()
+            self.bytes_read += len(data)
+            instrumentation.add_bytes(len(data))
+
+        b[:len(data)] = data
+        self._position += len(data)
+        return len(data)
@@ -1,24 +1,64 @@
+import bz2
+import gzip
+import io
 import logging
-from tempfile import NamedTemporaryFile
+import lzma
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
-import boto3
+import pandas as pd
+import pyarrow as pa
 
-from rivet import inform, s3_path_utils
-from rivet.s3_client_config import get_s3_client_kwargs
-from rivet.storage_formats import get_storage_fn
+from rivet import get_option, inform, instrumentation, s3_path_utils
+from rivet.s3_cache import cache_enabled, open_cached
+from rivet.s3_client import get_s3_client
+from rivet.s3_client_config import get_s3_client_kwargs, get_transfer_config
+from rivet.s3_list import list_objects
+from rivet.s3_object_cache import object_cache_enabled, read_through
+from rivet.s3_progressbar import S3ProgressBar, _format_bytes
+from rivet.s3_ranged_get import S3RangeReader, download_in_ranges
+from rivet.storage_formats import (get_arrow_readable_filetypes,
+                                   get_chunk_readable_filetypes,
+                                   get_compression,
+                                   get_range_readable_filetypes,
+                                   get_storage_fn)
 
 
-def read(path, bucket=None, show_progressbar=True,
-         *args, **kwargs):
+# Size of the reads made from the body of a streamed object
+STREAM_BUFFER_SIZE = 1024 ** 2
+
+stream_decompressors = {
+    'gzip': lambda stream: gzip.GzipFile(fileobj=stream, mode='rb'),
+    'bz2': bz2.BZ2File,
+    'xz': lzma.LZMAFile
+}
+
+
+@instrumentation.instrumented('read')
+def read(path, bucket=None, show_progressbar=True, *args,
+         transfer_config=None, as_arrow=False, **kwargs):
     """
     Downloads an object from S3 and reads it into the Python session.
     Storage format is determined by file extension, to prevent
     extension-less files in S3.
 
+    When 'columns' or 'filters' are passed for a Parquet file, only its
+    footer and the column chunks of the row groups that may match the
+    filters (judging by their min/max statistics) are downloaded.
+
     Args:
         path (str): The path of the file to read from in S3
         bucket (str, optional): The S3 bucket to search for the object in
         show_progresbar (bool, default True): Whether to show a progress bar
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Transfer settings for this call, overriding the session-level
+            transfer options
+        as_arrow (bool, default False):
+            Whether to read the object into a 'pyarrow.Table' rather than a
+            DataFrame, skipping the conversion to pandas. Supported for
+            Parquet, feather and Avro files.
     Returns:
         object: The object downloaded from S3
     """
@@ -27,29 +67,24 @@ def read(path, bucket=None, show_progressbar=True,
     bucket = s3_path_utils.clean_bucket(bucket)
 
     filetype = s3_path_utils.get_filetype(path)
-    read_fn = get_storage_fn(filetype, 'read')
+    instrumentation.annotate(bucket, path, filetype)
+    read_fn = _get_read_fn(filetype, as_arrow)
 
-    s3 = boto3.client('s3')
-    s3_kwargs = get_s3_client_kwargs(path, bucket,
-                                     operation='read',
-                                     show_progressbar=show_progressbar)
-
-    with NamedTemporaryFile(suffix='.' + filetype) as tmpfile:
-        inform('Downloading from s3://{}/{}...'.format(bucket, path))
-        s3.download_file(bucket, path, tmpfile.name, **s3_kwargs)
-        inform('Reading from tempfile...')
-        obj = read_fn(tmpfile, *args, **kwargs)
-    return obj
+    _set_compression(filetype, kwargs)
+    return _read_object(bucket, path, filetype, read_fn, show_progressbar,
+                        transfer_config, args, kwargs)
 
 
+@instrumentation.instrumented('read_df_in_chunks')
 def read_df_in_chunks(path, bucket=None, chunk_size=10000, names=None,
-                      show_progressbar=True, *args, **kwargs):
+                      show_progressbar=True, *args, transfer_config=None,
+                      stream=False, **kwargs):
     """
     Downloads a DataFrame from S3 and reads it into the Python session in
     chunks of a specified number of rows.
-    Because chunking is accomplished via splitting on rows, only textfiles
-    (CSVs/PSVs) and compressed textfiles are currently supported.
-    Support for reading Avro files in chunks may be added at a later date.
+    Supported formats are textfiles (CSVs/PSVs, optionally compressed),
+    Parquet (read a few row groups at a time), Avro (read a few blocks at
+    a time) and feather (read a few record batches at a time).
     Storage format is determined by file extension, to prevent
     extension-less files in S3.
 
@@ -62,45 +97,173 @@ def read_df_in_chunks(path, bucket=None, chunk_size=10000, names=None,
             Column names to apply to the chunk DataFrames. If left 'None',
             column names will be inferred by pandas.
         show_progresbar (bool, default True): Whether to show a progress bar
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Transfer settings for this call, overriding the session-level
+            transfer options
+        stream (bool, default False):
+            Whether to parse chunks from the object as it is being
+            downloaded, rather than downloading all of it first. The first
+            chunk is then available almost immediately, and neither memory
+            nor disk usage grow with the size of the object. gzip, bzip2 and
+            xz-compressed objects are decompressed on the fly, but zip
+            archives cannot be streamed. Only textfiles and Avro files can
+            be streamed, as Parquet and feather files must be read out of
+            order. 'transfer_config' does not apply to streamed downloads.
     Yields:
         df (pd.DataFrame):
             The chunk DataFrames read from the file downloaded from S3
     """
-    row_chunkable_filetypes = ['csv', 'csv.gz', 'csv.zip', 'csv.bz2', 'csv.xz',
-                               'psv', 'psv.gz', 'psv.zip', 'psv.bz2', 'psv.xz']
-
     path = s3_path_utils.clean_path(path)
     bucket = bucket or s3_path_utils.get_default_bucket()
     bucket = s3_path_utils.clean_bucket(bucket)
 
     filetype = s3_path_utils.get_filetype(path)
-    if filetype not in row_chunkable_filetypes:
+    instrumentation.annotate(bucket, path, filetype)
+    chunkable_filetypes = get_chunk_readable_filetypes()
+    if filetype not in chunkable_filetypes:
         raise IOError(
             'Reading files in chunks is only supported with the following '
-            'formats: ' + ','.join(row_chunkable_filetypes)
+            'formats: ' + ','.join(chunkable_filetypes)
         )
-    read_fn = get_storage_fn(filetype, 'read')
+    if stream:
+        compression = get_compression(filetype)
+        if compression not in [None] + list(stream_decompressors):
+            raise IOError(
+                'Streaming is not supported for files compressed with '
+                '\'{}\'.'.format(compression)
+            )
+        streamable_filetypes = get_chunk_readable_filetypes(stream=True)
+        if filetype not in streamable_filetypes:
+            raise IOError(
+                'Streaming chunks is only supported with the following '
+                'formats: ' + ','.join(streamable_filetypes)
+            )
+    read_fn = get_storage_fn(filetype, 'read_chunks')
 
-    s3 = boto3.client('s3')
-    s3_kwargs = get_s3_client_kwargs(path, bucket,
-                                     operation='read',
-                                     show_progressbar=show_progressbar)
+    if stream:
+        source_name = 'stream'
+        source = _open_stream(get_s3_client(), bucket, path,
+                              get_compression(filetype),
+                              show_progressbar=show_progressbar)
+    else:
+        source_name = 'buffer'
+        _set_compression(filetype, kwargs)
+        source = _download_to_buffer(bucket, path, show_progressbar,
+                                     transfer_config)
 
-    with NamedTemporaryFile(suffix='.' + filetype) as tmpfile:
-        inform('Downloading from s3://{}/{}...'.format(bucket, path))
-        s3.download_file(bucket, path, tmpfile.name, **s3_kwargs)
-        df_chunker = read_fn(tmpfile, names=names, chunksize=chunk_size,
+    with source as buffer:
+        df_chunker = read_fn(buffer, chunk_size, names=names,
                              *args, **kwargs)
 
         row_number = 0
-        for chunk in df_chunker:
+        for chunk in instrumentation.iterate_in_phase(df_chunker,
+                                                      'deserialize'):
             row_number += 1
-            inform('Reading from tempfile (chunk #{})...'.format(row_number))
+            inform('Reading from {} (chunk #{})...'.format(source_name,
+                                                           row_number))
             yield chunk
 
 
+@instrumentation.instrumented('read_many')
+def read_many(paths_or_prefix, bucket=None, max_workers=None, concat=True,
+              return_exceptions=False, show_progressbar=True, *args,
+              transfer_config=None, as_arrow=False, **kwargs):
+    """
+    Downloads many objects from S3 concurrently and reads them into the
+    Python session, each according to its file extension.
+
+    Args:
+        paths_or_prefix (list<str> or str):
+            The paths of the files to read from in S3, or a prefix under
+            which to read all files (in key order)
+        bucket (str, optional): The S3 bucket to search for the objects in
+        max_workers (int, optional):
+            The number of objects to download and read concurrently.
+            Defaults to the 'max_workers' option.
+        concat (bool, default True):
+            Whether to concatenate the objects (which must be DataFrames,
+            or Arrow tables with 'as_arrow') into a single DataFrame, with
+            a new index, or a single table, rather than returning a list
+        return_exceptions (bool, default False):
+            Whether to return the errors of objects that could not be read
+            in place of their contents (or, with 'concat', to log them and
+            leave those objects out) rather than raising an error
+        show_progresbar (bool, default True):
+            Whether to show a progress bar, combined for all objects
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Transfer settings for each object, overriding the session-level
+            transfer options
+        as_arrow (bool, default False):
+            Whether to read the objects into Arrow tables, as with 'read'
+    Returns:
+        list<object>, pd.DataFrame or pyarrow.Table: The objects downloaded
+            from S3, in the order of 'paths_or_prefix', or their
+            concatenation
+    Raises:
+        IOError: If any object could not be read, unless 'return_exceptions'
+    """
+    bucket = bucket or s3_path_utils.get_default_bucket()
+    bucket = s3_path_utils.clean_bucket(bucket)
+    max_workers = max_workers or get_option('max_workers')
+
+    if isinstance(paths_or_prefix, str):
+        instrumentation.annotate(bucket, paths_or_prefix)
+        paths = [key for key in list_objects(path=paths_or_prefix,
+                                             bucket=bucket,
+                                             include_prefix=True,
+                                             recursive=True)
+                 if not key.endswith('/')]
+    else:
+        paths = list(paths_or_prefix)
+
+    progressbar = None
+    if show_progressbar and get_option('verbose'):
+        progressbar = S3ProgressBar(filesize=0, auto_finish=False)
+
+    def read_one(path):
+        try:
+            path = s3_path_utils.clean_path(path)
+            filetype = s3_path_utils.get_filetype(path)
+            read_fn = _get_read_fn(filetype, as_arrow)
+
+            read_kwargs = dict(kwargs)
+            _set_compression(filetype, read_kwargs)
+            return _read_object(bucket, path, filetype, read_fn,
+                                show_progressbar, transfer_config,
+                                args, read_kwargs, progressbar=progressbar)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        objs = list(executor.map(instrumentation.bind(read_one), paths))
+    if progressbar is not None:
+        progressbar.finish()
+
+    errors = [(path, obj) for path, obj in zip(paths, objs)
+              if isinstance(obj, Exception)]
+    if errors:
+        error_msg = 'Failed to read {} of {} objects:\n{}'.format(
+            len(errors), len(paths),
+            '\n'.join('    s3://{}/{}: {!r}'.format(bucket, path, error)
+                      for path, error in errors))
+        if not return_exceptions:
+            raise IOError(error_msg) from errors[0][1]
+        logging.warning(error_msg)
+
+    if concat:
+        dfs = [obj for obj in objs if not isinstance(obj, Exception)]
+        if not dfs:
+            return pa.table({}) if as_arrow else pd.DataFrame()
+        inform('Concatenating {} objects...'.format(len(dfs)))
+        if as_arrow:
+            return pa.concat_tables(dfs)
+        return pd.concat(dfs, ignore_index=True, copy=False)
+    return objs
+
+
+@instrumentation.instrumented('read_badpractice')
 def read_badpractice(path, bucket=None, filetype=None, show_progressbar=True,
-                     *args, **kwargs):
+                     *args, transfer_config=None, **kwargs):
     """
     Downloads an object from S3 and reads it into the Python session,
     without following the rules of the normal reading function.
@@ -119,6 +282,9 @@ def read_badpractice(path, bucket=None, filetype=None, show_progressbar=True,
             The filetype of the file being read. Can be used if a file was
             saved without a proper extension.
         show_progresbar (bool, default True): Whether to show a progress bar
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Transfer settings for this call, overriding the session-level
+            transfer options
     Returns:
         object: The object downloaded from S3
     """
@@ -133,23 +299,21 @@ def read_badpractice(path, bucket=None, filetype=None, show_progressbar=True,
     if filetype is None:
         filetype = s3_path_utils.get_filetype(path)
 
+    instrumentation.annotate(bucket, path, filetype)
     read_fn = get_storage_fn(filetype, 'read')
 
-    s3 = boto3.client('s3')
-    s3_kwargs = get_s3_client_kwargs(path, bucket,
-                                     operation='read',
-                                     show_progressbar=show_progressbar)
-
-    with NamedTemporaryFile(suffix='.' + filetype) as tmpfile:
-        inform('Downloading from s3://{}/{}...'.format(bucket, path))
-        s3.download_file(bucket, path, tmpfile.name, **s3_kwargs)
-        inform('Reading object from tempfile...')
-        obj = read_fn(tmpfile, *args, **kwargs)
+    _set_compression(filetype, kwargs)
+    with _download_to_buffer(bucket, path, show_progressbar,
+                             transfer_config) as buffer:
+        inform('Reading object from buffer...')
+        with instrumentation.phase('deserialize'):
+            obj = read_fn(buffer, *args, **kwargs)
     return obj
 
 
+@instrumentation.instrumented('download_file')
 def download_file(path, bucket=None, local_file_path=None,
-                  show_progressbar=True):
+                  show_progressbar=True, transfer_config=None):
     """
     Downloads a file from S3 directly to local storage
 
@@ -158,14 +322,284 @@ def download_file(path, bucket=None, local_file_path=None,
         bucket (str, optional): The S3 bucket to search for the object in
         local_file_path (str): Where to download the file to locally
         show_progresbar (bool, default True): Whether to show a progress bar
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Transfer settings for this call, overriding the session-level
+            transfer options
     """
     bucket = bucket or s3_path_utils.get_default_bucket()
     if local_file_path is None:
         raise ValueError('A local file path must be provided.')
+    instrumentation.annotate(bucket, path, s3_path_utils.get_filetype(path))
+
+    if cache_enabled():
+        def callback_factory(filesize):
+            s3_kwargs = get_s3_client_kwargs(path, bucket,
+                                             operation='read',
+                                             show_progressbar=show_progressbar,
+                                             filesize=filesize)
+            return s3_kwargs.get('Callback')
+
+        with instrumentation.phase('download'), \
+                open_cached(bucket, path, transfer_config=transfer_config,
+                            callback_factory=callback_factory) as cached, \
+                open(local_file_path, 'wb') as local_file:
+            shutil.copyfileobj(cached, local_file)
+        return
 
-    s3 = boto3.client('s3')
+    s3 = get_s3_client()
     s3_kwargs = get_s3_client_kwargs(path, bucket,
                                      operation='read',
-                                     show_progressbar=show_progressbar)
+                                     show_progressbar=show_progressbar,
+                                     transfer_config=transfer_config)
+
+    with instrumentation.phase('download'):
+        s3.download_file(bucket, path, local_file_path, **s3_kwargs)
+    size = os.path.getsize(local_file_path)
+    instrumentation.add_bytes(size)
+    instrumentation.add_object_size(size)
+
+
+@contextmanager
+def _download_to_buffer(bucket, path, show_progressbar, transfer_config,
+                        progressbar=None, etag=None):
+    """
+    Downloads an object from S3 with concurrent byte-range requests, into a
+    buffer that is held in memory for objects up to the
+    'read_buffer_max_size' option, and spilled to a temporary file on disk
+    beyond that.
+    If the local disk cache is enabled, the object is instead read from
+    the cache, being downloaded into it first if needed.
+
+    Args:
+        bucket (str): The S3 bucket to search for the object in
+        path (str): The path of the file to read from in S3
+        show_progresbar (bool, default True): Whether to show a progress bar
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Transfer settings for this call. The part size and concurrency
+            are used for the byte ranges.
+        progressbar (S3ProgressBar, optional):
+            A progress bar shared with other downloads, to add this
+            download to instead of showing a progress bar of its own
+        etag (str, optional):
+            The ETag the object is expected to have. Not checked when the
+            local disk cache is enabled, which looks up the ETag itself.
+    Yields:
+        file-like: The buffer, rewound to its start
+    """
+    config = get_transfer_config(transfer_config)
+
+    def callback_factory(filesize):
+        if progressbar is not None:
+            progressbar.add_transfer(filesize)
+            return progressbar
+        s3_kwargs = get_s3_client_kwargs(path, bucket,
+                                         operation='read',
+                                         show_progressbar=show_progressbar,
+                                         filesize=filesize)
+        return s3_kwargs.get('Callback')
+
+    if cache_enabled():
+        with instrumentation.phase('download'):
+            buffer = open_cached(bucket, path,
+                                 transfer_config=transfer_config,
+                                 callback_factory=callback_factory)
+        try:
+            yield buffer
+        finally:
+            buffer.close()
+        return
+
+    inform('Downloading from s3://{}/{}...'.format(bucket, path))
+    with instrumentation.phase('download'):
+        buffer = download_in_ranges(
+            bucket, path,
+            part_size=config.multipart_chunksize,
+            max_workers=(config.max_request_concurrency
+                         if config.use_threads else 1),
+            max_in_memory_size=get_option('read_buffer_max_size'),
+            callback_factory=callback_factory,
+            etag=etag)
+    try:
+        yield buffer
+    finally:
+        buffer.close()
+
+
+def _get_read_fn(filetype, as_arrow=False):
+    """
+    Gets the function to read a filetype into a DataFrame (or other object),
+    or into an Arrow table
+
+    Args:
+        filetype (str): The storage type of the file being read
+        as_arrow (bool, default False): Whether to read into an Arrow table
+    Returns:
+        function: The reading function for the filetype
+    Raises:
+        IOError: If the filetype cannot be read into an Arrow table
+    """
+    if not as_arrow:
+        return get_storage_fn(filetype, 'read')
+    arrow_filetypes = get_arrow_readable_filetypes()
+    if filetype not in arrow_filetypes:
+        raise IOError(
+            'Reading files as Arrow tables is only supported with the '
+            'following formats: ' + ','.join(arrow_filetypes)
+        )
+    return get_storage_fn(filetype, 'read_arrow')
+
+
+def _read_object(bucket, path, filetype, read_fn, show_progressbar,
+                 transfer_config, read_args, read_kwargs, progressbar=None):
+    """
+    Reads an object from S3 with a reading function, through the in-memory
+    cache of objects read if it is enabled
+
+    Args:
+        bucket (str): The S3 bucket to search for the object in
+        path (str): The path of the file to read from in S3
+        filetype (str): The storage type of the file being read
+        read_fn (function): The reading function for the filetype
+        show_progresbar (bool, default True): Whether to show a progress bar
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Transfer settings for downloading the object
+        read_args (tuple): Positional arguments for the reading function
+        read_kwargs (dict): Keyword arguments for the reading function
+        progressbar (S3ProgressBar, optional):
+            A progress bar shared with other downloads
+    Returns:
+        object: The object read from S3
+    """
+    def read_object(etag=None):
+        with _open_for_read(bucket, path, filetype, show_progressbar,
+                            transfer_config, read_kwargs,
+                            progressbar=progressbar, etag=etag) as buffer:
+            inform('Reading from buffer...')
+            with instrumentation.phase('deserialize'):
+                return read_fn(buffer, *read_args, **read_kwargs)
+
+    if object_cache_enabled():
+        cache_args = (read_fn.__name__, read_args,
+                      sorted(read_kwargs.items()))
+        return read_through(bucket, path, cache_args, read_object)
+    return read_object()
+
+
+@contextmanager
+def _open_for_read(bucket, path, filetype, show_progressbar, transfer_config,
+                   read_kwargs, progressbar=None, etag=None):
+    """
+    Opens an object in S3 for a reading function. Formats that can select
+    columns and rows from parts of a file (i.e. Parquet) are read with
+    byte-range requests for just those parts when columns or filters are
+    requested, while everything else is downloaded in full.
+
+    Args:
+        bucket (str): The S3 bucket to search for the object in
+        path (str): The path of the file to read from in S3
+        filetype (str): The storage type of the file being read
+        show_progresbar (bool, default True): Whether to show a progress bar
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Transfer settings for downloading the object in full
+        read_kwargs (dict): The arguments for the reading function
+        progressbar (S3ProgressBar, optional):
+            A progress bar shared with other downloads
+        etag (str, optional):
+            The ETag the object is expected to have, when downloading it in
+            full without the local disk cache
+    Yields:
+        file-like: The object, positioned at its start
+    """
+    projected = any(read_kwargs.get(arg) is not None
+                    for arg in ['columns', 'filters'])
+    if not projected or filetype not in get_range_readable_filetypes():
+        with _download_to_buffer(bucket, path, show_progressbar,
+                                 transfer_config, progressbar=progressbar,
+                                 etag=etag) as buffer:
+            yield buffer
+        return
+
+    inform('Reading parts of s3://{}/{}...'.format(bucket, path))
+    with instrumentation.phase('download'):
+        reader = S3RangeReader(bucket, path)
+    with reader:
+        yield reader
+        inform('Downloaded {} of {}'.format(_format_bytes(reader.bytes_read),
+                                            _format_bytes(reader.size)))
+
+
+def _set_compression(filetype, kwargs):
+    """
+    Buffers do not carry a file extension for pandas to infer compression
+    from, so the compression implied by the S3 path is passed explicitly.
+
+    Args:
+        filetype (str): The filetype of the file being read
+        kwargs (dict): The kwargs that will be passed to the read function
+    """
+    compression = get_compression(filetype)
+    if compression is not None:
+        kwargs.setdefault('compression', compression)
+
+
+@contextmanager
+def _open_stream(s3, bucket, path, compression, show_progressbar):
+    """
+    Opens an object in S3 as a stream that is read from as it downloads,
+    decompressing it on the fly if necessary
+
+    Args:
+        s3 (boto3.client): The S3 client to download with
+        bucket (str): The S3 bucket to search for the object in
+        path (str): The path of the file to read from in S3
+        compression (str): The compression method of the object, if any
+        show_progresbar (bool, default True): Whether to show a progress bar
+    Yields:
+        file-like: The (decompressed) contents of the object
+    """
+    inform('Streaming from s3://{}/{}...'.format(bucket, path))
+    with instrumentation.phase('download'):
+        response = s3.get_object(Bucket=bucket, Key=path)
+    instrumentation.add_object_size(response['ContentLength'])
+    body = response['Body']
+    s3_kwargs = get_s3_client_kwargs(path, bucket,
+                                     operation='read',
+                                     show_progressbar=show_progressbar,
+                                     filesize=response['ContentLength'])
+    stream = io.BufferedReader(
+        _ProgressStream(body, s3_kwargs.get('Callback')),
+        buffer_size=STREAM_BUFFER_SIZE)
+    try:
+        if compression is not None:
+            stream = stream_decompressors[compression](stream)
+        yield stream
+    finally:
+        body.close()
+
+
+class _ProgressStream(io.RawIOBase):
+    def __init__(self, body, callback=None):
+        """
+        Wraps the body of an S3 object as a readable raw stream,
+        reporting progress as it is read
+
+        Args:
+            body (botocore.response.StreamingBody): The body of the object
+            callback (callable, optional):
+                Called with the number of bytes read after each read,
+                e.g. an 'S3ProgressBar'
+        """
+        self._body = body
+        self._callback = callback
+
+    def readable(self):
+        return True
 
-    s3.download_file(bucket, path, local_file_path, **s3_kwargs)
+    def readinto(self, b):
+        data = self._body.read(len(b))
+        num_bytes = len(data)
+        b[:num_bytes] = data
+        instrumentation.add_bytes(num_bytes)
+        if self._callback is not None and num_bytes:
+            self._callback(num_bytes)
+        return num_bytes
@@ -0,0 +1,381 @@
+import hashlib
+import math
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from rivet import get_option, inform, instrumentation, s3_path_utils
+from rivet.s3_client import get_s3_client
+from rivet.s3_client_config import get_transfer_config
+from rivet.s3_delete import MAX_KEYS_PER_DELETE, _batch, _delete_batch
+from rivet.s3_list import iter_objects
+from rivet.s3_progressbar import S3ProgressBar, _format_bytes
+
+
+S3_URL_PREFIX = 's3://'
+
+# Part sizes that multipart uploads are commonly made with (e.g. by boto3,
+# the AWS CLI and Spark), used to find the part size an object was uploaded
+# with, which is not recorded in its ETag
+COMMON_PART_SIZES = [size * 1024 ** 2 for size in
+                     [5, 8, 16, 32, 64, 100, 128, 256, 512, 1024]]
+
+# The granularity that other part sizes are commonly chosen at
+PART_SIZE_GRANULARITY = 1024 ** 2
+
+# The size of the blocks that local files are read in for hashing
+HASH_BLOCK_SIZE = 1024 ** 2
+
+compare_methods = ['etag', 'mtime']
+
+SyncResult = namedtuple('SyncResult', ['transferred', 'deleted',
+                                       'bytes_transferred', 'dry_run'])
+SyncResult.__doc__ = """
+The outcome of a sync operation
+
+Attributes:
+    transferred (list<str>):
+        The paths, relative to the source, of the files that were (or, in a
+        dry run, would have been) transferred
+    deleted (list<str>):
+        The paths, relative to the destination, of the files that were (or
+        would have been) deleted
+    bytes_transferred (int): The total size of the files transferred
+    dry_run (bool): Whether this was a dry run, where nothing was changed
+"""
+
+
+@instrumentation.instrumented('sync')
+def sync(source, dest, delete=False, dry_run=False, compare='etag',
+         max_workers=None, show_progressbar=True, transfer_config=None):
+    """
+    Makes a local directory or an S3 prefix mirror the other, transferring
+    only the files that are missing or have changed in the destination.
+    One of 'source' and 'dest' must be an S3 URL ('s3://bucket/prefix'),
+    and the other a local directory.
+
+    Files are compared by size, and then either by ETag (computing the ETag
+    of local files, including the ETags of multipart uploads) or by
+    modification time. Files are compared and transferred several at a
+    time.
+
+    Args:
+        source (str): The local directory or S3 URL to sync from
+        dest (str): The local directory or S3 URL to sync to
+        delete (bool, default False):
+            Whether to delete the files in 'dest' that are not in 'source'.
+            Not allowed when syncing to the root of a bucket.
+        dry_run (bool, default False):
+            Whether to only report what would be transferred and deleted,
+            without making any changes
+        compare (str, default 'etag'):
+            How to tell if files of the same size differ: 'etag' compares
+            their contents, while 'mtime' treats files as changed if the
+            source was modified more recently than the destination (which
+            is faster, but relies on clocks and on downloaded files having
+            the modification times of their objects, as set by 'sync')
+        max_workers (int, optional):
+            The number of files to compare and transfer concurrently.
+            Defaults to the 'max_workers' option.
+        show_progresbar (bool, default True): Whether to show a progress bar
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Transfer settings for this call, overriding the session-level
+            transfer options. The multipart settings are also used to
+            compute the ETags of local files.
+    Returns:
+        SyncResult: The files transferred and deleted
+    Raises:
+        ValueError: If neither or both of 'source' and 'dest' are S3 URLs,
+            'compare' is not a supported method, deleting would apply to a
+            whole bucket, or an object's key would be downloaded outside
+            of the local directory
+        IOError: If the local directory to upload does not exist
+    """
+    if compare not in compare_methods:
+        raise ValueError('Comparison method \'{}\' not supported, must be '
+                         'one of {}.'.format(compare, compare_methods))
+    if source.startswith(S3_URL_PREFIX) == dest.startswith(S3_URL_PREFIX):
+        raise ValueError('Exactly one of the source and destination of a '
+                         'sync must be an S3 URL (\'s3://bucket/prefix\').')
+    upload = dest.startswith(S3_URL_PREFIX)
+    local_dir, s3_url = (source, dest) if upload else (dest, source)
+    bucket, prefix = _parse_s3_url(s3_url)
+    instrumentation.annotate(bucket, prefix)
+    if upload and not os.path.isdir(local_dir):
+        # Would otherwise look like an empty directory, so that everything
+        # under the prefix would be deleted
+        raise IOError('Local directory \'{}\' does not exist.'
+                      .format(local_dir))
+    if upload and delete and prefix == '':
+        raise ValueError(
+            'A sync was about to delete from the entirety of a bucket. '
+            'That seems unsafe, and has been prevented.'
+        )
+
+    max_workers = max_workers or get_option('max_workers')
+    config = get_transfer_config(transfer_config)
+
+    local_files = _list_local_files(local_dir)
+    s3_objects = {obj['Key'][len(prefix):]: obj for obj in iter_objects(
+        prefix, bucket, include_prefix=True, recursive=True)
+        if not obj['Key'].endswith('/')}
+    source_files, dest_files = ((local_files, s3_objects) if upload
+                                else (s3_objects, local_files))
+    if not upload:
+        # Fail before downloading anything if any key would escape
+        for path in s3_objects:
+            _get_local_path(local_dir, path)
+
+    inform('Comparing {} with {}...'.format(source, dest))
+
+    def is_changed(path):
+        if path not in dest_files:
+            return True
+        local_file, s3_object = local_files[path], s3_objects[path]
+        if local_file['Size'] != s3_object['Size']:
+            return True
+        if compare == 'mtime':
+            s3_mtime = s3_object['LastModified'].timestamp()
+            # S3 only records modification times to the second
+            local_mtime = math.floor(local_file['LastModified'])
+            return (local_mtime > s3_mtime if upload
+                    else s3_mtime > local_mtime)
+        with instrumentation.phase('compare'):
+            return (_get_local_etag(local_file['Path'], s3_object['ETag'],
+                                    config.multipart_chunksize)
+                    != s3_object['ETag'])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        paths = sorted(source_files)
+        transfers = [path for path, changed
+                     in zip(paths, executor.map(
+                         instrumentation.bind(is_changed), paths))
+                     if changed]
+    deletions = (sorted(set(dest_files) - set(source_files))
+                 if delete else [])
+    bytes_transferred = sum(source_files[path]['Size'] for path in transfers)
+
+    inform('{} {} file(s) ({}){}'.format(
+        'Would transfer' if dry_run else 'Transferring',
+        len(transfers), _format_bytes(bytes_transferred),
+        ' and delete {} file(s)'.format(len(deletions)) if delete else ''))
+    if not dry_run:
+        _transfer(transfers, upload, local_dir, bucket, prefix,
+                  s3_objects, max_workers, config,
+                  show_progressbar, bytes_transferred)
+        _delete(deletions, upload, local_dir, bucket, prefix, max_workers)
+
+    return SyncResult(transferred=transfers, deleted=deletions,
+                      bytes_transferred=bytes_transferred, dry_run=dry_run)
+
+
+def _parse_s3_url(url):
+    """
+    Splits an S3 URL into its bucket and prefix
+
+    Args:
+        url (str): An S3 URL, e.g. 's3://bucket/prefix/'
+    Returns:
+        tuple(str, str): The bucket, and the prefix (ending in '/' unless
+            it is empty)
+    """
+    bucket, _, prefix = url[len(S3_URL_PREFIX):].partition('/')
+    return bucket, s3_path_utils.clean_folder(prefix)
+
+
+def _list_local_files(local_dir):
+    """
+    Lists the files in a local directory and its subdirectories
+
+    Args:
+        local_dir (str): The directory to list
+    Returns:
+        dict<str, dict>: The 'Path', 'Size' and 'LastModified' of each
+            file, by its path relative to 'local_dir' (separated by '/')
+    """
+    files = {}
+    for dirpath, _, filenames in os.walk(local_dir):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            stat = os.stat(path)
+            relative_path = os.path.relpath(path, local_dir)
+            files[relative_path.replace(os.sep, '/')] = {
+                'Path': path,
+                'Size': stat.st_size,
+                'LastModified': stat.st_mtime
+            }
+    return files
+
+
+def _get_local_path(local_dir, path):
+    """
+    Gets the local path of a file in a synced directory, making sure that
+    it is inside the directory (S3 keys may contain e.g. '../')
+
+    Args:
+        local_dir (str): The local directory
+        path (str): The path of the file relative to 'local_dir',
+            separated by '/'
+    Returns:
+        str: The path of the local file
+    Raises:
+        ValueError: If the file would be outside of 'local_dir'
+    """
+    root = os.path.realpath(local_dir)
+    local_path = os.path.realpath(os.path.join(root, *path.split('/')))
+    if os.path.commonpath([root, local_path]) != root or local_path == root:
+        raise ValueError('\'{}\' would be synced outside of the local '
+                         'directory \'{}\'.'.format(path, local_dir))
+    return local_path
+
+
+def _get_local_etag(path, s3_etag, part_size):
+    """
+    Computes the ETag that a local file would have if uploaded to S3 in the
+    same way as an object, i.e. either its MD5 hash, or for multipart
+    uploads the MD5 hash of the MD5 hashes of its parts
+
+    Args:
+        path (str): The path to the local file
+        s3_etag (str): The ETag of the object the file is compared with
+        part_size (int):
+            The part size that multipart uploads are made with by default
+    Returns:
+        str: The ETag of the file, or 'None' if no likely part size gives as
+            many parts as the object has. If several do, the ETag for the
+            one that matches the object (if any) is returned.
+    """
+    s3_etag = s3_etag.strip('"')
+    if '-' not in s3_etag:
+        return '"{}"'.format(_md5_of_parts(path, None)[0].hexdigest())
+
+    num_parts = int(s3_etag.rsplit('-', 1)[1])
+    size = os.path.getsize(path)
+    min_part_size = int(math.ceil(float(size) / num_parts))
+    candidate_part_sizes = [part_size] + COMMON_PART_SIZES + [
+        int(math.ceil(float(min_part_size) / PART_SIZE_GRANULARITY)
+            * PART_SIZE_GRANULARITY)]
+
+    etag = None
+    for candidate_part_size in sorted(set(candidate_part_sizes),
+                                      key=candidate_part_sizes.index):
+        # Only part sizes giving as many parts as the object has can match
+        if int(math.ceil(float(size) / candidate_part_size)) != num_parts:
+            continue
+        part_hashes = _md5_of_parts(path, candidate_part_size)
+        etag = '"{}-{}"'.format(
+            hashlib.md5(b''.join(h.digest() for h in part_hashes))
+            .hexdigest(), len(part_hashes))
+        if etag.strip('"') == s3_etag:
+            break
+    return etag
+
+
+def _md5_of_parts(path, part_size):
+    """
+    Computes the MD5 hashes of consecutive parts of a local file
+
+    Args:
+        path (str): The path to the local file
+        part_size (int): The size of each part, or 'None' for a single part
+    Returns:
+        list<hashlib.md5>: The hash of each part
+    """
+    hashes = [hashlib.md5()]
+    part_remaining = part_size
+    with open(path, 'rb') as f:
+        while True:
+            block_size = HASH_BLOCK_SIZE
+            if part_size is not None:
+                if part_remaining == 0:
+                    hashes.append(hashlib.md5())
+                    part_remaining = part_size
+                block_size = min(block_size, part_remaining)
+            block = f.read(block_size)
+            if not block:
+                break
+            hashes[-1].update(block)
+            if part_size is not None:
+                part_remaining -= len(block)
+    if (part_size is not None and len(hashes) > 1
+            and part_remaining == part_size):
+        # The file ended on a part boundary, leaving an empty last part
+        hashes.pop()
+    return hashes
+
+
+def _transfer(paths, upload, local_dir, bucket, prefix, s3_objects,
+              max_workers, config, show_progressbar, total_size):
+    """
+    Uploads or downloads files between a local directory and an S3 prefix,
+    several at a time
+
+    Args:
+        paths (list<str>): The relative paths of the files to transfer
+        upload (bool): Whether to upload the files, or download them
+        local_dir (str): The local directory
+        bucket (str): The S3 bucket
+        prefix (str): The S3 prefix
+        s3_objects (dict<str, dict>): The objects under the prefix
+        max_workers (int): The number of files to transfer concurrently
+        config (boto3.s3.transfer.TransferConfig): Transfer settings
+        show_progresbar (bool): Whether to show a progress bar
+        total_size (int): The total size of the files to transfer
+    """
+    s3 = get_s3_client()
+    s3_kwargs = {'Config': config}
+    if show_progressbar and get_option('verbose') and paths:
+        s3_kwargs['Callback'] = S3ProgressBar(filesize=total_size)
+
+    def transfer(path):
+        local_path = _get_local_path(local_dir, path)
+        if upload:
+            with instrumentation.phase('upload'):
+                s3.upload_file(local_path, bucket, prefix + path,
+                               **s3_kwargs)
+        else:
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            with instrumentation.phase('download'):
+                s3.download_file(bucket, prefix + path, local_path,
+                                 **s3_kwargs)
+            # Lets later syncs compare by modification time
+            mtime = s3_objects[path]['LastModified'].timestamp()
+            os.utime(local_path, (mtime, mtime))
+        size = os.path.getsize(local_path)
+        instrumentation.add_bytes(size)
+        instrumentation.add_object_size(size)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Consuming the results raises the first error, if any
+        list(executor.map(instrumentation.bind(transfer), paths))
+
+
+def _delete(paths, upload, local_dir, bucket, prefix, max_workers):
+    """
+    Deletes files from the destination of a sync
+
+    Args:
+        paths (list<str>): The relative paths of the files to delete
+        upload (bool): Whether the destination is S3, or the local directory
+        local_dir (str): The local directory
+        bucket (str): The S3 bucket
+        prefix (str): The S3 prefix
+        max_workers (int): The number of batches to delete concurrently
+    Raises:
+        IOError: If any objects could not be deleted
+    """
+    if not upload:
+        for path in paths:
+            os.remove(_get_local_path(local_dir, path))
+        return
+
+    batches = _batch([prefix + path for path in paths], MAX_KEYS_PER_DELETE)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        errors = [error for _, batch_errors in executor.map(
+                      instrumentation.bind(
+                          lambda batch: _delete_batch(bucket, batch)),
+                      batches)
+                  for error in batch_errors]
+    if errors:
+        raise IOError('{} object(s) could not be deleted from s3://{}/{}: {}'
+                      .format(len(errors), bucket, prefix, errors))
@@ -1,14 +1,36 @@
+import bz2
+import gzip
+import lzma
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from tempfile import NamedTemporaryFile
+from urllib.parse import quote
 
-import boto3
+import numpy as np
+import pandas as pd
 
-from rivet import inform, s3_path_utils
-from rivet.s3_client_config import get_s3_client_kwargs
-from rivet.storage_formats import get_storage_fn
+from rivet import get_option, inform, instrumentation, s3_path_utils
+from rivet.s3_client import get_s3_client
+from rivet.s3_client_config import get_s3_client_kwargs, get_transfer_config
+from rivet.s3_multipart import S3MultipartWriter
+from rivet.storage_formats import (get_chunk_writable_filetypes,
+                                   get_compression, get_storage_fn)
 
 
+stream_compressors = {
+    'gzip': lambda stream: gzip.GzipFile(fileobj=stream, mode='wb'),
+    'bz2': lambda stream: bz2.BZ2File(stream, mode='wb'),
+    'xz': lambda stream: lzma.LZMAFile(stream, mode='wb')
+}
+
+# The directory name Hive gives to partitions with a missing value
+HIVE_DEFAULT_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+
+@instrumentation.instrumented('write')
 def write(obj, path, bucket=None,
-          show_progressbar=True, *args, **kwargs):
+          show_progressbar=True, *args, transfer_config=None, **kwargs):
     """
     Writes an object to a specified file format and uploads it to S3.
     Storage format is determined by file extension, to prevent
@@ -19,6 +41,9 @@ def write(obj, path, bucket=None,
         path (str): The path to save obj to
         bucket (str, optional): The S3 bucket to save 'obj' in
         show_progresbar (bool, default True): Whether to show a progress bar
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Transfer settings for this call, overriding the session-level
+            transfer options
     Returns:
         str: The full path to the object in S3, without the 's3://' prefix
     """
@@ -27,23 +52,156 @@ def write(obj, path, bucket=None,
     bucket = s3_path_utils.clean_bucket(bucket)
 
     filetype = s3_path_utils.get_filetype(path)
+    instrumentation.annotate(bucket, path, filetype)
     write_fn = get_storage_fn(filetype, 'write')
 
-    s3 = boto3.client('s3')
+    s3 = get_s3_client()
 
     with NamedTemporaryFile(suffix='.' + filetype) as tmpfile:
         inform('Writing object to tempfile...')
-        write_fn(obj, tmpfile, *args, **kwargs)
+        with instrumentation.phase('serialize'):
+            write_fn(obj, tmpfile, *args, **kwargs)
         s3_kwargs = get_s3_client_kwargs(tmpfile.name, bucket,
                                          operation='write',
-                                         show_progressbar=show_progressbar)
+                                         show_progressbar=show_progressbar,
+                                         transfer_config=transfer_config)
         inform('Uploading to s3://{}/{}...'.format(bucket, path))
-        s3.upload_file(tmpfile.name, bucket, path, **s3_kwargs)
+        with instrumentation.phase('upload'):
+            s3.upload_file(tmpfile.name, bucket, path, **s3_kwargs)
+        size = os.path.getsize(tmpfile.name)
+        instrumentation.add_bytes(size)
+        instrumentation.add_object_size(size)
 
     return '/'.join([bucket, path])
 
 
-def upload_file(local_file_path, path, bucket=None, show_progressbar=True):
+@instrumentation.instrumented('write_partitioned')
+def write_partitioned(df, prefix, partition_cols, bucket=None,
+                      format='parquet', filename=None, max_workers=None,
+                      *args, transfer_config=None, **kwargs):
+    """
+    Writes a DataFrame to S3 as a dataset partitioned by the values of one
+    or more columns, in the Hive-style 'column=value/' layout.
+    The DataFrame is grouped in a single pass, and each partition is written
+    to its own object, several partitions at a time.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to be uploaded to S3
+        prefix (str): The path under which to save the partitions
+        partition_cols (list<str>):
+            The columns to partition by, in the order of the folders they
+            produce. They are left out of the partitions' files.
+        bucket (str, optional): The S3 bucket to save the partitions in
+        format (str, default 'parquet'):
+            The file extension determining the storage format of each
+            partition, e.g. 'parquet', 'csv' or 'csv.gz'
+        filename (str, optional):
+            The name of the file written in each partition's folder.
+            Defaults to 'part-00000.<format>'.
+        max_workers (int, optional):
+            The number of partitions to write concurrently. Defaults to the
+            'max_workers' option.
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Transfer settings for each partition, overriding the
+            session-level transfer options
+    Returns:
+        list<str>: The keys of the objects written, in the order of the
+            partition values
+    """
+    if isinstance(partition_cols, str):
+        partition_cols = [partition_cols]
+    partition_cols = list(partition_cols)
+    if not partition_cols:
+        raise ValueError('At least one partition column must be provided.')
+    missing_cols = [col for col in partition_cols if col not in df.columns]
+    if missing_cols:
+        raise KeyError('Partition columns not found in DataFrame: {}'
+                       .format(missing_cols))
+    if len(partition_cols) == len(df.columns):
+        raise ValueError('Cannot partition by every column of a DataFrame.')
+
+    filename = filename or 'part-00000.' + format
+    # Fail before writing anything if the format is not supported
+    get_storage_fn(s3_path_utils.get_filetype(filename), 'write')
+
+    prefix = s3_path_utils.clean_path(prefix)
+    if prefix and not prefix.endswith('/'):
+        prefix += '/'
+    bucket = bucket or s3_path_utils.get_default_bucket()
+    bucket = s3_path_utils.clean_bucket(bucket)
+    max_workers = max_workers or get_option('max_workers')
+    instrumentation.annotate(bucket, prefix,
+                             s3_path_utils.get_filetype(filename))
+
+    def write_partition(key, partition):
+        write(partition, key, bucket, False, *args,
+              transfer_config=transfer_config, **kwargs)
+
+    # Rows are grouped by the codes of their (sorted) partition values,
+    # with missing values coded after all others, so that they form their
+    # own partitions rather than being dropped
+    codes = []
+    uniques = []
+    for col in partition_cols:
+        col_codes, col_uniques = pd.factorize(df[col], sort=True)
+        codes.append(np.where(col_codes == -1, len(col_uniques), col_codes))
+        uniques.append(list(col_uniques) + [None])
+    groups = df.groupby(codes, sort=True)
+
+    # All keys are built (and checked against rivet's path conventions)
+    # before anything is written, so that no partitions are left behind by
+    # a key that turns out to be invalid. The group sizes are indexed by
+    # the partition codes in the order the groups are iterated.
+    keys = []
+    for group_codes in groups.size().index:
+        if not isinstance(group_codes, tuple):
+            group_codes = (group_codes,)
+        values = [col_uniques[code]
+                  for col_uniques, code in zip(uniques, group_codes)]
+        key = prefix + ''.join(
+            '{}={}/'.format(_format_partition_value(col),
+                            _format_partition_value(value))
+            for col, value in zip(partition_cols, values)) + filename
+        keys.append(s3_path_utils.clean_path(key))
+
+    inform('Writing partitions to s3://{}/{}...'.format(bucket, prefix))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for key, (_, partition) in zip(keys, groups):
+            # Bound the number of partitions held in memory at once
+            if len(pending) >= max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            partition = partition.drop(columns=partition_cols)
+            partition = partition.reset_index(drop=True)
+            pending.add(executor.submit(
+                instrumentation.bind(write_partition), key, partition))
+        for future in wait(pending).done:
+            future.result()
+
+    return keys
+
+
+def _format_partition_value(value):
+    """
+    Formats a partition column or value as it appears in a Hive-style key,
+    escaping characters that are not safe in a folder name. Periods are
+    escaped too, as rivet only permits them in file extensions.
+
+    Args:
+        value (object): The name or value of a partition column
+    Returns:
+        str: The name or value for use in 'column=value'
+    """
+    if pd.isna(value):
+        return HIVE_DEFAULT_PARTITION
+    return quote(str(value), safe=' ').replace('.', '%2E')
+
+
+@instrumentation.instrumented('upload_file')
+def upload_file(local_file_path, path, bucket=None, show_progressbar=True,
+                transfer_config=None):
     """
     Uploads a file from local storage directly to S3
 
@@ -52,14 +210,119 @@ def upload_file(local_file_path, path, bucket=None, show_progressbar=True):
         path (str): The key the file is to be stored under in S3
         bucket (str, optional): The S3 bucket to store the object in
         show_progresbar (bool, default True): Whether to show a progress bar
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Transfer settings for this call, overriding the session-level
+            transfer options
     """
     bucket = bucket or s3_path_utils.get_default_bucket()
     if local_file_path is None:
         raise ValueError('A local file location must be provided.')
+    instrumentation.annotate(bucket, path, s3_path_utils.get_filetype(path))
 
-    s3 = boto3.client('s3')
+    s3 = get_s3_client()
     s3_kwargs = get_s3_client_kwargs(local_file_path, bucket,
                                      operation='write',
-                                     show_progressbar=show_progressbar)
+                                     show_progressbar=show_progressbar,
+                                     transfer_config=transfer_config)
+
+    with instrumentation.phase('upload'):
+        s3.upload_file(local_file_path, bucket, path, **s3_kwargs)
+    size = os.path.getsize(local_file_path)
+    instrumentation.add_bytes(size)
+    instrumentation.add_object_size(size)
+
+
+@instrumentation.instrumented('write_df_in_chunks')
+def write_df_in_chunks(dfs, path, bucket=None, *args, transfer_config=None,
+                       **kwargs):
+    """
+    Writes DataFrames, one chunk at a time, to a single object in S3.
+    Each chunk is serialized and uploaded as soon as it is produced, so the
+    upload overlaps with producing and serializing further chunks, and
+    neither memory nor disk usage grow with the size of the object.
+    Supported formats are CSVs/PSVs (optionally gzip, bzip2 or
+    xz-compressed), JSON (written with one record per line) and Parquet
+    (one row group per chunk).
+    Storage format is determined by file extension, to prevent
+    extension-less files in S3.
+
+    Args:
+        dfs (iterable<pd.DataFrame>): The DataFrames to be uploaded to S3
+        path (str): The path to save the DataFrames to
+        bucket (str, optional): The S3 bucket to save the DataFrames in
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Transfer settings for this call, overriding the session-level
+            transfer options, see 'open_writer'
+    Returns:
+        str: The full path to the object in S3, without the 's3://' prefix
+    """
+    path = s3_path_utils.clean_path(path)
+    bucket = bucket or s3_path_utils.get_default_bucket()
+    bucket = s3_path_utils.clean_bucket(bucket)
+
+    filetype = s3_path_utils.get_filetype(path)
+    instrumentation.annotate(bucket, path, filetype)
+    chunkable_filetypes = [
+        filetype for filetype in get_chunk_writable_filetypes()
+        if get_compression(filetype) in [None] + list(stream_compressors)]
+    if filetype not in chunkable_filetypes:
+        raise IOError(
+            'Writing files in chunks is only supported with the following '
+            'formats: ' + ','.join(chunkable_filetypes)
+        )
+    write_fn = get_storage_fn(filetype, 'write_chunks')
+    compression = get_compression(filetype)
+
+    with open_writer(path, bucket, transfer_config) as writer, \
+            instrumentation.phase('serialize'):
+        # Parts are uploaded in the background as chunks are serialized
+        if compression is None:
+            write_fn(dfs, writer, *args, **kwargs)
+        else:
+            with stream_compressors[compression](writer) as compressed:
+                write_fn(dfs, compressed, *args, **kwargs)
+
+    return '/'.join([bucket, path])
+
+
+@contextmanager
+def open_writer(path, bucket=None, transfer_config=None):
+    """
+    Opens an object in S3 for writing, as a binary file-like object.
+    Data is uploaded in parts (of the 'multipart_chunksize' transfer option)
+    as it is written, with up to 'max_concurrency' parts being uploaded at
+    once. The object is completed when the context exits, or discarded if
+    the context exits with an error.
+    S3 allows at most 10,000 parts per upload, so the part size is doubled
+    after every 1,000 parts; the memory used for parts awaiting upload
+    grows with it.
+
+    Args:
+        path (str): The path to save the object to
+        bucket (str, optional): The S3 bucket to save the object in
+        transfer_config (boto3.s3.transfer.TransferConfig or dict, optional):
+            Transfer settings for this call, overriding the session-level
+            transfer options
+    Yields:
+        S3MultipartWriter: The writable object
+    """
+    path = s3_path_utils.clean_path(path)
+    bucket = bucket or s3_path_utils.get_default_bucket()
+    bucket = s3_path_utils.clean_bucket(bucket)
+    s3_path_utils.get_filetype(path)
+
+    config = get_transfer_config(transfer_config)
+    writer = S3MultipartWriter(
+        bucket, path,
+        part_size=config.multipart_chunksize,
+        max_concurrency=(config.max_request_concurrency
+                         if config.use_threads else 1))
 
-    s3.upload_file(local_file_path, bucket, path, **s3_kwargs)
+    inform('Uploading to s3://{}/{} in parts...'.format(bucket, path))
+    try:
+        yield writer
+    except BaseException:
+        writer.abort()
+        raise
+    with instrumentation.phase('upload'):
+        writer.close()
@@ -1,8 +1,15 @@
+import io
 import logging
+import mmap
+import os
 import pickle
 
+import fastavro
 import pandas as pd
 import pandavro as pdx
+import pyarrow as pa
+import pyarrow.feather
+import pyarrow.parquet
 
 
 def get_storage_fn(filetype, rw):
@@ -22,6 +29,116 @@ def get_storage_fn(filetype, rw):
         )
     return format_fn_map[filetype][rw]
 
+
+def get_chunk_readable_filetypes(stream=False):
+    """
+    Gets the filetypes that can be read in chunks
+
+    Args:
+        stream (bool):
+            Whether chunks need to be read from a stream, i.e. without
+            random access to the file (which also rules out compressions,
+            such as zip, that cannot be decompressed on the fly)
+    Returns:
+        list<str>: The filetypes that can be read in chunks
+    """
+    return [filetype for filetype, fns in format_fn_map.items()
+            if 'read_chunks' in fns
+            and (not stream or (
+                any(fns is streamable_format
+                    for streamable_format in stream_formats)
+                and get_compression(filetype) in [None] + stream_compressions
+            ))]
+
+
+def get_chunk_writable_filetypes():
+    """
+    Gets the filetypes that can be written in chunks
+
+    Returns:
+        list<str>: The filetypes that can be written in chunks
+    """
+    return [filetype for filetype, fns in format_fn_map.items()
+            if 'write_chunks' in fns]
+
+
+def get_arrow_readable_filetypes():
+    """
+    Gets the filetypes that can be read into Arrow tables
+
+    Returns:
+        list<str>: The filetypes that can be read into Arrow tables
+    """
+    return [filetype for filetype, fns in format_fn_map.items()
+            if 'read_arrow' in fns]
+
+
+def get_range_readable_filetypes():
+    """
+    Gets the filetypes whose reading functions can select columns and rows
+    by reading only the parts of a file they need, given random access
+
+    Returns:
+        list<str>: The filetypes that can be read from parts of a file
+    """
+    return [filetype for filetype, fns in format_fn_map.items()
+            if any(fns is ranged_format for ranged_format in ranged_formats)]
+
+
+def get_compression(filetype):
+    """
+    Gets the compression method implied by a filetype's extension
+
+    Args:
+        filetype (str): The storage type of the file being written/read
+    Returns:
+        str: The compression method as understood by pandas, or None if the
+            filetype is not compressed
+    """
+    return compression_map.get(filetype.rsplit('.', 1)[-1])
+
+
+def _get_buffer(tmpfile):
+    """
+    Gets the source that a reading function should consume. Files are read
+    through the connection they were opened with rather than reopened by
+    name, so that they can still be read if they are deleted in the
+    meantime (e.g. evicted from the disk cache by another process).
+
+    Args:
+        tmpfile (file-like):
+            Connection to the file, in-memory buffer or stream to be read from
+    Returns:
+        file-like: The (rewound) file or buffer
+    """
+    if tmpfile.seekable():
+        tmpfile.seek(0)
+    return tmpfile
+
+
+def _memory_map(tmpfile):
+    """
+    Memory-maps a file for zero-copy reading, so that its pages are only
+    loaded into memory as they are touched. Arrow buffers read from the
+    mapping hold a reference to it, keeping the file's contents available
+    after the file is closed (or deleted) for as long as they are in use.
+    In-memory buffers are returned as they are, as they can already be
+    read without copying.
+
+    Args:
+        tmpfile (file-like):
+            Connection to the file or in-memory buffer to be read from
+    Returns:
+        file-like: A reader over the mapped file, or the (rewound) buffer
+    """
+    if isinstance(tmpfile, pa.NativeFile) or not hasattr(tmpfile, 'fileno'):
+        return _get_buffer(tmpfile)
+    if os.fstat(tmpfile.fileno()).st_size == 0:
+        # Empty files cannot be mapped
+        return _get_buffer(tmpfile)
+    mapped = mmap.mmap(tmpfile.fileno(), 0, access=mmap.ACCESS_READ)
+    return pa.BufferReader(pa.py_buffer(mapped))
+
 ###############################################################################
 
 #######
@@ -34,12 +151,12 @@ def _read_csv(tmpfile, *args, **kwargs):
     Reads a DataFrame from a CSV
 
     Args:
-        tmpfile (tempfile.NamedTemporaryFile):
-            Connection to the file to be read from
+        tmpfile (file-like):
+            Connection to the file or in-memory buffer to be read from
     Returns:
         pd.DataFrame: The DataFrame read from CSV
     """
-    obj = pd.read_csv(tmpfile.name, *args, **kwargs)
+    obj = pd.read_csv(_get_buffer(tmpfile), *args, **kwargs)
     return obj
 
 
@@ -65,9 +182,55 @@ def _write_csv(obj, tmpfile, index=False, *args, **kwargs):
     obj.to_csv(tmpfile.name, index=index, *args, **kwargs)
 
 
+def _read_csv_chunks(tmpfile, chunk_size, names=None, *args, **kwargs):
+    """
+    Reads DataFrames from a CSV in chunks of rows
+
+    Args:
+        tmpfile (file-like):
+            Connection to the file, in-memory buffer or stream to be read from
+        chunk_size (int): The number of rows to read for each chunk
+        names (list<str>, optional): Column names to apply to the chunks
+    Returns:
+        iterable<pd.DataFrame>: The chunks read from CSV
+    """
+    return _read_csv(tmpfile, names=names, chunksize=chunk_size,
+                     *args, **kwargs)
+
+
+def _write_csv_chunks(dfs, f, index=False, header=True, *args, **kwargs):
+    """
+    Saves DataFrames to a single CSV, one chunk at a time
+
+    Args:
+        dfs (iterable<pd.DataFrame>): The DataFrames to be written to CSV
+        f (file-like): Binary stream to be written to
+        index (bool, default=False): Whether to include the DataFrame index
+            in the CSV, used to establish default behavior.
+            Can be overridden in args/kwargs.
+        header (bool, default=True):
+            Whether to write column names, before the first chunk only
+
+    Raises:
+        TypeError: if any chunk is not a DataFrame
+    """
+    text_f = io.TextIOWrapper(f, encoding='utf-8', newline='',
+                              write_through=True)
+    for chunk_number, df in enumerate(dfs):
+        if not isinstance(df, pd.DataFrame):
+            raise TypeError('Storage format of \'csv\' can only be used with '
+                            'DataFrames.')
+        df.to_csv(text_f, index=index, header=header and chunk_number == 0,
+                  *args, **kwargs)
+    # Flushes without closing 'f'
+    text_f.detach()
+
+
 csv = {
     'read': _read_csv,
-    'write': _write_csv
+    'read_chunks': _read_csv_chunks,
+    'write': _write_csv,
+    'write_chunks': _write_csv_chunks
 }
 
 ##############################################################################
@@ -83,8 +246,8 @@ def _read_psv(tmpfile, *args, **kwargs):
     Wrapper around _write_csv with different 'sep' character.
 
     Args:
-        tmpfile (tempfile.NamedTemporaryFile):
-            Connection to the file to be read from
+        tmpfile (file-like):
+            Connection to the file or in-memory buffer to be read from
     Returns:
         pd.DataFrame: The DataFrame read from PSV
     """
@@ -110,9 +273,43 @@ def _write_psv(obj, tmpfile, *args, **kwargs):
     _write_csv(obj, tmpfile, sep='|', *args, **kwargs)
 
 
+def _read_psv_chunks(tmpfile, chunk_size, names=None, *args, **kwargs):
+    """
+    Reads DataFrames from a PSV in chunks of rows.
+    Wrapper around _read_csv_chunks with different 'sep' character.
+
+    Args:
+        tmpfile (file-like):
+            Connection to the file, in-memory buffer or stream to be read from
+        chunk_size (int): The number of rows to read for each chunk
+        names (list<str>, optional): Column names to apply to the chunks
+    Returns:
+        iterable<pd.DataFrame>: The chunks read from PSV
+    """
+    return _read_csv_chunks(tmpfile, chunk_size, names=names, sep='|',
+                            *args, **kwargs)
+
+
+def _write_psv_chunks(dfs, f, *args, **kwargs):
+    """
+    Saves DataFrames to a single PSV, one chunk at a time.
+    Wrapper around _write_csv_chunks with different 'sep' character.
+
+    Args:
+        dfs (iterable<pd.DataFrame>): The DataFrames to be written to PSV
+        f (file-like): Binary stream to be written to
+
+    Raises:
+        TypeError: if any chunk is not a DataFrame
+    """
+    _write_csv_chunks(dfs, f, sep='|', *args, **kwargs)
+
+
 psv = {
     'read': _read_psv,
-    'write': _write_psv
+    'read_chunks': _read_psv_chunks,
+    'write': _write_psv,
+    'write_chunks': _write_psv_chunks
 }
 
 ##############################################################################
@@ -127,17 +324,12 @@ def _read_pickle(tmpfile, *args, **kwargs):
     Reads a pickled object
 
     Args:
-        tmpfile (tempfile.NamedTemporaryFile):
-            Connection to the file to be read from
+        tmpfile (file-like):
+            Connection to the file or in-memory buffer to be read from
     Returns:
         object: The unpickled object
     """
-    # Pickle reading from a tempfile if it hasn't been closed post-writing
-    # raises an 'EOFError', so we have to create a secondary opening.
-    # Will work on unix-like systems, but not Windows.
-    with open(tmpfile.name, 'rb') as f:
-        obj = pickle.load(f, *args, **kwargs)
-    return obj
+    return pickle.load(_get_buffer(tmpfile), *args, **kwargs)
 
 
 def _write_pickle(obj, tmpfile, protocol=pickle.HIGHEST_PROTOCOL,
@@ -175,21 +367,37 @@ def _read_parquet(tmpfile, *args, **kwargs):
     Reads a DataFrame from a Parquet file
 
     Args:
-        tmpfile (tempfile.NamedTemporaryFile):
-            Connection to the file to be read from
+        tmpfile (file-like):
+            Connection to the file or in-memory buffer to be read from
     Returns:
         pd.DataFrame: The DataFrame read from disk
     """
-    obj = pd.read_parquet(tmpfile.name, *args, **kwargs)
+    obj = pd.read_parquet(_get_buffer(tmpfile), *args, **kwargs)
     return obj
 
 
+def _read_parquet_arrow(tmpfile, *args, **kwargs):
+    """
+    Reads an Arrow table from a Parquet file
+
+    Args:
+        tmpfile (file-like):
+            Connection to the file or in-memory buffer to be read from
+    Returns:
+        pyarrow.Table: The table read from Parquet
+    """
+    return pa.parquet.read_table(_get_buffer(tmpfile),
+                                 *args, **kwargs)
+
+
 def _write_parquet(obj, tmpfile, index=False, *args, **kwargs):
     """
-    Saves a DataFrame to Parquet format
+    Saves a DataFrame or Arrow table to Parquet format. Arrow tables are
+    written as they are, without converting them to DataFrames.
 
     Args:
-        obj (pd.DataFrame): The DataFrame to be written to Parquet
+        obj (pd.DataFrame or pyarrow.Table):
+            The DataFrame or table to be written to Parquet
         tmpfile (tempfile.NamedTemporaryFile):
             Connection to the file to be written to
         index (bool, default=False): Whether to include the DataFrame index
@@ -197,18 +405,76 @@ def _write_parquet(obj, tmpfile, index=False, *args, **kwargs):
             Can be overridden in args/kwargs.
 
     Raises:
-        TypeError: if 'obj' is not a DataFrame
+        TypeError: if 'obj' is not a DataFrame or Arrow table
     """
+    if isinstance(obj, pa.Table):
+        pa.parquet.write_table(obj, tmpfile.name, *args, **kwargs)
+        return
     if not isinstance(obj, pd.DataFrame):
         raise TypeError('Storage format of \'pq\'/\'parquet\' can only '
-                        'be used with DataFrames.')
+                        'be used with DataFrames and Arrow tables.')
 
     obj.to_parquet(tmpfile.name, index=index, *args, **kwargs)
 
 
+def _read_parquet_chunks(tmpfile, chunk_size, names=None, *args, **kwargs):
+    """
+    Reads DataFrames from a Parquet file in chunks of rows, decoding only
+    as many row groups at a time as are needed for each chunk
+
+    Args:
+        tmpfile (file-like):
+            Connection to the file or in-memory buffer to be read from
+        chunk_size (int): The number of rows to read for each chunk
+        names (list<str>, optional): Column names to apply to the chunks
+    Yields:
+        pd.DataFrame: The chunks read from Parquet
+    """
+    parquet_file = pa.parquet.ParquetFile(_get_buffer(tmpfile))
+    batches = parquet_file.iter_batches(batch_size=chunk_size,
+                                        *args, **kwargs)
+    return _arrow_batches_to_chunks(batches, chunk_size, names)
+
+
+def _write_parquet_chunks(dfs, f, index=False, *args, **kwargs):
+    """
+    Saves DataFrames to a single Parquet file, one chunk (row group)
+    at a time. All chunks are written with the schema of the first.
+
+    Args:
+        dfs (iterable<pd.DataFrame>): The DataFrames to be written to Parquet
+        f (file-like): Binary stream to be written to
+        index (bool, default=False): Whether to include the DataFrame index
+            in the Parquet file, used to establish default behavior.
+
+    Raises:
+        TypeError: if any chunk is not a DataFrame
+    """
+    writer = None
+    try:
+        for df in dfs:
+            if not isinstance(df, pd.DataFrame):
+                raise TypeError('Storage format of \'pq\'/\'parquet\' can '
+                                'only be used with DataFrames.')
+            if writer is None:
+                table = pa.Table.from_pandas(df, preserve_index=index)
+                writer = pa.parquet.ParquetWriter(f, table.schema,
+                                                  *args, **kwargs)
+            else:
+                table = pa.Table.from_pandas(df, schema=writer.schema,
+                                             preserve_index=index)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
 pq = {
     'read': _read_parquet,
-    'write': _write_parquet
+    'read_arrow': _read_parquet_arrow,
+    'read_chunks': _read_parquet_chunks,
+    'write': _write_parquet,
+    'write_chunks': _write_parquet_chunks
 }
 
 ##############################################################################
@@ -223,42 +489,138 @@ def _read_avro(tmpfile, remove_timezone_from_type=True, *args, **kwargs):
     Reads a DataFrame from an Avro file
 
     Args:
-        tmpfile (tempfile.NamedTemporaryFile):
-            Connection to the file to be read from
+        tmpfile (file-like):
+            Connection to the file or in-memory buffer to be read from
     Returns:
         pd.DataFrame: The DataFrame read from Avro
     """
+    df = pdx.read_avro(_get_buffer(tmpfile), *args, **kwargs)
+
+    if remove_timezone_from_type:
+        df = _remove_timezones(df)
+    return df
+
+
+def _read_avro_chunks(tmpfile, chunk_size, names=None, columns=None,
+                      remove_timezone_from_type=True, reader_schema=None):
+    """
+    Reads DataFrames from an Avro file in chunks of rows, decoding records
+    one Avro block at a time
 
-    # Pandavro reading from a tempfile if it hasn't been closed post-writing
-    # raises an 'ValueError', so we have to create a secondary opening.
-    # Will work on unix-like systems, but not Windows.
-    with open(tmpfile.name, 'rb') as f:
-        df = pdx.read_avro(f, *args, **kwargs)
+    Args:
+        tmpfile (file-like):
+            Connection to the file, in-memory buffer or stream to be read from
+        chunk_size (int): The number of rows to read for each chunk
+        names (list<str>, optional): Column names to apply to the chunks
+        columns (list<str>, optional):
+            The fields to read into the chunks, in order. Defaults to all.
+        remove_timezone_from_type (bool, default True):
+            Whether to convert timezone-aware timestamps to naive ones
+        reader_schema (dict, optional):
+            The schema to decode the records with, if different from the
+            schema they were written with
+    Yields:
+        pd.DataFrame: The chunks read from Avro
+    """
+    source = _get_buffer(tmpfile)
+    records = []
+    start_row = 0
+    for record in fastavro.reader(source, reader_schema=reader_schema):
+        records.append(record)
+        if len(records) == chunk_size:
+            yield _avro_records_to_chunk(records, start_row, names, columns,
+                                         remove_timezone_from_type)
+            start_row += len(records)
+            records = []
+    if records:
+        yield _avro_records_to_chunk(records, start_row, names, columns,
+                                     remove_timezone_from_type)
+
+
+def _avro_records_to_chunk(records, start_row, names, columns,
+                           remove_timezone_from_type):
+    """
+    Converts a chunk of Avro records to a DataFrame
 
+    Args:
+        records (list<dict>): The records in the chunk
+        start_row (int): The row number of the first record in the chunk
+        names (list<str>, optional): Column names to apply to the chunk
+        columns (list<str>, optional): The fields to keep, in order
+        remove_timezone_from_type (bool):
+            Whether to convert timezone-aware timestamps to naive ones
+    Returns:
+        pd.DataFrame: The chunk
+    """
+    df = pd.DataFrame.from_records(records, columns=columns)
+    df.index = pd.RangeIndex(start_row, start_row + len(df))
+    if names is not None:
+        df.columns = names
     if remove_timezone_from_type:
-        datetime_cols = df.columns[df.dtypes == 'datetime64[ns, UTC]']
-        df[datetime_cols] = df[datetime_cols].apply(
-            lambda x: x.dt.tz_convert(None))
+        df = _remove_timezones(df)
+    return df
+
+
+def _read_avro_arrow(tmpfile, *args, **kwargs):
+    """
+    Reads an Arrow table from an Avro file. Avro records are decoded into
+    Python objects, so this only saves building a DataFrame from them.
+    Timestamps are kept timezone-aware (in UTC).
+
+    Args:
+        tmpfile (file-like):
+            Connection to the file or in-memory buffer to be read from
+    Returns:
+        pyarrow.Table: The table read from Avro
+    """
+    reader = fastavro.reader(_get_buffer(tmpfile))
+    records = list(reader)
+    # Columns are built from the records field by field, in the order of
+    # the schema (which also keeps the columns of files without records)
+    names = [field['name'] for field in reader.writer_schema['fields']]
+    columns = {name: [record[name] for record in records] for name in names}
+    return pa.Table.from_pydict(columns, *args, **kwargs)
+
+
+def _remove_timezones(df):
+    """
+    Converts the timezone-aware (UTC) timestamp columns of a DataFrame,
+    as Avro timestamps are read, into timezone-naive ones
+
+    Args:
+        df (pd.DataFrame): The DataFrame to convert
+    Returns:
+        pd.DataFrame: The converted DataFrame
+    """
+    datetime_cols = df.columns[df.dtypes == 'datetime64[ns, UTC]']
+    df[datetime_cols] = df[datetime_cols].apply(
+        lambda x: x.dt.tz_convert(None))
     return df
 
 
 def _write_avro(df, tmpfile, times_as_micros=False, *args, **kwargs):
     """
-    Saves a DataFrame to Avro format
+    Saves a DataFrame to Avro format. Arrow tables are converted to
+    DataFrames first, as Avro is written from Python objects.
 
     Args:
-        obj (pd.DataFrame): The DataFrame to be written to Avro
+        obj (pd.DataFrame or pyarrow.Table):
+            The DataFrame or table to be written to Avro
         tmpfile (tempfile.NamedTemporaryFile):
             Connection to the file to be written to
         save_datetimes_as_millis (bool):
             Whether to save timestamps as milliseconds or
             leave it as the pandavro default microseconds
     """
+    if isinstance(df, pa.Table):
+        df = df.to_pandas()
     pdx.to_avro(tmpfile, df, times_as_micros=times_as_micros, *args, **kwargs)
 
 
 avro = {
     'read': _read_avro,
+    'read_arrow': _read_avro_arrow,
+    'read_chunks': _read_avro_chunks,
     'write': _write_avro
 }
 
@@ -274,12 +636,12 @@ def _read_json(tmpfile, *args, **kwargs):
     Reads a DataFrame from a JSON file
 
     Args:
-        tmpfile (tempfile.NamedTemporaryFile):
-            Connection to the file to be read from
+        tmpfile (file-like):
+            Connection to the file or in-memory buffer to be read from
     Returns:
         pd.DataFrame: The DataFrame read from JSON
     """
-    df = pd.read_json(tmpfile.name)
+    df = pd.read_json(_get_buffer(tmpfile), *args, **kwargs)
     return df
 
 
@@ -292,23 +654,114 @@ def _write_json(df, tmpfile, hive_format=False, *args, **kwargs):
         tmpfile (tempfile.NamedTemporaryFile):
             Connection to the file to be written to
         hive_format (bool):
-            Whether to format the JSON to be read as part of a Hive table.
-            Note: Data formatted this way will not be natively readable
-            back into a Python session.
+            Whether to format the JSON to be read as part of a Hive table,
+            with one JSON record per line (as in the 'jsonl' format). Data
+            formatted this way can be read back by passing 'lines=True'.
     """
     if hive_format:
-        # Nested open, original tmpfile behaves slightly differently
-        with open(tmpfile.name, 'w') as f:
-            for row in df.iterrows():
-                row[1].to_json(f)
-                f.write('\n')
+        _write_jsonl(df, tmpfile, *args, **kwargs)
     else:
-        df.to_json(tmpfile.name)
+        df.to_json(tmpfile.name, *args, **kwargs)
+
+
+def _write_json_chunks(dfs, f, *args, **kwargs):
+    """
+    Saves DataFrames to a single JSON file, one chunk at a time.
+    Chunks are written with one JSON record per line, as with
+    'hive_format' in _write_json.
+
+    Args:
+        dfs (iterable<pd.DataFrame>): The DataFrames to be written to JSON
+        f (file-like): Binary stream to be written to
+    """
+    for df in dfs:
+        lines = df.to_json(orient='records', lines=True, *args, **kwargs)
+        if lines and not lines.endswith('\n'):
+            lines += '\n'
+        f.write(lines.encode('utf-8'))
 
 
 json = {
     'read': _read_json,
-    'write': _write_json
+    'write': _write_json,
+    'write_chunks': _write_json_chunks
+}
+
+##############################################################################
+
+##############
+# JSON lines #
+##############
+
+
+def _read_jsonl(tmpfile, *args, **kwargs):
+    """
+    Reads a DataFrame from a JSON lines file, with one JSON record per line.
+    Columns take the types of their JSON values, rather than being inferred
+    by pandas (which would e.g. turn floats that are all whole numbers into
+    integers), so that types round-trip and are the same for every chunk.
+    Pass 'dtype' to override this.
+
+    Args:
+        tmpfile (file-like):
+            Connection to the file or in-memory buffer to be read from
+    Returns:
+        pd.DataFrame: The DataFrame read from JSON lines
+    """
+    kwargs.setdefault('dtype', False)
+    return _read_json(tmpfile, lines=True, *args, **kwargs)
+
+
+def _write_jsonl(df, tmpfile, *args, **kwargs):
+    """
+    Saves a DataFrame to a JSON lines file, with one JSON record per line.
+    The index is not written.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to be written to JSON lines
+        tmpfile (tempfile.NamedTemporaryFile):
+            Connection to the file to be written to
+
+    Raises:
+        TypeError: if 'df' is not a DataFrame
+    """
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError('Storage format of \'jsonl\' can only be used with '
+                        'DataFrames.')
+
+    df.to_json(tmpfile.name, orient='records', lines=True, *args, **kwargs)
+
+
+def _read_jsonl_chunks(tmpfile, chunk_size, names=None, *args, **kwargs):
+    """
+    Reads DataFrames from a JSON lines file in chunks of rows, parsing only
+    as many lines at a time as are needed for each chunk
+
+    Args:
+        tmpfile (file-like):
+            Connection to the file, in-memory buffer or stream to be read from
+        chunk_size (int): The number of rows to read for each chunk
+        names (list<str>, optional): Column names to apply to the chunks
+    Yields:
+        pd.DataFrame: The chunks read from JSON lines, with row numbers
+            continuing between chunks
+    """
+    reader = _read_jsonl(tmpfile, chunksize=chunk_size, *args, **kwargs)
+    # Closed explicitly, as readers are only context managers in pandas 1.2+
+    try:
+        for df in reader:
+            if names is not None:
+                df.columns = names
+            yield df
+    finally:
+        reader.close()
+
+
+jsonl = {
+    'read': _read_jsonl,
+    'read_chunks': _read_jsonl_chunks,
+    'write': _write_jsonl,
+    'write_chunks': _write_json_chunks
 }
 
 ##############################################################################
@@ -318,29 +771,64 @@ json = {
 ###########
 
 
-def _read_feather(tmpfile, *args, **kwargs):
+def _read_feather(tmpfile, memory_map=False, *args, **kwargs):
     """
     Reads a DataFrame from a feather file
 
     Args:
-        tmpfile (tempfile.NamedTemporaryFile):
-            Connection to the file to be read from
+        tmpfile (file-like):
+            Connection to the file or in-memory buffer to be read from
+        memory_map (bool, default False):
+            Whether to memory-map the file rather than read it into memory.
+            Numeric columns without nulls of uncompressed files are then
+            backed by the mapped file, as read-only arrays.
     Returns:
         pd.DataFrame: The DataFrame read from feather
     """
-    df = pd.read_feather(tmpfile.name)
+    if memory_map:
+        table = _read_feather_arrow(tmpfile, memory_map, *args, **kwargs)
+        # Split blocks let columns refer to their Arrow buffers directly,
+        # rather than being consolidated into a copy
+        return table.to_pandas(split_blocks=True)
+    df = pd.read_feather(_get_buffer(tmpfile), *args, **kwargs)
     return df
 
 
+def _read_feather_arrow(tmpfile, memory_map=False, *args, **kwargs):
+    """
+    Reads an Arrow table from a feather file. Uncompressed columns read
+    from an in-memory buffer or a memory-mapped file refer to it rather than
+    being copied.
+
+    Args:
+        tmpfile (file-like):
+            Connection to the file or in-memory buffer to be read from
+        memory_map (bool, default False):
+            Whether to memory-map the file rather than read it into memory
+    Returns:
+        pyarrow.Table: The table read from feather
+    """
+    if memory_map:
+        source = _memory_map(tmpfile)
+    else:
+        source = _get_buffer(tmpfile)
+    return pa.feather.read_table(source, *args, **kwargs)
+
+
 def _write_feather(df, tmpfile, *args, **kwargs):
     """
-    Saves a DataFrame to feather format
+    Saves a DataFrame or Arrow table to feather format. Arrow tables are
+    written as they are, without converting them to DataFrames.
 
     Args:
-        obj (pd.DataFrame): The DataFrame to be written to Avro
+        obj (pd.DataFrame or pyarrow.Table):
+            The DataFrame or table to be written to feather
         tmpfile (tempfile.NamedTemporaryFile):
             Connection to the file to be written to
     """
+    if isinstance(df, pa.Table):
+        pa.feather.write_feather(df, tmpfile.name, *args, **kwargs)
+        return
     if any(df.dtypes == 'object'):
         logging.info(
             'WARNING: Columns of dtype "object" detected in dataframe '
@@ -349,14 +837,81 @@ def _write_feather(df, tmpfile, *args, **kwargs):
             'and dictionaries, and will produce unexpected results. '
             'If this column merely contains strings, then this message '
             'can be ignored.')
-    df.to_feather(tmpfile.name)
+    df.to_feather(tmpfile.name, *args, **kwargs)
+
+
+def _read_feather_chunks(tmpfile, chunk_size, names=None, *args, **kwargs):
+    """
+    Reads DataFrames from a feather file in chunks of rows, decoding only
+    as many record batches at a time as are needed for each chunk
+
+    Args:
+        tmpfile (file-like):
+            Connection to the file or in-memory buffer to be read from
+        chunk_size (int): The number of rows to read for each chunk
+        names (list<str>, optional): Column names to apply to the chunks
+    Yields:
+        pd.DataFrame: The chunks read from feather
+    """
+    # Memory-mapped so that only the batches being read are paged in
+    reader = pa.ipc.open_file(_memory_map(tmpfile))
+    batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    return _arrow_batches_to_chunks(batches, chunk_size, names)
 
 
 feather = {
     'read': _read_feather,
+    'read_arrow': _read_feather_arrow,
+    'read_chunks': _read_feather_chunks,
     'write': _write_feather
 }
 
+##############################################################################
+
+#########
+# Arrow #
+#########
+
+
+def _arrow_batches_to_chunks(batches, chunk_size, names=None):
+    """
+    Regroups Arrow record batches of any size into DataFrames of
+    'chunk_size' rows, holding no more than one chunk's worth of
+    batches in memory at a time
+
+    Args:
+        batches (iterable<pyarrow.RecordBatch>): The record batches
+        chunk_size (int): The number of rows in each chunk
+        names (list<str>, optional): Column names to apply to the chunks
+    Yields:
+        pd.DataFrame: The chunks, with row numbers continuing between chunks
+    """
+    pending = []
+    pending_rows = 0
+    start_row = 0
+
+    def to_chunk(chunk_batches):
+        df = pa.Table.from_batches(chunk_batches).to_pandas()
+        df.index = pd.RangeIndex(start_row, start_row + len(df))
+        if names is not None:
+            df.columns = names
+        return df
+
+    for batch in batches:
+        while batch.num_rows:
+            needed_rows = chunk_size - pending_rows
+            pending.append(batch.slice(0, needed_rows))
+            pending_rows += pending[-1].num_rows
+            batch = batch.slice(needed_rows)
+            if pending_rows == chunk_size:
+                yield to_chunk(pending)
+                start_row += pending_rows
+                pending = []
+                pending_rows = 0
+    if pending:
+        yield to_chunk(pending)
+
+
 ##############################################################################
 
 format_fn_map = {
@@ -373,8 +928,28 @@ format_fn_map = {
    'psv.xz': psv,
    'feather': feather,
    'json': json,
+   'jsonl': jsonl,
+   'jsonl.gz': jsonl,
+   'jsonl.bz2': jsonl,
    'pickle': pkl,
    'pkl': pkl,
    'pq': pq,
    'parquet': pq
 }
+
+# Formats that can be read in chunks from a stream, without random access
+stream_formats = [csv, psv, avro, jsonl]
+
+# Formats that only read the parts of a file needed for the requested columns
+# and rows, e.g. Parquet's footer, column chunks and matching row groups
+ranged_formats = [pq]
+
+# Compressions that can be decompressed while streaming an object
+stream_compressions = ['gzip', 'bz2', 'xz']
+
+compression_map = {
+    'gz': 'gzip',
+    'zip': 'zip',
+    'bz2': 'bz2',
+    'xz': 'xz'
+}
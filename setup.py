@@ -80,9 +80,10 @@ setup(
     description=about['__description__'],
     long_description=long_description,
     long_description_content_type='text/markdown',
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     install_requires=[
         'boto3>=1.10.0',
+        'fastavro>=1.4.0',
         'pandas>=0.25.3',
         'pandavro>=1.6',
         'pyarrow>=3.0.0'
@@ -8,6 +8,8 @@ import pandavro as pdx
 import pickle
 import pytest
 
+from rivet import set_client
+
 
 @pytest.fixture(autouse=True, scope='session')
 def aws_credentials():
@@ -57,6 +59,9 @@ def test_df_keys():
         'psv.xz': ['df.psv.xz'],
         'feather': ['df.feather'],
         'json': ['df.json'],
+        'jsonl': ['df.jsonl'],
+        'jsonl.gz': ['df.jsonl.gz'],
+        'jsonl.bz2': ['df.jsonl.bz2'],
         'pkl': ['df.pkl', 'df.pickle'],
         'pq': ['df.pq', 'df.parquet']
     }
@@ -79,7 +84,9 @@ def test_df():
 def mock_s3_client():
     """Mocks all s3 connections in any test or fixture that includes it"""
     with mock_s3():
+        set_client(None)
         yield
+    set_client(None)
 
 
 @pytest.fixture
@@ -180,6 +187,12 @@ def setup_bucket_w_dfs(mock_s3_client, test_bucket, test_df, test_df_keys):
             test_df.to_json(tmpfile.name)
             s3.upload_file(tmpfile.name, test_bucket, key)
 
+    for format in ['jsonl', 'jsonl.gz', 'jsonl.bz2']:
+        for key in test_df_keys[format]:
+            with NamedTemporaryFile(suffix='.' + format) as tmpfile:
+                test_df.to_json(tmpfile.name, orient='records', lines=True)
+                s3.upload_file(tmpfile.name, test_bucket, key)
+
     for key in test_df_keys['pkl']:
         with NamedTemporaryFile() as tmpfile:
             pickle.dump(test_df, tmpfile, protocol=pickle.HIGHEST_PROTOCOL)
@@ -0,0 +1,99 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+from rivet import aio, get_option, set_option
+
+
+def test_aio_read_write(setup_bucket_wo_contents, test_bucket, test_df):
+    """
+    Tests that many objects can be written and read concurrently from a
+    single event loop
+    """
+    keys = ['df_{}.csv'.format(i) for i in range(50)]
+
+    async def write_and_read():
+        await asyncio.gather(*[aio.write(test_df, key, test_bucket)
+                               for key in keys])
+        return await asyncio.gather(*[aio.read(key, test_bucket)
+                                      for key in keys])
+
+    dfs = asyncio.run(write_and_read())
+    assert len(dfs) == len(keys)
+    for df in dfs:
+        assert df.equals(test_df)
+
+
+def test_aio_concurrency_limit(setup_bucket_w_dfs, test_bucket, monkeypatch):
+    """
+    Tests that the number of operations in flight at once is capped,
+    and that a provided executor is used
+    """
+    from rivet import s3_list
+
+    exists = s3_list.exists
+    in_flight = []
+    max_in_flight = []
+
+    def tracking_exists(*args, **kwargs):
+        in_flight.append(None)
+        max_in_flight.append(len(in_flight))
+        try:
+            return exists(*args, **kwargs)
+        finally:
+            in_flight.pop()
+    monkeypatch.setattr(s3_list, 'exists', tracking_exists)
+
+    max_concurrency = get_option('aio_max_concurrency')
+    executor = ThreadPoolExecutor(max_workers=20)
+    set_option('aio_max_concurrency', 3)
+    aio.set_executor(executor)
+    try:
+        async def check():
+            return await asyncio.gather(*[aio.exists('df.csv', test_bucket)
+                                          for _ in range(30)])
+        assert asyncio.run(check()) == [True] * 30
+    finally:
+        set_option('aio_max_concurrency', max_concurrency)
+        aio.set_executor(None)
+        executor.shutdown()
+    assert max(max_in_flight) <= 3
+
+
+def test_aio_iteration(setup_bucket_w_dfs, test_bucket, test_df):
+    """
+    Tests that chunked reads and listings can be iterated over with
+    'async for', including when stopping early
+    """
+    async def iterate():
+        chunks = [chunk async for chunk in aio.read_df_in_chunks(
+            'df.csv', test_bucket, chunk_size=2)]
+        keys = [obj['Key'] async for obj in aio.iter_objects(
+            bucket=test_bucket)]
+        async for chunk in aio.read_df_in_chunks('df.csv', test_bucket,
+                                                 chunk_size=1, stream=True):
+            break
+        return chunks, keys, chunk
+
+    chunks, keys, chunk = asyncio.run(iterate())
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert keys == sorted(
+        obj['Key'] for obj in
+        boto3.client('s3').list_objects_v2(Bucket=test_bucket)['Contents'])
+    assert chunk.equals(test_df.head(1))
+
+
+def test_aio_list_delete_copy(setup_bucket_w_dfs, test_bucket):
+    """Tests the asynchronous listing, copying and deletion of objects"""
+    async def copy_and_delete():
+        await aio.copy('df.csv', 'copied/df.csv', test_bucket, test_bucket)
+        copied = await aio.list_objects('copied/', test_bucket)
+        await aio.delete('copied/', test_bucket, recursive=True)
+        exists = await aio.exists_many(['copied/df.csv', 'df.csv'],
+                                       test_bucket)
+        return copied, exists
+
+    copied, exists = asyncio.run(copy_and_delete())
+    assert copied == ['df.csv']
+    assert exists == {'copied/df.csv': False, 'df.csv': True}
@@ -0,0 +1,40 @@
+import json
+
+from benchmarks.__main__ import main
+
+
+def test_benchmarks_run(tmp_path):
+    """
+    Tests that every benchmark suite runs against the in-process stand-in
+    for S3 and records its results
+    """
+    output = str(tmp_path / 'results.json')
+    assert main(['run', '--rows', '10', '--filetypes', 'csv', 'parquet',
+                 '--list-sizes', '5', '--bulk-objects', '3',
+                 '--repeat', '1', '--output', output]) == 0
+
+    with open(output) as f:
+        results = json.load(f)
+    assert results['metadata']['repeat'] == 1
+    benchmarks = {(result['suite'], result['benchmark'])
+                  for result in results['results']}
+    assert ('formats', 'read') in benchmarks
+    assert ('listing', 'list_objects_parallel') in benchmarks
+    assert ('bulk', 'delete_recursive') in benchmarks
+
+
+def test_benchmarks_compare(tmp_path):
+    """Tests that comparing runs fails only on regressions"""
+    def write_run(name, median):
+        path = str(tmp_path / name)
+        with open(path, 'w') as f:
+            json.dump({'metadata': {}, 'results': [{
+                'suite': 'listing', 'benchmark': 'list_objects',
+                'params': {'keys': 10}, 'median': median}]}, f)
+        return path
+
+    baseline = write_run('baseline.json', 1.0)
+    assert main(['compare', baseline, write_run('same.json', 1.05)]) == 0
+    assert main(['compare', baseline, write_run('slower.json', 1.5)]) == 1
+    assert main(['compare', baseline, write_run('slower.json', 1.5),
+                 '--threshold', '0.6']) == 0
@@ -0,0 +1,173 @@
+import os
+import time
+
+import boto3
+import pytest
+
+from rivet import (download_file, get_option, read, read_df_in_chunks,
+                   s3_read, set_option)
+from rivet.s3_cache import (PARTIAL_PREFIX, PARTIAL_SUFFIX, evict,
+                            open_cached)
+from rivet.s3_client import get_s3_client
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    """Enables the local disk cache in a temporary directory"""
+    cache_dir = str(tmp_path / 'cache')
+    max_size = get_option('cache_max_size')
+    set_option('cache_dir', cache_dir)
+    yield cache_dir
+    set_option('cache_dir', None)
+    set_option('cache_max_size', max_size)
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    """Records the keys downloaded with the shared client"""
+    client = get_s3_client()
+    get_object = client.get_object
+    downloaded = []
+
+    def recording_get_object(**kwargs):
+        if kwargs.get('Range', 'bytes=0-').startswith('bytes=0-'):
+            downloaded.append(kwargs['Key'])
+        return get_object(**kwargs)
+    monkeypatch.setattr(client, 'get_object', recording_get_object)
+    return downloaded
+
+
+def test_read_cached(setup_bucket_w_dfs, test_bucket, test_df, cache_dir,
+                     downloads):
+    """
+    Tests that objects are only downloaded again once they have changed,
+    and that cached copies are read correctly
+    """
+    for _ in range(2):
+        assert read('df.csv', test_bucket).equals(test_df)
+        assert read('df.pq', test_bucket).equals(test_df)
+        chunks = list(read_df_in_chunks('df.csv.gz', test_bucket,
+                                        chunk_size=2))
+        assert len(chunks) == 2
+    assert downloads == ['df.csv', 'df.pq', 'df.csv.gz']
+    assert len(os.listdir(cache_dir)) == 3
+
+    s3 = boto3.client('s3')
+    changed_df = test_df.head(1)
+    s3.put_object(Bucket=test_bucket, Key='df.csv',
+                  Body=changed_df.to_csv(index=False))
+    assert read('df.csv', test_bucket).equals(changed_df)
+    assert downloads[-1] == 'df.csv'
+    assert len(downloads) == 4
+
+
+def test_download_file_cached(setup_bucket_w_dfs, test_bucket, cache_dir,
+                              downloads, tmp_path):
+    """Tests that rv.download_file copies objects out of the cache"""
+    s3 = boto3.client('s3')
+    contents = s3.get_object(Bucket=test_bucket, Key='df.pkl')['Body'].read()
+
+    for i in range(2):
+        local_file_path = str(tmp_path / 'df_{}.pkl'.format(i))
+        download_file('df.pkl', test_bucket, local_file_path)
+        with open(local_file_path, 'rb') as f:
+            assert f.read() == contents
+    assert downloads == ['df.pkl']
+
+
+def test_cache_eviction(setup_bucket_w_dfs, test_bucket, test_df_keys,
+                        cache_dir, downloads):
+    """
+    Tests that the least recently used copies are evicted once the cache
+    grows beyond its maximum size
+    """
+    s3 = boto3.client('s3')
+    sizes = {key: s3.head_object(Bucket=test_bucket, Key=key)['ContentLength']
+             for key in ['df.csv', 'df.psv', 'df.json']}
+    set_option('cache_max_size', sizes['df.csv'] + sizes['df.json'])
+
+    read('df.csv', test_bucket)
+    read('df.psv', test_bucket)
+    # Makes 'df.csv' more recently used than 'df.psv'
+    time.sleep(0.01)
+    read('df.csv', test_bucket)
+    read('df.json', test_bucket)
+    assert len(os.listdir(cache_dir)) == 2
+
+    read('df.csv', test_bucket)
+    read('df.psv', test_bucket)
+    assert downloads == ['df.csv', 'df.psv', 'df.json', 'df.psv']
+
+
+def test_read_cached_evicted_while_open(setup_bucket_w_dfs, test_bucket,
+                                        test_df, test_df_keys, cache_dir,
+                                        monkeypatch):
+    """
+    Tests that cached copies are read through the connection they were
+    opened with, so that another process evicting them before they are
+    read does not fail the read
+    """
+    def open_then_evict(*args, **kwargs):
+        cached = open_cached(*args, **kwargs)
+        evict(max_size=0)
+        return cached
+
+    for keys in test_df_keys.values():
+        for key in keys:
+            with monkeypatch.context() as patch:
+                read(key, test_bucket)  # Downloads into the cache
+                patch.setattr(s3_read, 'open_cached', open_then_evict)
+                assert read(key, test_bucket).equals(test_df)
+                assert not os.listdir(cache_dir)
+
+
+def test_read_cached_memory_mapped(setup_bucket_w_dfs, test_bucket,
+                                   test_df, cache_dir):
+    """
+    Tests that feather files memory-mapped from the cache stay readable
+    after their copies are evicted
+    """
+    df = read('df.feather', test_bucket, memory_map=True)
+    evict(max_size=0)
+    assert not os.listdir(cache_dir)
+    assert df.equals(test_df)
+
+
+def test_cache_eviction_stale_partial(cache_dir):
+    """
+    Tests that partial downloads are only removed once they are too old to
+    still be in progress
+    """
+    os.makedirs(cache_dir)
+    partials = [os.path.join(cache_dir, PARTIAL_PREFIX + name + PARTIAL_SUFFIX)
+                for name in ['stale', 'fresh']]
+    for partial in partials:
+        open(partial, 'wb').close()
+    stale_time = time.time() - 2 * 24 * 60 * 60
+    os.utime(partials[0], (stale_time, stale_time))
+
+    evict(cache_dir, max_size=0)
+    assert os.listdir(cache_dir) == [PARTIAL_PREFIX + 'fresh' + PARTIAL_SUFFIX]
+
+
+def test_cache_eviction_foreign_files(setup_bucket_w_dfs, test_bucket,
+                                      cache_dir):
+    """
+    Tests that files and directories in the cache directory that rivet did
+    not create are neither counted nor removed when evicting
+    """
+    os.makedirs(os.path.join(cache_dir, 'subdir'))
+    foreign = ['precious.txt', 'other' + PARTIAL_SUFFIX]
+    stale_time = time.time() - 2 * 24 * 60 * 60
+    for name in foreign:
+        with open(os.path.join(cache_dir, name), 'wb') as f:
+            f.write(b'x' * 1024)
+        os.utime(os.path.join(cache_dir, name), (stale_time, stale_time))
+    set_option('cache_max_size', 1)
+
+    read('df.csv', test_bucket)
+    read('df.psv', test_bucket)
+    # Only the copy just downloaded is kept of rivet's own files
+    remaining = set(os.listdir(cache_dir)) - set(foreign + ['subdir'])
+    assert len(remaining) == 1
+    assert len(os.listdir(cache_dir)) == len(foreign) + 2
@@ -0,0 +1,39 @@
+import boto3
+
+from rivet import get_option, set_client, set_option
+from rivet.s3_client import get_s3_client
+
+
+def test_client_is_reused(mock_s3_client):
+    """Tests that the same S3 client is shared between calls"""
+    assert get_s3_client() is get_s3_client()
+
+
+def test_client_recreated_on_option_change(mock_s3_client):
+    """
+    Tests that changing the size of the connection pool results in
+    a new client being created with the requested pool size
+    """
+    max_pool_connections = get_option('max_pool_connections')
+    client = get_s3_client()
+    try:
+        set_option('max_pool_connections', max_pool_connections + 1)
+        new_client = get_s3_client()
+        assert new_client is not client
+        assert (new_client.meta.config.max_pool_connections
+                == max_pool_connections + 1)
+    finally:
+        set_option('max_pool_connections', max_pool_connections)
+
+
+def test_set_client(mock_s3_client):
+    """
+    Tests that a user-provided client is used until it is unset,
+    at which point a pooled client is used again
+    """
+    user_client = boto3.client('s3')
+    set_client(user_client)
+    assert get_s3_client() is user_client
+
+    set_client(None)
+    assert get_s3_client() is not user_client
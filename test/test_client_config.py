@@ -0,0 +1,38 @@
+import pytest
+from boto3.s3.transfer import TransferConfig
+
+from rivet import get_option, set_option
+from rivet.s3_client_config import get_transfer_config
+
+
+def test_transfer_config_from_options():
+    """
+    Tests that transfer settings are taken from the session-level options
+    """
+    max_concurrency = get_option('max_concurrency')
+    try:
+        set_option('max_concurrency', 32)
+        config = get_transfer_config()
+        assert config.max_request_concurrency == 32
+        assert config.multipart_threshold == get_option('multipart_threshold')
+    finally:
+        set_option('max_concurrency', max_concurrency)
+
+
+def test_transfer_config_overrides():
+    """
+    Tests that per-call overrides take precedence over session-level
+    options, and that TransferConfigs are used as-is
+    """
+    config = get_transfer_config({'multipart_chunksize': 64 * 1024 ** 2})
+    assert config.multipart_chunksize == 64 * 1024 ** 2
+    assert config.max_request_concurrency == get_option('max_concurrency')
+
+    user_config = TransferConfig(use_threads=False)
+    assert get_transfer_config(user_config) is user_config
+
+
+def test_transfer_config_invalid_option():
+    """Tests that unknown transfer options are refused"""
+    with pytest.raises(ValueError, match='not a valid transfer option'):
+        get_transfer_config({'max_bandwidth_of_the_universe': 1})
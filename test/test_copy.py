@@ -1,9 +1,11 @@
+import os
 from tempfile import NamedTemporaryFile
 
 import boto3
 import pandas as pd
+import pytest
 
-from rivet import copy
+from rivet import copy, copy_prefix
 
 
 def test_copy(setup_bucket_w_dfs, test_bucket, test_df_keys):
@@ -31,3 +33,85 @@ def test_copy(setup_bucket_w_dfs, test_bucket, test_df_keys):
         dest_df = pd.read_csv(tmpfile.name)
 
     assert source_df.equals(dest_df)
+
+
+def test_copy_recursive(setup_bucket_wo_contents, test_bucket):
+    """
+    Tests that a recursive copy copies every object under a prefix to
+    another bucket, with their metadata, and reports its throughput
+    """
+    s3 = boto3.client('s3')
+    s3.create_bucket(Bucket='dest_bucket')
+    keys = ['test_key_{}.csv'.format(i) for i in range(25)]
+    for key in keys:
+        s3.put_object(Bucket=test_bucket, Key='source/' + key, Body=key,
+                      ContentType='text/csv', Metadata={'origin': key})
+    s3.put_object(Bucket=test_bucket, Key='other/test_key.csv', Body='')
+
+    result = copy('source/', 'dest/', test_bucket, 'dest_bucket',
+                  recursive=True, max_workers=4)
+    assert sorted(result.copied) == sorted('dest/' + key for key in keys)
+    assert result.errors == []
+    assert result.bytes_copied == sum(len(key) for key in keys)
+    assert result.objects_per_second > 0
+
+    for key in keys:
+        response = s3.get_object(Bucket='dest_bucket', Key='dest/' + key)
+        assert response['Body'].read() == key.encode()
+        assert response['ContentType'] == 'text/csv'
+        assert response['Metadata'] == {'origin': key}
+
+
+def test_copy_prefix_in_parts(setup_bucket_wo_contents, test_bucket):
+    """
+    Tests that objects above the multipart threshold are copied in parts,
+    and that metadata is only preserved when asked to be
+    """
+    s3 = boto3.client('s3')
+    body = os.urandom(12 * 1024 ** 2)
+    s3.put_object(Bucket=test_bucket, Key='source/big.bin', Body=body,
+                  ContentType='application/octet-stream',
+                  Metadata={'origin': 'test'})
+    s3.put_object(Bucket=test_bucket, Key='source/small.bin', Body=b'abc',
+                  Metadata={'origin': 'test'})
+
+    transfer_config = {'multipart_threshold': 5 * 1024 ** 2,
+                       'multipart_chunksize': 5 * 1024 ** 2}
+    for preserve_metadata in [True, False]:
+        result = copy_prefix('source/', 'dest/', test_bucket, test_bucket,
+                             transfer_config=transfer_config,
+                             preserve_metadata=preserve_metadata)
+        assert sorted(result.copied) == ['dest/big.bin', 'dest/small.bin']
+
+        response = s3.get_object(Bucket=test_bucket, Key='dest/big.bin')
+        assert response['Body'].read() == body
+        assert response['ETag'].endswith('-3"')
+        expected_metadata = {'origin': 'test'} if preserve_metadata else {}
+        assert response['Metadata'] == expected_metadata
+        response = s3.head_object(Bucket=test_bucket, Key='dest/small.bin')
+        assert response['Metadata'] == expected_metadata
+
+
+def test_copy_prefix_clean_dest(setup_bucket_wo_contents, test_bucket):
+    """
+    Tests that destination keys are held to rivet's path conventions, with
+    objects whose keys would break them reported as errors
+    """
+    s3 = boto3.client('s3')
+    s3.put_object(Bucket=test_bucket, Key='source/test_key.csv', Body='')
+    s3.put_object(Bucket=test_bucket, Key='source/v1.0/test_key.csv',
+                  Body='')
+
+    for dest_prefix in ['dest//', '../dest/', 'dest.v1/']:
+        with pytest.raises(ValueError):
+            copy_prefix('source/', dest_prefix, test_bucket, test_bucket)
+        with pytest.raises(ValueError):
+            copy('source/', dest_prefix, test_bucket, test_bucket,
+                 recursive=True)
+
+    result = copy_prefix('source/', 'dest/', test_bucket, test_bucket)
+    assert result.copied == ['dest/test_key.csv']
+    assert [error['Key'] for error in result.errors] == [
+        'source/v1.0/test_key.csv']
+    assert 'Contents' not in s3.list_objects_v2(Bucket=test_bucket,
+                                                Prefix='dest/v1.0/')
@@ -1,6 +1,8 @@
+import boto3
 import pytest
 
 from rivet import delete, list_objects
+from rivet.s3_client import get_s3_client
 
 
 def test_delete(setup_bucket_w_contents, test_bucket, test_keys):
@@ -36,3 +38,58 @@ def test_delete_recursive(setup_bucket_w_contents, test_bucket):
 def test_bucket_nuke_protection():
     with pytest.raises(ValueError, match='seems unsafe'):
         delete('', '')
+
+
+def test_delete_recursive_many_objects(setup_bucket_wo_contents, test_bucket):
+    """
+    Tests that recursive deletion handles more objects than fit in a single
+    multi-object delete request, and reports every deleted key
+    """
+    s3 = boto3.client('s3')
+    keys = ['folder0/test_key_{}.csv'.format(i) for i in range(2500)]
+    for key in keys:
+        s3.put_object(Bucket=test_bucket, Key=key, Body='')
+    s3.put_object(Bucket=test_bucket, Key='folder1/test_key.csv', Body='')
+
+    result = delete('folder0/', test_bucket, recursive=True, max_workers=2)
+
+    assert sorted(result.deleted) == sorted(keys)
+    assert result.errors == []
+    assert list_objects('', test_bucket, include_prefix=True,
+                        recursive=True) == ['folder1/test_key.csv']
+
+
+def test_delete_ambiguous_path(setup_bucket_w_contents, test_bucket):
+    """
+    Tests that a non-recursive delete refuses to delete anything if
+    multiple objects match the provided path
+    """
+    keys = list_objects('', test_bucket, include_prefix=True, recursive=True)
+    with pytest.raises(KeyError, match='Multiple matching objects'):
+        delete('folder1/', test_bucket)
+    assert list_objects('', test_bucket, include_prefix=True,
+                        recursive=True) == keys
+
+
+def test_delete_collects_errors(setup_bucket_w_contents, test_bucket,
+                                monkeypatch):
+    """
+    Tests that keys that fail to delete are reported in the result
+    rather than interrupting the deletion of other keys
+    """
+    s3 = get_s3_client()
+    delete_objects = s3.delete_objects
+
+    def delete_objects_w_failure(Bucket, Delete):
+        failed, *others = Delete['Objects']
+        delete_objects(Bucket=Bucket, Delete={'Objects': others})
+        return {'Errors': [{'Key': failed['Key'], 'Code': 'AccessDenied',
+                            'Message': 'Access Denied'}]}
+    monkeypatch.setattr(s3, 'delete_objects', delete_objects_w_failure)
+
+    result = delete('folder1/', test_bucket, recursive=True)
+
+    assert len(result.errors) == 1
+    assert result.errors[0]['Code'] == 'AccessDenied'
+    assert len(result.deleted) == 1
+    assert result.errors[0]['Key'] not in result.deleted
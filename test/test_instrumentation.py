@@ -0,0 +1,120 @@
+import pytest
+
+from rivet import (instrumentation, read, read_df_in_chunks, read_many,
+                   write)
+
+
+@pytest.fixture
+def events():
+    """Records the events of instrumented operations"""
+    recorded = []
+    instrumentation.add_callback(recorded.append)
+    yield recorded
+    instrumentation.remove_callback(recorded.append)
+
+
+def test_read_event(setup_bucket_w_dfs, test_bucket, events):
+    """
+    Tests that reading reports the time spent downloading and parsing,
+    along with the requests made and bytes downloaded
+    """
+    read('df.csv', test_bucket)
+
+    event, = events
+    assert event.operation == 'read'
+    assert (event.bucket, event.path) == (test_bucket, 'df.csv')
+    assert event.filetype == 'csv'
+    assert set(event.phases) == {'download', 'deserialize'}
+    assert event.seconds >= sum(event.phases.values())
+    assert event.object_size > 0
+    assert event.bytes_transferred == event.object_size
+    assert event.api_calls == 1
+    assert event.retries == 0
+    assert event.error is None
+
+
+def test_write_event(setup_bucket_wo_contents, test_bucket, test_df,
+                     events):
+    """Tests that writing reports the time spent serializing and uploading"""
+    write(test_df, 'df.pq', test_bucket)
+
+    event, = events
+    assert event.operation == 'write'
+    assert event.filetype == 'pq'
+    assert set(event.phases) == {'serialize', 'upload'}
+    assert event.bytes_transferred == event.object_size > 0
+    assert event.api_calls == 1
+
+
+def test_nested_operations(setup_bucket_w_dfs, test_bucket, events):
+    """
+    Tests that operations made by other operations, in their worker
+    threads, count towards the outer operation
+    """
+    read_many(['df.csv', 'df.pq', 'df.avro'], test_bucket)
+    read_many('df.pq', test_bucket)
+
+    list_event, prefix_event = events
+    assert [event.operation for event in events] == ['read_many'] * 2
+    assert list_event.api_calls == 3
+    assert list_event.filetype is None
+    assert prefix_event.path == 'df.pq'
+    # One listing, and one request to read the object found
+    assert prefix_event.api_calls == 2
+    assert 'list' in prefix_event.phases
+
+
+def test_generator_event(setup_bucket_w_dfs, test_bucket, events):
+    """
+    Tests that reading in chunks reports an event once the chunks are
+    exhausted, or when reading is stopped early
+    """
+    chunks = read_df_in_chunks('df.csv', test_bucket, chunk_size=1)
+    next(chunks)
+    assert not events
+    list(chunks)
+    assert len(events) == 1
+    assert events[0].operation == 'read_df_in_chunks'
+    assert set(events[0].phases) == {'download', 'deserialize'}
+
+    chunks = read_df_in_chunks('df.csv', test_bucket, chunk_size=1,
+                               stream=True)
+    next(chunks)
+    chunks.close()
+    assert len(events) == 2
+    assert events[1].error is None
+    assert events[1].bytes_transferred > 0
+
+
+def test_error_event(setup_bucket_wo_contents, test_bucket, events):
+    """Tests that failed operations report their error"""
+    with pytest.raises(Exception) as error:
+        read('missing.csv', test_bucket)
+
+    event, = events
+    assert event.error is error.value
+    assert event.api_calls == 1
+
+
+def test_stats_aggregator(setup_bucket_w_dfs, test_bucket):
+    """Tests that the aggregator reports percentiles by operation and format"""
+    stats = instrumentation.StatsAggregator()
+    instrumentation.add_callback(stats)
+    try:
+        for _ in range(3):
+            read('df.csv', test_bucket)
+        read('df.pq', test_bucket)
+    finally:
+        instrumentation.remove_callback(stats)
+    read('df.pq', test_bucket)
+
+    report = stats.report()
+    assert list(report.index) == [('read', 'csv'), ('read', 'pq')]
+    assert list(report['count']) == [3, 1]
+    assert list(report['api_calls']) == [3, 1]
+    csv_stats = report.loc[('read', 'csv')]
+    assert 0 < csv_stats['seconds_p50'] <= csv_stats['seconds_p95']
+    assert csv_stats['download_p50'] <= csv_stats['download_p95']
+
+    stats.reset()
+    assert stats.report().empty
@@ -1,4 +1,9 @@
-from rivet import list_objects, exists
+import time
+
+import boto3
+
+from rivet import list_objects, iter_objects, exists, exists_many
+from rivet.s3_client import get_s3_client
 
 
 def test_list_objects_w_objects(setup_bucket_w_contents,
@@ -74,6 +79,135 @@ def test_list_objects_include_prefix_and_recursive(setup_bucket_w_contents,
     assert objects == sorted(recursive_keys_w_prefix)
 
 
+def test_iter_objects_matches_list_objects(setup_bucket_w_contents,
+                                           test_bucket, test_keys):
+    """
+    Tests that rv.iter_objects yields the same keys as rv.list_objects,
+    in the same order, across listing options
+    """
+    key_w_nested_folder = get_key_w_nested_folder(test_keys)
+    prefix = key_w_nested_folder.split('/', 1)[0] + '/'
+
+    for path in ['', prefix]:
+        for include_prefix in [False, True]:
+            for recursive in [False, True]:
+                kwargs = {'path': path, 'bucket': test_bucket,
+                          'include_prefix': include_prefix,
+                          'recursive': recursive}
+                keys = [obj['Key'] for obj in iter_objects(**kwargs)]
+                assert keys == list_objects(**kwargs)
+
+
+def test_iter_objects_metadata(setup_bucket_wo_contents, test_bucket):
+    """
+    Tests that rv.iter_objects includes object metadata, and folder entries
+    when not listing recursively
+    """
+    s3 = boto3.client('s3')
+    s3.put_object(Bucket=test_bucket, Key='test_key.csv', Body=b'abc')
+    s3.put_object(Bucket=test_bucket, Key='folder0/test_key.csv', Body=b'')
+
+    folder, obj = iter_objects(bucket=test_bucket)
+    assert folder == {'Key': 'folder0/', 'Size': None, 'ETag': None,
+                      'LastModified': None, 'StorageClass': None}
+    assert obj['Key'] == 'test_key.csv'
+    assert obj['Size'] == 3
+    etag = s3.head_object(Bucket=test_bucket, Key='test_key.csv')['ETag']
+    assert obj['ETag'] == etag
+    assert obj['LastModified'] is not None
+    assert obj['StorageClass'] == 'STANDARD'
+
+
+def test_iter_objects_early_termination(setup_bucket_wo_contents,
+                                        test_bucket, monkeypatch):
+    """
+    Tests that rv.iter_objects yields results before the listing completes,
+    and stops listing when iteration stops
+    """
+    s3 = boto3.client('s3')
+    for i in range(1500):
+        s3.put_object(Bucket=test_bucket,
+                      Key='test_key_{:04d}.csv'.format(i), Body='')
+
+    client = get_s3_client()
+    list_objects_v2 = client.list_objects_v2
+    calls = []
+
+    def counting_list_objects_v2(**kwargs):
+        calls.append(kwargs)
+        return list_objects_v2(**kwargs)
+    monkeypatch.setattr(client, 'list_objects_v2', counting_list_objects_v2)
+
+    for obj in iter_objects(bucket=test_bucket):
+        break
+    assert obj['Key'] == 'test_key_0000.csv'
+    assert len(calls) == 1
+
+
+def test_list_objects_parallel(setup_bucket_wo_contents, test_bucket):
+    """
+    Tests that parallel listing returns the same keys as a sequential
+    listing, whether shards are discovered from folders or provided
+    """
+    s3 = boto3.client('s3')
+    keys = (['folder{}/test_key_{}.csv'.format(i, j)
+             for i in range(3) for j in range(250)]
+            + ['test_key_{}.csv'.format(i) for i in range(50)]
+            + ['_test_key.csv', '~test_key.csv'])
+    for key in keys:
+        s3.put_object(Bucket=test_bucket, Key=key, Body='')
+
+    for shard_chars in [None, 'fot', 'abcdef0123456789']:
+        for path in ['', 'folder1/']:
+            expected = list_objects(path=path, bucket=test_bucket,
+                                    recursive=True)
+            objects = list_objects(path=path, bucket=test_bucket,
+                                   recursive=True, parallel=True,
+                                   shard_chars=shard_chars, max_workers=4)
+            assert objects == expected
+
+            expected = [obj['Key'] for obj in iter_objects(
+                path=path, bucket=test_bucket, recursive=True)]
+            objects = [obj['Key'] for obj in iter_objects(
+                path=path, bucket=test_bucket, recursive=True,
+                parallel=True, shard_chars=shard_chars, max_workers=4)]
+            assert objects == expected
+
+    assert (list_objects(bucket=test_bucket, parallel=True)
+            == list_objects(bucket=test_bucket))
+
+
+def test_iter_objects_parallel_early_termination(setup_bucket_wo_contents,
+                                                 test_bucket, monkeypatch):
+    """
+    Tests that a parallel listing does not start listing any more shards
+    once iteration stops
+    """
+    s3 = boto3.client('s3')
+    shard_chars = '0123456789'
+    for char in shard_chars:
+        s3.put_object(Bucket=test_bucket, Key='{}.csv'.format(char), Body='')
+
+    client = get_s3_client()
+    list_objects_v2 = client.list_objects_v2
+    calls = []
+
+    def slow_list_objects_v2(**kwargs):
+        calls.append(kwargs)
+        # Keeps the worker busy with later shards while iteration stops
+        if len(calls) > 2:
+            time.sleep(0.5)
+        return list_objects_v2(**kwargs)
+    monkeypatch.setattr(client, 'list_objects_v2', slow_list_objects_v2)
+
+    for obj in iter_objects(bucket=test_bucket, recursive=True,
+                            parallel=True, shard_chars=shard_chars,
+                            max_workers=1):
+        break
+    assert obj['Key'] == '0.csv'
+    assert len(calls) <= 3
+
+
 def test_exists_w_object_present(setup_bucket_w_contents,
                                  test_bucket, test_keys):
     """Tests that rv.exists will return True if a matching path is found"""
@@ -97,6 +231,47 @@ def test_exists_only_exact_match(setup_bucket_w_contents,
     assert not exists(partial_key[0], test_bucket)
 
 
+def test_exists_folder(setup_bucket_w_contents, test_bucket, test_keys):
+    """
+    Tests that paths ending in '/' exist if any object exists under them
+    """
+    key_w_folder = get_key_w_folder_wo_nested_folder(test_keys)
+    folder = key_w_folder[:key_w_folder.find('/') + 1]
+    assert exists(folder, test_bucket)
+    assert not exists('nonexistent_folder/', test_bucket)
+
+
+def test_exists_many(setup_bucket_w_contents, test_bucket, test_keys):
+    """
+    Tests that rv.exists_many returns whether each key exists, in the order
+    the keys were provided
+    """
+    paths = list(reversed(test_keys)) + ['nonexistent_key.csv', 'folder1/']
+    expected = {path: path in test_keys for path in paths}
+    expected['folder1/'] = True
+
+    results = exists_many(paths, test_bucket)
+    assert results == expected
+    assert list(results.keys()) == paths
+
+
+def test_exists_many_beyond_listing_budget(setup_bucket_wo_contents,
+                                           test_bucket):
+    """
+    Tests that keys not covered by the bounded listing are still
+    checked correctly
+    """
+    s3 = boto3.client('s3')
+    keys = ['test_key_{:04d}.csv'.format(i) for i in range(1500)]
+    for key in keys:
+        s3.put_object(Bucket=test_bucket, Key=key, Body='')
+
+    paths = [keys[0], keys[-1], 'test_key_9999.csv', 'other_key.csv']
+    results = exists_many(paths, test_bucket, max_workers=4)
+    assert results == {keys[0]: True, keys[-1]: True,
+                       'test_key_9999.csv': False, 'other_key.csv': False}
+
+
 def test_list_regexp_matching(setup_bucket_w_contents,
                               test_bucket, test_keys):
     """
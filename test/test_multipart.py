@@ -0,0 +1,90 @@
+import os
+
+import boto3
+import pytest
+
+from rivet import s3_multipart
+from rivet.s3_multipart import MIN_PART_SIZE, S3MultipartWriter
+
+
+def test_multipart_writer(setup_bucket_wo_contents, test_bucket):
+    """
+    Tests that data written across several parts is uploaded intact,
+    regardless of how the writes line up with part boundaries
+    """
+    s3 = boto3.client('s3')
+    data = os.urandom(2 * MIN_PART_SIZE + 12345)
+
+    writer = S3MultipartWriter(test_bucket, 'obj.bin',
+                               part_size=MIN_PART_SIZE, max_concurrency=2)
+    for start in range(0, len(data), 1000003):
+        writer.write(data[start:start + 1000003])
+    assert writer.tell() == len(data)
+    writer.close()
+
+    obj = s3.get_object(Bucket=test_bucket, Key='obj.bin')
+    assert obj['Body'].read() == data
+    assert obj['ETag'].endswith('-3"')
+
+
+def test_multipart_writer_small_object(setup_bucket_wo_contents,
+                                       test_bucket):
+    """
+    Tests that objects smaller than a part are uploaded with a single request
+    """
+    s3 = boto3.client('s3')
+
+    writer = S3MultipartWriter(test_bucket, 'obj.bin',
+                               part_size=MIN_PART_SIZE, max_concurrency=2)
+    writer.write(b'abc')
+    writer.close()
+
+    obj = s3.get_object(Bucket=test_bucket, Key='obj.bin')
+    assert obj['Body'].read() == b'abc'
+    assert '-' not in obj['ETag']
+
+
+def test_multipart_writer_abort(setup_bucket_wo_contents, test_bucket):
+    """
+    Tests that aborting a write discards the upload, leaving no object
+    """
+    s3 = boto3.client('s3')
+
+    writer = S3MultipartWriter(test_bucket, 'obj.bin',
+                               part_size=MIN_PART_SIZE, max_concurrency=2)
+    writer.write(os.urandom(MIN_PART_SIZE + 1))
+    writer.abort()
+
+    assert 'Contents' not in s3.list_objects_v2(Bucket=test_bucket)
+    assert 'Uploads' not in s3.list_multipart_uploads(Bucket=test_bucket)
+    with pytest.raises(ValueError, match='closed'):
+        writer.write(b'abc')
+
+
+def test_multipart_writer_part_limit(setup_bucket_wo_contents, test_bucket,
+                                     monkeypatch):
+    """
+    Tests that the part size grows as parts are uploaded, so that uploads
+    stay within the maximum number of parts, and that exceeding it fails
+    """
+    s3 = boto3.client('s3')
+    monkeypatch.setattr(s3_multipart, 'PARTS_PER_PART_SIZE', 2)
+    data = os.urandom(5 * MIN_PART_SIZE)
+
+    writer = S3MultipartWriter(test_bucket, 'obj.bin',
+                               part_size=MIN_PART_SIZE, max_concurrency=2)
+    writer.write(data)
+    # Two parts of 5 MiB, then one of 10 MiB, leaving 5 MiB buffered
+    assert writer.part_size == 2 * MIN_PART_SIZE
+    writer.close()
+
+    obj = s3.get_object(Bucket=test_bucket, Key='obj.bin')
+    assert obj['Body'].read() == data
+    assert obj['ETag'].endswith('-4"')
+
+    monkeypatch.setattr(s3_multipart, 'MAX_PARTS', 1)
+    writer = S3MultipartWriter(test_bucket, 'obj.bin',
+                               part_size=MIN_PART_SIZE, max_concurrency=2)
+    with pytest.raises(ValueError, match='limited to 1 parts'):
+        writer.write(os.urandom(2 * MIN_PART_SIZE))
+    writer.abort()
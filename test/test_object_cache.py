@@ -0,0 +1,99 @@
+import boto3
+import pytest
+
+from rivet import get_option, read, read_many, set_option, s3_object_cache
+from rivet.s3_client import get_s3_client
+
+
+@pytest.fixture
+def object_cache():
+    """Enables the in-memory cache of objects read"""
+    max_size = get_option('object_cache_max_size')
+    set_option('object_cache_max_size', 1024 ** 2)
+    s3_object_cache.clear()
+    yield
+    s3_object_cache.clear()
+    set_option('object_cache_max_size', max_size)
+    set_option('object_cache_copy', True)
+
+
+@pytest.fixture
+def get_object_calls(monkeypatch):
+    """Records the arguments of GET requests made with the shared client"""
+    client = get_s3_client()
+    get_object = client.get_object
+    calls = []
+
+    def recording_get_object(**kwargs):
+        calls.append(kwargs)
+        return get_object(**kwargs)
+    monkeypatch.setattr(client, 'get_object', recording_get_object)
+    return calls
+
+
+def test_read_cached_in_memory(setup_bucket_w_dfs, test_bucket, test_df,
+                               object_cache, get_object_calls):
+    """
+    Tests that unchanged objects are revalidated with a single conditional
+    request, and that changed objects are read again
+    """
+    df = read('df.csv', test_bucket)
+    assert df.equals(test_df)
+    calls_when_read = len(get_object_calls)
+
+    df = read('df.csv', test_bucket)
+    assert df.equals(test_df)
+    assert len(get_object_calls) == calls_when_read + 1
+    assert 'IfNoneMatch' in get_object_calls[-1]
+
+    # Objects read with different arguments are cached separately
+    df = read('df.csv', test_bucket, usecols=[0])
+    assert list(df.columns) == [test_df.columns[0]]
+    assert read('df.pq', test_bucket).equals(test_df)
+    assert read('df.pq', test_bucket, as_arrow=True).num_rows == len(test_df)
+
+    s3 = boto3.client('s3')
+    changed_df = test_df.head(1)
+    s3.put_object(Bucket=test_bucket, Key='df.csv',
+                  Body=changed_df.to_csv(index=False))
+    assert read('df.csv', test_bucket).equals(changed_df)
+    assert read_many(['df.csv'], test_bucket, concat=False)[0].equals(changed_df)
+
+
+def test_read_cached_in_memory_copies(setup_bucket_w_dfs, test_bucket,
+                                      test_df, object_cache):
+    """
+    Tests that objects from the cache are copies or read-only, as configured
+    """
+    df = read('df.csv', test_bucket)
+    df.iloc[0, 0] = 100
+    assert read('df.csv', test_bucket).equals(test_df)
+
+    set_option('object_cache_copy', False)
+    s3_object_cache.clear()
+    df = read('df.csv', test_bucket)
+    with pytest.raises(ValueError):
+        df.iloc[0, 0] = 100
+    df['new_col'] = 1
+    assert read('df.csv', test_bucket).equals(test_df)
+
+
+def test_read_cached_in_memory_eviction(setup_bucket_w_dfs, test_bucket,
+                                        test_df, object_cache,
+                                        get_object_calls):
+    """
+    Tests that the least recently used objects are evicted once the cache
+    grows beyond its maximum size
+    """
+    df_size = test_df.memory_usage(index=True, deep=True).sum()
+    set_option('object_cache_max_size', int(df_size * 2.5))
+
+    for key in ['df.csv', 'df.psv', 'df.csv', 'df.json']:
+        read(key, test_bucket)
+    del get_object_calls[:]
+
+    read('df.csv', test_bucket)
+    read('df.json', test_bucket)
+    assert len(get_object_calls) == 2
+    read('df.psv', test_bucket)
+    assert len(get_object_calls) > 3
@@ -0,0 +1,81 @@
+import threading
+
+import boto3
+
+from rivet.s3_progressbar import S3ProgressBar
+
+
+def test_filesize_from_head_object(setup_bucket_wo_contents, test_bucket):
+    """
+    Tests that the size of an S3 object is looked up without downloading it
+    """
+    s3 = boto3.client('s3')
+    s3.put_object(Bucket=test_bucket, Key='obj.csv', Body=b'a' * 100)
+
+    progressbar = S3ProgressBar('obj.csv', test_bucket, 'read')
+    assert progressbar.filesize == 100
+
+
+def test_provided_filesize(capsys):
+    """Tests that a provided size is used without contacting S3"""
+    progressbar = S3ProgressBar('obj.csv', 'nonexistent_bucket', 'read',
+                                filesize=10)
+    progressbar(10)
+    assert '100.00%' in capsys.readouterr().out
+
+
+def test_redraws_are_throttled(capsys):
+    """
+    Tests that only the first update and the final update are drawn when
+    updates arrive faster than the redraw interval
+    """
+    progressbar = S3ProgressBar(filesize=100, redraw_interval=60)
+    for _ in range(100):
+        progressbar(1)
+
+    out = capsys.readouterr().out
+    assert out.count('\r') == 1
+    assert out.count('\n') == 1
+    assert '100.00%' in out
+
+
+def test_combined_concurrent_transfers(capsys):
+    """
+    Tests that progress from multiple transfers updating concurrently
+    is combined into a single progress bar
+    """
+    progressbar = S3ProgressBar(filesize=0, redraw_interval=60)
+    for _ in range(4):
+        progressbar.add_transfer(1000)
+
+    def transfer():
+        for _ in range(1000):
+            progressbar(1)
+
+    threads = [threading.Thread(target=transfer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert progressbar.progress == progressbar.filesize == 4000
+    assert capsys.readouterr().out.count('\n') == 1
+
+
+def test_finish_once_after_sequential_transfers(capsys):
+    """
+    Tests that a progress bar which transfers are added to one after another
+    is only drawn as completed once, when it is finished
+    """
+    progressbar = S3ProgressBar(filesize=0, redraw_interval=0,
+                                auto_finish=False)
+    for _ in range(3):
+        progressbar.add_transfer(10)
+        progressbar(10)
+    assert '\n' not in capsys.readouterr().out
+
+    progressbar.finish()
+    progressbar.finish()
+    out = capsys.readouterr().out
+    assert out.count('\n') == 1
+    assert '100.00%' in out
@@ -0,0 +1,117 @@
+import io
+import os
+
+import boto3
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from rivet import read
+from rivet.s3_ranged_get import S3RangeReader, download_in_ranges
+
+
+def test_download_in_ranges(setup_bucket_wo_contents, test_bucket):
+    """
+    Tests that objects downloaded in concurrent ranges are reassembled
+    correctly, both in memory and on disk, with progress reported for
+    the whole object
+    """
+    s3 = boto3.client('s3')
+    data = os.urandom(1024 ** 2 + 123)
+    s3.put_object(Bucket=test_bucket, Key='obj.bin', Body=data)
+
+    for max_in_memory_size in [None, 2 * 1024 ** 2]:
+        progress = []
+
+        def callback_factory(filesize):
+            assert filesize == len(data)
+            return progress.append
+
+        buffer = download_in_ranges(test_bucket, 'obj.bin',
+                                    part_size=100 * 1024, max_workers=4,
+                                    max_in_memory_size=max_in_memory_size,
+                                    callback_factory=callback_factory)
+        if max_in_memory_size:
+            assert isinstance(buffer, pa.BufferReader)
+        assert buffer.read() == data
+        assert sum(progress) == len(data)
+        buffer.close()
+
+
+def test_download_in_ranges_small_and_empty(setup_bucket_wo_contents,
+                                            test_bucket):
+    """
+    Tests that objects smaller than a single range, including empty
+    objects, are downloaded correctly
+    """
+    s3 = boto3.client('s3')
+    for data in [b'', b'abc']:
+        s3.put_object(Bucket=test_bucket, Key='obj.bin', Body=data)
+        buffer = download_in_ranges(test_bucket, 'obj.bin',
+                                    part_size=100 * 1024, max_workers=4,
+                                    max_in_memory_size=1024)
+        assert buffer.read() == data
+
+
+def test_s3_range_reader(setup_bucket_wo_contents, test_bucket):
+    """
+    Tests that S3RangeReader reads any part of an object, serving reads of
+    its end from the range requested on opening it
+    """
+    s3 = boto3.client('s3')
+    data = os.urandom(1000)
+    s3.put_object(Bucket=test_bucket, Key='data.bin', Body=data)
+    s3.put_object(Bucket=test_bucket, Key='empty.bin', Body=b'')
+
+    with S3RangeReader(test_bucket, 'data.bin', tail_size=100) as reader:
+        assert reader.size == 1000
+        reader.seek(-50, io.SEEK_END)
+        assert reader.read(20) == data[950:970]
+        assert reader.bytes_read == 100
+        reader.seek(10)
+        assert reader.read(30) == data[10:40]
+        assert reader.tell() == 40
+        assert reader.bytes_read == 130
+        reader.seek(990)
+        assert reader.read() == data[990:]
+        assert reader.read(10) == b''
+
+    with S3RangeReader(test_bucket, 'data.bin', tail_size=5000) as reader:
+        assert reader.size == 1000
+        assert reader.read() == data
+
+    with S3RangeReader(test_bucket, 'empty.bin') as reader:
+        assert reader.size == 0
+        assert reader.read() == b''
+
+
+def test_read_parquet_projected(setup_bucket_wo_contents, test_bucket,
+                                monkeypatch):
+    """
+    Tests that reading columns and filtered rows of a Parquet file only
+    downloads the parts of the file that are needed
+    """
+    df = pd.DataFrame({'col{}'.format(i): np.arange(100000) + i
+                       for i in range(20)})
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, row_group_size=10000, index=False)
+    s3 = boto3.client('s3')
+    s3.put_object(Bucket=test_bucket, Key='df.pq', Body=buffer.getvalue())
+
+    readers = []
+    init = S3RangeReader.__init__
+
+    def tracking_init(self, *args, **kwargs):
+        readers.append(self)
+        init(self, *args, **kwargs)
+    monkeypatch.setattr(S3RangeReader, '__init__', tracking_init)
+
+    result = read('df.pq', test_bucket, columns=['col1', 'col3'],
+                  filters=[('col0', '<', 15000)])
+    expected = df.loc[df['col0'] < 15000, ['col1', 'col3']]
+    assert result.equals(expected)
+    assert len(readers) == 1
+    assert readers[0].bytes_read < len(buffer.getvalue()) / 10
+
+    assert read('df.pq', test_bucket).equals(df)
+    assert len(readers) == 1
@@ -1,4 +1,12 @@
-from rivet import read
+import io
+import pickle
+
+import boto3
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from rivet import get_option, read, read_many, set_option, write
 
 
 def test_read_csv(setup_bucket_w_dfs, test_bucket, test_df, test_df_keys):
@@ -101,6 +109,21 @@ def test_read_json(setup_bucket_w_dfs, test_bucket, test_df, test_df_keys):
         assert df.equals(test_df)
 
 
+def test_read_jsonl(setup_bucket_w_dfs, test_bucket, test_df,
+                    test_df_keys):
+    """
+    Tests that reading files stored as JSON lines works properly, with and
+    without compression
+    """
+    for format in ['jsonl', 'jsonl.gz', 'jsonl.bz2']:
+        for key in test_df_keys[format]:
+            df = read(key, test_bucket)
+            assert df.equals(test_df)
+
+    columns = read('df.jsonl', test_bucket, dtype={'intcol': 'float64'})
+    assert columns['intcol'].dtype == 'float64'
+
+
 def test_read_pkl(setup_bucket_w_dfs, test_bucket, test_df, test_df_keys):
     """Tests that reading pickled files works properly"""
     for key in test_df_keys['pkl']:
@@ -120,3 +143,141 @@ def test_read_avro(setup_bucket_w_dfs, test_bucket, test_df, test_df_keys):
     for key in test_df_keys['avro']:
         df = read(key, test_bucket)
         assert df.equals(test_df)
+
+
+def test_read_as_arrow(setup_bucket_w_dfs, test_bucket, test_df,
+                       test_df_keys):
+    """
+    Tests that Parquet, feather and Avro files can be read into Arrow
+    tables, and that other formats are refused
+    """
+    expected = pa.Table.from_pandas(test_df, preserve_index=False)
+    for format in ['pq', 'feather', 'avro']:
+        for key in test_df_keys[format]:
+            table = read(key, test_bucket, as_arrow=True)
+            assert isinstance(table, pa.Table)
+            assert table.equals(expected)
+
+    columns = read('df.pq', test_bucket, as_arrow=True, columns=['strcol'])
+    assert columns.column_names == ['strcol']
+
+    tables = read_many(['df.pq', 'df.feather'], test_bucket, as_arrow=True,
+                       concat=True)
+    assert tables.num_rows == 2 * len(test_df)
+
+    with pytest.raises(IOError):
+        read('df.csv', test_bucket, as_arrow=True)
+
+
+def test_read_feather_memory_mapped(setup_bucket_wo_contents, test_bucket,
+                                    test_df):
+    """
+    Tests that feather files spilled to disk can be memory-mapped, with
+    the numeric columns of uncompressed files backed by the mapped file
+    """
+    write(test_df, 'mapped.feather', test_bucket,
+          compression='uncompressed')
+    max_size = get_option('read_buffer_max_size')
+    try:
+        for spill_limit in [0, max_size]:
+            set_option('read_buffer_max_size', spill_limit)
+            df = read('mapped.feather', test_bucket, memory_map=True)
+            assert df.equals(test_df)
+            assert not df['intcol'].to_numpy().flags.writeable
+
+            table = read('mapped.feather', test_bucket, as_arrow=True,
+                         memory_map=True)
+            assert table.to_pandas().equals(test_df)
+    finally:
+        set_option('read_buffer_max_size', max_size)
+
+
+def test_read_spilled_to_disk(setup_bucket_w_dfs, test_bucket, test_df,
+                              test_df_keys):
+    """
+    Tests that objects larger than the in-memory buffer limit are still read
+    properly once spilled to disk
+    """
+    max_size = get_option('read_buffer_max_size')
+    try:
+        for spill_limit in [0, 16]:
+            set_option('read_buffer_max_size', spill_limit)
+            for keys in test_df_keys.values():
+                for key in keys:
+                    df = read(key, test_bucket)
+                    assert df.equals(test_df)
+    finally:
+        set_option('read_buffer_max_size', max_size)
+
+
+def test_read_w_transfer_config(setup_bucket_w_dfs, test_bucket, test_df,
+                                test_df_keys):
+    """Tests that per-call transfer settings can be provided when reading"""
+    for key in test_df_keys['csv']:
+        df = read(key, test_bucket,
+                  transfer_config={'use_threads': False})
+        assert df.equals(test_df)
+
+
+def test_read_in_ranges(setup_bucket_wo_contents, test_bucket, test_df):
+    """
+    Tests that objects larger than a single range are read properly,
+    both from memory and once spilled to disk
+    """
+    s3 = boto3.client('s3')
+    big_df = pd.concat([test_df] * 100000, ignore_index=True)
+    buffer = io.BytesIO()
+    pickle.dump(big_df, buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    s3.put_object(Bucket=test_bucket, Key='df.pkl', Body=buffer.getvalue())
+
+    transfer_config = {'multipart_chunksize': 256 * 1024}
+    max_size = get_option('read_buffer_max_size')
+    try:
+        for spill_limit in [max_size, 0]:
+            set_option('read_buffer_max_size', spill_limit)
+            df = read('df.pkl', test_bucket, transfer_config=transfer_config)
+            assert df.equals(big_df)
+    finally:
+        set_option('read_buffer_max_size', max_size)
+
+
+def test_read_many(setup_bucket_w_dfs, test_bucket, test_df, test_df_keys):
+    """
+    Tests that rv.read_many reads every object, in the order provided,
+    whether given keys or a prefix
+    """
+    keys = [key for keys in test_df_keys.values() for key in keys]
+    dfs = read_many(keys, test_bucket, max_workers=4, concat=False)
+    assert len(dfs) == len(keys)
+    for df in dfs:
+        assert df.equals(test_df)
+
+    s3 = boto3.client('s3')
+    for i in reversed(range(3)):
+        s3.put_object(Bucket=test_bucket, Key='part/{}.csv'.format(i),
+                      Body=test_df.assign(part=i).to_csv(index=False))
+    df = read_many('part/', test_bucket)
+    assert list(df['part']) == [i for i in range(3) for _ in test_df.index]
+    assert list(df.index) == list(range(len(df)))
+
+
+def test_read_many_errors(setup_bucket_w_dfs, test_bucket, test_df):
+    """
+    Tests that rv.read_many reports every object that could not be read,
+    or returns the errors in their place when asked to
+    """
+    keys = ['df.csv', 'nonexistent.csv', 'df.pq', 'nonexistent.pq']
+    with pytest.raises(IOError) as e:
+        read_many(keys, test_bucket, concat=False)
+    assert 'nonexistent.csv' in str(e.value)
+    assert 'nonexistent.pq' in str(e.value)
+
+    objs = read_many(keys, test_bucket, concat=False,
+                     return_exceptions=True)
+    assert objs[0].equals(test_df)
+    assert isinstance(objs[1], Exception)
+    assert objs[2].equals(test_df)
+    assert isinstance(objs[3], Exception)
+
+    df = read_many(keys, test_bucket, return_exceptions=True)
+    assert df.equals(pd.concat([test_df] * 2, ignore_index=True))
@@ -1,9 +1,18 @@
+import io
+
+import boto3
+import pandas as pd
+import pandavro as pdx
+import pytest
+
 from rivet import read_df_in_chunks
+from rivet.storage_formats import get_chunk_readable_filetypes
 
 
 uncompressed_formats = [
     'csv',
-    'psv'
+    'psv',
+    'jsonl'
 ]
 
 compressed_formats = [
@@ -14,7 +23,9 @@ compressed_formats = [
     'psv.gz',
     'psv.zip',
     'psv.bz2',
-    'psv.xz'
+    'psv.xz',
+    'jsonl.gz',
+    'jsonl.bz2'
 ]
 
 
@@ -48,3 +59,114 @@ def test_read_df_in_chunks_compressed(setup_bucket_w_dfs, test_bucket,
                 assert test_df.loc[current_row:
                                    current_row + chunk_size].equals(df_chunk)
                 current_row += chunk_size
+
+
+def test_read_df_in_chunks_streamed(setup_bucket_w_dfs, test_bucket,
+                                    test_df, test_df_keys):
+    """
+    Tests that reading DataFrames in chunks while streaming works for
+    uncompressed textfiles and textfiles with streamable compression
+    """
+    chunk_size = 2
+
+    streamable_formats = [format for format in (uncompressed_formats
+                                                + compressed_formats)
+                          if not format.endswith('.zip')]
+    for format in streamable_formats:
+        for key in test_df_keys[format]:
+            current_row = 0
+            for df_chunk in read_df_in_chunks(key, test_bucket,
+                                              chunk_size=chunk_size,
+                                              stream=True):
+                assert test_df.iloc[current_row:
+                                    current_row + chunk_size].equals(df_chunk)
+                current_row += chunk_size
+            assert current_row >= len(test_df)
+
+
+def test_read_df_in_chunks_streamed_zip(setup_bucket_w_dfs, test_bucket,
+                                        test_df_keys):
+    """Tests that streaming is refused for zip archives"""
+    for key in test_df_keys['csv.zip']:
+        with pytest.raises(IOError, match='Streaming is not supported'):
+            next(read_df_in_chunks(key, test_bucket, stream=True))
+    assert 'csv.zip' not in get_chunk_readable_filetypes(stream=True)
+    assert 'psv.zip' not in get_chunk_readable_filetypes(stream=True)
+
+
+@pytest.fixture
+def setup_bucket_w_columnar_dfs(setup_bucket_wo_contents, test_bucket,
+                                long_test_df):
+    """
+    Sets up a bucket with a long DataFrame stored in columnar formats, with
+    row groups/record batches/blocks that don't line up with chunk sizes
+    """
+    s3 = boto3.client('s3')
+
+    buffer = io.BytesIO()
+    long_test_df.to_parquet(buffer, index=False, row_group_size=150)
+    s3.put_object(Bucket=test_bucket, Key='df.pq', Body=buffer.getvalue())
+
+    buffer = io.BytesIO()
+    long_test_df.to_feather(buffer, chunksize=64)
+    s3.put_object(Bucket=test_bucket, Key='df.feather',
+                  Body=buffer.getvalue())
+
+    buffer = io.BytesIO()
+    pdx.to_avro(buffer, long_test_df)
+    s3.put_object(Bucket=test_bucket, Key='df.avro', Body=buffer.getvalue())
+    yield
+
+
+@pytest.fixture
+def long_test_df(test_df):
+    """A DataFrame long enough to be split across many chunks"""
+    return pd.concat([test_df] * 334, ignore_index=True)
+
+
+def test_read_df_in_chunks_columnar(setup_bucket_w_columnar_dfs, test_bucket,
+                                    long_test_df):
+    """
+    Tests that reading DataFrames in chunks works for Parquet, feather and
+    Avro files, with chunks of the requested size
+    """
+    chunk_size = 100
+
+    for key in ['df.pq', 'df.feather', 'df.avro']:
+        chunks = list(read_df_in_chunks(key, test_bucket,
+                                        chunk_size=chunk_size))
+        chunk_sizes = [len(chunk) for chunk in chunks]
+        assert chunk_sizes[:-1] == [chunk_size] * (len(chunks) - 1)
+        assert pd.concat(chunks).equals(long_test_df)
+
+
+def test_read_df_in_chunks_avro_streamed(setup_bucket_w_columnar_dfs,
+                                         test_bucket, long_test_df):
+    """Tests that Avro files can be read in chunks while streaming"""
+    chunks = list(read_df_in_chunks('df.avro', test_bucket, chunk_size=100,
+                                    stream=True))
+    assert pd.concat(chunks).equals(long_test_df)
+
+
+def test_read_df_in_chunks_avro_options(setup_bucket_w_columnar_dfs,
+                                        test_bucket, long_test_df):
+    """
+    Tests that Avro chunks can be read with a subset of columns, and that
+    options which do not apply to Avro are refused
+    """
+    columns = list(long_test_df.columns[::-1])
+    chunks = list(read_df_in_chunks('df.avro', test_bucket, chunk_size=100,
+                                    columns=columns))
+    assert pd.concat(chunks).equals(long_test_df[columns])
+
+    with pytest.raises(TypeError):
+        next(read_df_in_chunks('df.avro', test_bucket, chunk_size=100,
+                               coerce_float=True))
+
+
+def test_read_df_in_chunks_unstreamable(setup_bucket_w_columnar_dfs,
+                                        test_bucket):
+    """Tests that streaming is refused for formats that need random access"""
+    for key in ['df.pq', 'df.feather']:
+        with pytest.raises(IOError, match='Streaming chunks is only'):
+            next(read_df_in_chunks(key, test_bucket, stream=True))
@@ -0,0 +1,161 @@
+import os
+import time
+
+import boto3
+import pytest
+
+from rivet import sync
+from rivet.s3_sync import _get_local_etag
+
+
+def write_files(local_dir, files):
+    """Writes files with the given contents, by relative path"""
+    for path, contents in files.items():
+        local_path = os.path.join(str(local_dir), *path.split('/'))
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        with open(local_path, 'wb') as f:
+            f.write(contents)
+
+
+def set_mtime(path, seconds_from_now):
+    """Sets the modification time of a file relative to the current time"""
+    mtime = time.time() + seconds_from_now
+    os.utime(str(path), (mtime, mtime))
+
+
+def test_sync_upload(setup_bucket_wo_contents, test_bucket, tmp_path):
+    """
+    Tests that syncing a directory to S3 only uploads new and changed files,
+    and deletes extra objects only when asked to
+    """
+    s3 = boto3.client('s3')
+    url = 's3://{}/synced'.format(test_bucket)
+    write_files(tmp_path, {'a.csv': b'a', 'nested/b.csv': b'b'})
+
+    result = sync(str(tmp_path), url)
+    assert result.transferred == ['a.csv', 'nested/b.csv']
+    assert result.bytes_transferred == 2
+    assert s3.get_object(Bucket=test_bucket,
+                         Key='synced/nested/b.csv')['Body'].read() == b'b'
+
+    s3.put_object(Bucket=test_bucket, Key='synced/extra.csv', Body=b'')
+    write_files(tmp_path, {'a.csv': b'c', 'new.csv': b'new'})
+    # Modification times are only compared to the second
+    set_mtime(tmp_path / 'a.csv', 10)
+    for compare in ['etag', 'mtime']:
+        result = sync(str(tmp_path), url, delete=True, dry_run=True,
+                      compare=compare)
+        assert result.transferred == ['a.csv', 'new.csv']
+        assert result.deleted == ['extra.csv']
+        assert result.bytes_transferred == 4
+    assert s3.get_object(Bucket=test_bucket,
+                         Key='synced/a.csv')['Body'].read() == b'a'
+
+    result = sync(str(tmp_path), url, delete=True)
+    assert result.transferred == ['a.csv', 'new.csv']
+    keys = [obj['Key'] for obj in
+            s3.list_objects_v2(Bucket=test_bucket)['Contents']]
+    assert sorted(keys) == ['synced/a.csv', 'synced/nested/b.csv',
+                            'synced/new.csv']
+
+    assert sync(str(tmp_path), url).transferred == []
+
+
+def test_sync_download(setup_bucket_wo_contents, test_bucket, tmp_path):
+    """
+    Tests that syncing S3 to a directory only downloads new and changed
+    objects, and deletes extra files only when asked to
+    """
+    s3 = boto3.client('s3')
+    url = 's3://{}/synced/'.format(test_bucket)
+    for key, body in [('a.csv', b'a'), ('nested/b.csv', b'b')]:
+        s3.put_object(Bucket=test_bucket, Key='synced/' + key, Body=body)
+    s3.put_object(Bucket=test_bucket, Key='other.csv', Body=b'')
+    write_files(tmp_path, {'extra.csv': b'', 'a.csv': b'x'})
+
+    result = sync(url, str(tmp_path))
+    assert result.transferred == ['a.csv', 'nested/b.csv']
+    with open(str(tmp_path / 'nested' / 'b.csv'), 'rb') as f:
+        assert f.read() == b'b'
+    assert os.path.exists(str(tmp_path / 'extra.csv'))
+
+    result = sync(url, str(tmp_path), delete=True)
+    assert result.transferred == []
+    assert result.deleted == ['extra.csv']
+    assert not os.path.exists(str(tmp_path / 'extra.csv'))
+
+    s3.put_object(Bucket=test_bucket, Key='synced/a.csv', Body=b'c')
+    set_mtime(tmp_path / 'a.csv', -10)
+    for compare in ['etag', 'mtime']:
+        result = sync(url, str(tmp_path), dry_run=True, compare=compare)
+        assert result.transferred == ['a.csv']
+
+
+def test_sync_unsafe(setup_bucket_wo_contents, test_bucket, tmp_path):
+    """
+    Tests that syncs refuse to delete a whole bucket, to treat a missing
+    directory as an empty one, or to download keys outside of the directory
+    """
+    s3 = boto3.client('s3')
+    s3.put_object(Bucket=test_bucket, Key='synced/a.csv', Body=b'a')
+    url = 's3://{}/synced/'.format(test_bucket)
+
+    with pytest.raises(IOError):
+        sync(str(tmp_path / 'typo'), url, delete=True)
+    with pytest.raises(ValueError, match='unsafe'):
+        sync(str(tmp_path), 's3://{}'.format(test_bucket), delete=True)
+    assert s3.list_objects_v2(Bucket=test_bucket)['KeyCount'] == 1
+
+    s3.put_object(Bucket=test_bucket, Key='synced/../escape.csv', Body=b'')
+    dest = tmp_path / 'dest'
+    with pytest.raises(ValueError, match='outside'):
+        sync(url, str(dest))
+    assert not os.path.exists(str(tmp_path / 'escape.csv'))
+    assert not os.path.exists(str(dest / 'a.csv'))
+
+
+def test_sync_invalid(tmp_path):
+    """Tests that syncs must be between a local directory and S3"""
+    with pytest.raises(ValueError):
+        sync(str(tmp_path), str(tmp_path))
+    with pytest.raises(ValueError):
+        sync('s3://test_bucket/a/', 's3://test_bucket/b/')
+    with pytest.raises(ValueError):
+        sync(str(tmp_path), 's3://test_bucket/a/', compare='size')
+
+
+def test_local_multipart_etag(setup_bucket_wo_contents, test_bucket,
+                              tmp_path):
+    """
+    Tests that the ETags of local files match those of objects uploaded
+    in a single part or in several parts, including a part size other than
+    the default
+    """
+    s3 = boto3.client('s3')
+    part_size = 5 * 1024 ** 2
+    files = {'single.bin': os.urandom(1024),
+             'multi.bin': os.urandom(2 * part_size + 1024),
+             'boundary.bin': os.urandom(2 * part_size)}
+    write_files(tmp_path, files)
+
+    for name, body in files.items():
+        parts = [body[i:i + part_size] for i in range(0, len(body), part_size)]
+        if len(parts) == 1:
+            etag = s3.put_object(Bucket=test_bucket, Key=name,
+                                 Body=body)['ETag']
+        else:
+            upload_id = s3.create_multipart_upload(
+                Bucket=test_bucket, Key=name)['UploadId']
+            etags = [s3.upload_part(Bucket=test_bucket, Key=name,
+                                    UploadId=upload_id, PartNumber=i + 1,
+                                    Body=part)['ETag']
+                     for i, part in enumerate(parts)]
+            etag = s3.complete_multipart_upload(
+                Bucket=test_bucket, Key=name, UploadId=upload_id,
+                MultipartUpload={'Parts': [
+                    {'PartNumber': i + 1, 'ETag': part_etag}
+                    for i, part_etag in enumerate(etags)]})['ETag']
+        local_path = str(tmp_path / name)
+        for default_part_size in [part_size, 8 * 1024 ** 2]:
+            assert _get_local_etag(local_path, etag,
+                                   default_part_size) == etag
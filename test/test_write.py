@@ -3,8 +3,11 @@ from tempfile import NamedTemporaryFile
 
 import boto3
 import pandas as pd
+import pyarrow as pa
+import pytest
 
-from rivet import write
+from rivet import (open_writer, read, read_many, write, write_df_in_chunks,
+                   write_partitioned)
 
 
 def test_write_csv(setup_bucket_wo_contents, test_bucket,
@@ -191,6 +194,41 @@ def test_write_json(setup_bucket_wo_contents, test_bucket,
             assert df.equals(test_df)
 
 
+def test_write_json_hive_format(setup_bucket_wo_contents, test_bucket,
+                                test_df):
+    """
+    Tests that JSON written in Hive format has one record per line, keeping
+    column types, and can be read back
+    """
+    s3 = boto3.client('s3')
+    write(test_df, 'df.json', test_bucket, hive_format=True)
+
+    lines = s3.get_object(Bucket=test_bucket, Key='df.json')['Body'].read()
+    assert lines.decode('utf-8').splitlines()[0] == (
+        '{"intcol":1,"strcol":"four","floatcol":7.0}')
+    assert read('df.json', test_bucket, lines=True).equals(test_df)
+
+
+def test_write_jsonl(setup_bucket_wo_contents, test_bucket, test_df):
+    """
+    Tests that writing files stored as JSON lines works properly, with and
+    without compression
+    """
+    s3 = boto3.client('s3')
+
+    for format in ['jsonl', 'jsonl.gz', 'jsonl.bz2']:
+        key = 'df.' + format
+        write(test_df, key, test_bucket)
+
+        with NamedTemporaryFile(suffix='.' + format) as tmpfile:
+            s3.download_file(test_bucket, key, tmpfile.name)
+            df = pd.read_json(tmpfile.name, lines=True)
+            assert df.equals(test_df)
+
+    with pytest.raises(TypeError):
+        write([1, 2, 3], 'list.jsonl', test_bucket)
+
+
 def test_write_pkl(setup_bucket_w_dfs, test_bucket, test_df, test_df_keys):
     """Tests that writing pickled files works properly"""
     s3 = boto3.client('s3')
@@ -207,6 +245,22 @@ def test_write_pkl(setup_bucket_w_dfs, test_bucket, test_df, test_df_keys):
                 assert df.equals(test_df)
 
 
+def test_write_positional_args(setup_bucket_wo_contents, test_bucket,
+                               test_df):
+    """
+    Tests that extra positional arguments are passed through to the
+    format's writer and reader
+    """
+    write(test_df, 'df.pkl', test_bucket, False, 2)
+    body = boto3.client('s3').get_object(Bucket=test_bucket, Key='df.pkl')
+    # Pickles start with their protocol number
+    assert body['Body'].read()[:2] == b'\x80\x02'
+
+    write(test_df, 'df.pq', test_bucket)
+    # The Parquet engine is the first argument of 'pd.read_parquet'
+    assert read('df.pq', test_bucket, False, 'pyarrow').equals(test_df)
+
+
 def test_write_pq(setup_bucket_w_dfs, test_bucket, test_df, test_df_keys):
     """Tests that writing files stored as Parquet works properly"""
     s3 = boto3.client('s3')
@@ -231,3 +285,193 @@ def test_write_avro(setup_bucket_w_dfs, test_bucket, test_df, test_df_keys):
             s3.download_file(test_bucket, key, tmpfile.name)
             df = pd.read_parquet(tmpfile.name)
             assert df.equals(test_df)
+
+
+def test_write_arrow_table(setup_bucket_wo_contents, test_bucket,
+                           test_df):
+    """
+    Tests that Arrow tables can be written to Parquet, feather and Avro,
+    but not to formats that only take DataFrames
+    """
+    table = pa.Table.from_pandas(test_df, preserve_index=False)
+    for format in ['pq', 'feather', 'avro']:
+        key = 'table.' + format
+        write(table, key, test_bucket)
+        assert read(key, test_bucket).equals(test_df)
+
+    with pytest.raises(TypeError):
+        write(table, 'table.jsonl', test_bucket)
+
+
+def test_write_w_transfer_config(setup_bucket_wo_contents, test_bucket,
+                                 test_df, test_df_keys):
+    """
+    Tests that per-call transfer settings can be provided when writing,
+    including ones that force a multipart upload
+    """
+    s3 = boto3.client('s3')
+    big_df = pd.concat([test_df] * 200000, ignore_index=True)
+
+    for key in test_df_keys['csv']:
+        write(big_df, key, test_bucket,
+              transfer_config={'multipart_threshold': 5 * 1024 ** 2,
+                               'multipart_chunksize': 5 * 1024 ** 2})
+
+        with NamedTemporaryFile() as tmpfile:
+            s3.download_file(test_bucket, key, tmpfile.name)
+            df = pd.read_csv(tmpfile.name)
+            assert df.equals(big_df)
+
+
+def test_write_df_in_chunks(setup_bucket_wo_contents, test_bucket,
+                            test_df):
+    """
+    Tests that DataFrames written in chunks are read back as a single
+    DataFrame, for each format that supports writing in chunks
+    """
+    s3 = boto3.client('s3')
+    chunks = [test_df.iloc[i:i + 2] for i in range(0, len(test_df), 2)]
+
+    read_fns = {
+        'csv': pd.read_csv,
+        'csv.gz': pd.read_csv,
+        'csv.bz2': pd.read_csv,
+        'csv.xz': pd.read_csv,
+        'psv': lambda f: pd.read_csv(f, sep='|'),
+        'psv.gz': lambda f: pd.read_csv(f, sep='|'),
+        'json': lambda f: pd.read_json(f, lines=True),
+        'pq': pd.read_parquet
+    }
+    for filetype, read_fn in read_fns.items():
+        key = 'df.' + filetype
+        write_df_in_chunks(iter(chunks), key, test_bucket)
+
+        with NamedTemporaryFile(suffix='.' + filetype) as tmpfile:
+            s3.download_file(test_bucket, key, tmpfile.name)
+            df = read_fn(tmpfile.name)
+            assert df.equals(test_df)
+
+
+def test_write_df_in_chunks_multipart(setup_bucket_wo_contents, test_bucket,
+                                      test_df):
+    """
+    Tests that DataFrames written in chunks are uploaded in multiple parts
+    once they outgrow a single part
+    """
+    s3 = boto3.client('s3')
+    chunk = pd.concat([test_df] * 50000, ignore_index=True)
+    chunks = [chunk] * 5
+
+    write_df_in_chunks(chunks, 'df.csv', test_bucket,
+                       transfer_config={'multipart_chunksize': 1})
+
+    # Multipart ETags end with the number of parts
+    etag = s3.head_object(Bucket=test_bucket, Key='df.csv')['ETag']
+    assert int(etag.strip('"').split('-')[1]) > 1
+    with NamedTemporaryFile() as tmpfile:
+        s3.download_file(test_bucket, 'df.csv', tmpfile.name)
+        df = pd.read_csv(tmpfile.name)
+        assert df.equals(pd.concat(chunks, ignore_index=True))
+
+
+def test_write_df_in_chunks_unsupported(setup_bucket_wo_contents,
+                                        test_bucket, test_df):
+    """Tests that unsupported formats are refused"""
+    for key in ['df.csv.zip', 'df.avro', 'df.pkl']:
+        with pytest.raises(IOError, match='only supported'):
+            write_df_in_chunks([test_df], key, test_bucket)
+
+
+def test_open_writer_error(setup_bucket_wo_contents, test_bucket):
+    """
+    Tests that no object is left behind if an error occurs while writing
+    """
+    s3 = boto3.client('s3')
+
+    with pytest.raises(RuntimeError):
+        with open_writer('obj.csv', test_bucket) as writer:
+            writer.write(b'abc')
+            raise RuntimeError()
+    assert 'Contents' not in s3.list_objects_v2(Bucket=test_bucket)
+
+
+def test_write_partitioned(setup_bucket_wo_contents, test_bucket):
+    """
+    Tests that rv.write_partitioned writes one object per partition, in the
+    Hive-style layout, and returns their keys
+    """
+    df = pd.DataFrame({
+        'date': ['2021-01-01', '2021-01-02', '2021-01-01', '2021-01-02',
+                 None],
+        'region': ['us', 'us', 'eu/west', 'us', 'us'],
+        'value': [1, 2, 3, 4, 5]
+    })
+    keys = write_partitioned(df, 'dataset', ['date', 'region'],
+                             test_bucket, max_workers=2)
+    assert keys == [
+        'dataset/date=2021-01-01/region=eu%2Fwest/part-00000.parquet',
+        'dataset/date=2021-01-01/region=us/part-00000.parquet',
+        'dataset/date=2021-01-02/region=us/part-00000.parquet',
+        'dataset/date=__HIVE_DEFAULT_PARTITION__/region=us/part-00000.parquet'
+    ]
+
+    s3 = boto3.client('s3')
+    listed = [obj['Key'] for obj in
+              s3.list_objects_v2(Bucket=test_bucket)['Contents']]
+    assert sorted(listed) == sorted(keys)
+
+    dfs = read_many(keys, test_bucket, concat=False)
+    assert [list(df.columns) for df in dfs] == [['value']] * 4
+    assert [list(df['value']) for df in dfs] == [[3], [1], [2, 4], [5]]
+
+
+def test_write_partitioned_csv(setup_bucket_wo_contents, test_bucket):
+    """
+    Tests that rv.write_partitioned writes other formats, passing arguments
+    through to the format's writer
+    """
+    df = pd.DataFrame({'region': ['us', 'eu'], 'value': [1, 2]})
+    keys = write_partitioned(df, 'dataset/', 'region', test_bucket,
+                             format='csv.gz', filename='data.csv.gz',
+                             sep=';')
+    assert keys == ['dataset/region=eu/data.csv.gz',
+                    'dataset/region=us/data.csv.gz']
+    dfs = read_many(keys, test_bucket, concat=False, sep=';')
+    assert [list(df['value']) for df in dfs] == [[2], [1]]
+
+
+def test_write_partitioned_periods(setup_bucket_wo_contents, test_bucket):
+    """
+    Tests that rv.write_partitioned escapes the periods in float and dotted
+    partition values, which rivet does not permit outside file extensions
+    """
+    df = pd.DataFrame({'p': [1.5, 2.0, None], 'q': ['a.b', 'c', 'd'],
+                       'value': [1, 2, 3]})
+    keys = write_partitioned(df, 'dataset', ['p', 'q'], test_bucket)
+    assert keys == [
+        'dataset/p=1%2E5/q=a%2Eb/part-00000.parquet',
+        'dataset/p=2%2E0/q=c/part-00000.parquet',
+        'dataset/p=__HIVE_DEFAULT_PARTITION__/q=d/part-00000.parquet'
+    ]
+    dfs = read_many(keys, test_bucket, concat=False)
+    assert [list(df['value']) for df in dfs] == [[1], [2], [3]]
+
+
+def test_write_partitioned_invalid(setup_bucket_wo_contents, test_bucket):
+    """
+    Tests that rv.write_partitioned refuses partition columns it cannot use
+    """
+    df = pd.DataFrame({'region': ['us', 'eu'], 'value': [1, 2]})
+    with pytest.raises(KeyError):
+        write_partitioned(df, 'dataset', ['date'], test_bucket)
+    with pytest.raises(ValueError):
+        write_partitioned(df, 'dataset', ['region', 'value'], test_bucket)
+    with pytest.raises(ValueError):
+        write_partitioned(df, 'dataset', [], test_bucket)
+
+    # Invalid keys are refused before any partition is written
+    with pytest.raises(ValueError):
+        write_partitioned(df, 'dataset', 'region', test_bucket,
+                          filename='part.v1.parquet')
+    s3 = boto3.client('s3')
+    assert 'Contents' not in s3.list_objects_v2(Bucket=test_bucket)